@@ -1,9 +1,20 @@
 # app.py
 
+import os
+import re
+
+import numpy as np
 import streamlit as st
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+from page_archive import PageArchive
+from price_history import PriceHistory
+from reference_ingest import build_plan
+from run_metrics import RunMetrics
+from result_cache import ResultCache
+from result_sink import results_stream_path
+from run_journal import journal_path
+from scrape_jobs import STATUS_DONE, STATUS_FAILED, STREAMLIT_SCRAPER_OPTIONS, registry
+from suppliers import CarloErbaSupplier
 #from cryptography.fernet import Fernet
 
 # -------------------------------
@@ -58,164 +69,246 @@ if search_option in ['Excel', 'Excel + Manuel']:
 # Entrée manuelle de références
 manual_references = st.text_input("Références manuelles (séparées par une virgule)")
 
-# -------------------------------
-# 4️⃣ Fonction de scraping Carlo Erba
-# -------------------------------
+# Les résultats récents sont servis depuis le cache disque, sauf demande explicite
+force_refresh = st.checkbox("🔄 Forcer le rafraîchissement (ignorer le cache)")
 
-def carloerba_scraper(email, password, excel_path, manual_references, search_option):
-    """Fonction principale de scraping Carlo Erba"""
-    if not email or not password:
-        st.warning("⚠️ Veuillez entrer vos identifiants.")
-        return None
-
-    # Créer session persistante
-    session = requests.Session()
+# Pages de résultats brutes conservées : re-parsing hors ligne après une correction du parser
+archive_pages = st.checkbox("🗄️ Archiver les pages brutes (re-parsing sans réseau)")
 
-    # Étape 1 : Récupérer CSRF token
-    login_page_url = "https://www.carloerbareagents.com/cerstorefront/cer-fr/login"
-    resp = session.get(login_page_url)
-    soup = BeautifulSoup(resp.text, "lxml")
-    csrf_token = soup.find("input", {"name": "CSRFToken"})["value"]
+# Résultats écrits au fil de l'eau + journal, dans un dossier par compte :
+# un scraping interrompu (arrêt, redémarrage du serveur) peut être repris
+def output_folder_for(email):
+    return os.path.join(os.getcwd(), "resultats_streamlit", re.sub(r"[^\w.-]", "_", email))
 
-    st.info(f"🔑 CSRFToken récupéré : {csrf_token}")
+resume = False
+if email and os.path.exists(journal_path(results_stream_path(output_folder_for(email)))):
+    resume = st.checkbox("⏯️ Reprendre le dernier scraping interrompu (références restantes uniquement)")
 
-    # Étape 2 : Connexion
-    payload = {
-        "j_username": email,
-        "j_password": password,
-        "CSRFToken": csrf_token
-    }
-
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Referer": login_page_url,
-        "Origin": "https://www.carloerbareagents.com",
-        "Content-Type": "application/x-www-form-urlencoded",
-    }
+# -------------------------------
+# 4️⃣ Fonction de scraping Carlo Erba
+# -------------------------------
 
-    login_url = "https://www.carloerbareagents.com/cerstorefront/cer-fr/j_spring_security_check"
-    response = session.post(login_url, data=payload, headers=headers, allow_redirects=False)
+@st.cache_resource
+def get_history():
+    """Historique des prix partagé par les sessions et les jobs du processus."""
+    return PriceHistory()
 
-    if response.status_code != 302:
-        st.error("❌ Connexion échouée.")
-        return None
-    st.success("✅ Connexion réussie.")
 
-    # -------------------------------
-    # 3️⃣ Récupérer les références selon l’option choisie
-    # -------------------------------
+@st.cache_resource
+def get_cache():
+    """Cache des résultats partagé par les sessions et les jobs du processus."""
+    return ResultCache()
 
-    references = []
 
-    if search_option in ['Excel', 'Excel + Manuel'] and excel_path is not None:
-        df_refs = pd.read_excel(excel_path)
-        references.extend(df_refs['Référence'].dropna().astype(str).tolist())
+@st.cache_resource
+def get_archive():
+    """Archive des pages brutes partagée par les sessions et les jobs du processus."""
+    return PageArchive()
 
-    if search_option in ['Manuel', 'Excel + Manuel'] and manual_references:
-        references.extend([ref.strip() for ref in manual_references.split(',')])
 
-    if not references:
-        st.warning("⚠️ Aucune référence à rechercher.")
+def carloerba_scraper(email, password, excel_path, manual_references, search_option, force_refresh=False,
+                      resume=False, archive_pages=False, from_archive=False):
+    """
+    Prépare les références et lance le scraping Carlo Erba en arrière-plan.
+    Avec from_archive, re-parse les pages archivées (sans identifiants ni réseau ; toutes les
+    références archivées si aucune n'est indiquée), résultats dans resultats_archive.*.
+    Retourne le job (scrape_jobs.ScrapeJob) ou None ; le script Streamlit n'est jamais bloqué.
+    """
+    if not from_archive and (not email or not password):
+        st.warning("⚠️ Veuillez entrer vos identifiants.")
         return None
 
-    # -------------------------------
-    # 4️⃣ Scraping des produits
-    # -------------------------------
-
-    data = []
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-
-    total = len(references)
-    for idx, ref in enumerate(references):
-        status_text.text(f"🔍 Recherche de la référence : {ref} ({idx+1}/{total})")
-        search_url = f"https://www.carloerbareagents.com/cerstorefront/cer-fr/search/?text={ref}"
-        resp = session.get(search_url)
-
-        if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, "html.parser")
-            products = soup.find_all('tr', class_='quickAddToCart')
-
-            if not products:
-                st.warning(f"❌ Aucun produit trouvé pour : {ref}")
-                continue
-
-            for product in products:
-                try:
-                    product_name = product.find('input', {'name': 'productNamePost'}).get('value')
-                    conditionnement = product.find('td', class_='item__info--variantDescription').text.strip()
-                    tds = product.find_all('td')
-                    emballage = tds[2].text.strip() if len(tds) > 2 else ""
-                    unite_vente = tds[3].text.strip() if len(tds) > 3 else ""
-                    quantite_input = product.find('input', {'name': 'initialQuantityVariant'})
-                    quantite = quantite_input.get('value') if quantite_input else ""
-                    price = product.find('input', {'name': 'productPostPrice'}).get('value')
-                    availability_icon = product.find('i')
-                    availability_title = availability_icon.get('title') if availability_icon else None
-
-                    if availability_title == "Produit en stock":
-                        disponibilite = "En stock"
-                    elif availability_title == "Disponible sous 15 jours":
-                        disponibilite = "Disponible sous 15 jours"
-                    elif availability_title == "Disponible en plus de 30 jours":
-                        disponibilite = "Disponible en plus de 30 jours"
-                    else:
-                        disponibilite = "Non précisé"
-
-                    # Ajouter les données
-                    data.append({
-                        'Référence cherchée': ref,
-                        'Produit': product_name,
-                        'Cdt': conditionnement,
-                        'Emballage': emballage,
-                        'Unité de vente': unite_vente,
-                        'Qté': quantite,
-                        'Prix €': price,
-                        'Disponibilité': disponibilite
-                    })
-
-                except Exception as e:
-                    st.error(f"⚠️ Erreur pour {ref} : {e}")
-                    continue
-
-        else:
-            st.error(f"❗ Erreur HTTP pour : {ref} (code {resp.status_code})")
-
-        # Mise à jour barre de progression
-        progress_bar.progress((idx + 1) / total)
+    output_folder = output_folder_for(email or "archive")
+    running = registry.running_in(output_folder)
+    if running is not None:
+        st.warning("⏳ Un scraping est déjà en cours pour ce compte.")
+        return running
 
     # -------------------------------
-    # 5️⃣ Affichage des résultats
+    # Récupérer les références selon l’option choisie
     # -------------------------------
 
-    if data:
-        df_resultats = pd.DataFrame(data)
-        st.success("✅ Scraping terminé !")
-        # Affichage avec couleurs selon disponibilité
-        def color_availability(val):
-            if val == "En stock":
-                return 'background-color: lightgreen'
-            elif val.startswith("Disponible"):
-                return 'background-color: lightyellow'
-            else:
-                return 'background-color: lightcoral'
-
-        st.dataframe(df_resultats.style.applymap(color_availability, subset=['Disponibilité']))
-
-        # Export Excel automatique
-        # output_file = "resultats_scraping.xlsx"
-        # df_resultats.to_excel(output_file, index=False)
-        # st.info(f"Données enregistrées dans : {output_file}")
-    else:
-        st.warning("⚠️ Aucun produit trouvé.")
+    references = []
+    metrics = RunMetrics()
+    if not resume:
+        # Lecture en flux de la seule colonne utile, normalisation et dédoublonnage
+        with metrics.stage("plan"):
+            plan = build_plan(
+                excel_source=excel_path if search_option in ['Excel', 'Excel + Manuel'] else None,
+                manual_text=manual_references if search_option in ['Manuel', 'Excel + Manuel'] else "",
+            )
+        if plan:
+            st.info(f"ℹ️ {plan.summary()}")
+            references = plan.references
+        elif from_archive:
+            references = get_archive().references(CarloErbaSupplier.key)
+            st.info(f"🗄️ {len(references)} référence(s) archivée(s) à re-parser.")
+        if not references:
+            st.warning("⚠️ Aucune référence à rechercher.")
+            return None
+
+    # Cache, session partagée, journal et écriture incrémentale : voir CarloScraperThread
+    return registry.submit(
+        output_folder,
+        email=email,
+        password=password,
+        references=references,
+        cache=get_cache(),
+        history=get_history(),
+        force_refresh=force_refresh,
+        resume=resume,
+        metrics=metrics,
+        archive=get_archive() if archive_pages or from_archive else None,
+        from_archive=from_archive,
+        **STREAMLIT_SCRAPER_OPTIONS,
+    )
 
 # -------------------------------
-# 5️⃣ Bouton de lancement
+# 5️⃣ Affichage du job et des résultats
 # -------------------------------
-if st.button("Lancer le scraping"):
-    carloerba_scraper(email, password, excel_path, manual_references, search_option)
-
-
 
+RESULTS_PAGE_SIZE = 500
+
+
+def availability_badges(availability):
+    """Pastille de couleur selon la disponibilité, calculée sur toute la colonne d'un coup."""
+    availability = availability.fillna("").astype(str)
+    return pd.Series(
+        np.where(availability.eq("En stock"), "🟢",
+                 np.where(availability.str.startswith("Disponible"), "🟡", "🔴")),
+        index=availability.index,
+    )
+
+
+def show_results(rows, key):
+    """Tableau des résultats paginé : seule la page affichée est envoyée au navigateur."""
+    df_resultats = pd.DataFrame(rows)
+    if 'Disponibilité' in df_resultats:
+        df_resultats.insert(0, "État", availability_badges(df_resultats['Disponibilité']))
+
+    n_pages = max(1, -(-len(df_resultats) // RESULTS_PAGE_SIZE))
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(f"Page (sur {n_pages})", min_value=1, max_value=n_pages, value=1,
+                               step=1, key=f"page_{key}")
+    start = (page - 1) * RESULTS_PAGE_SIZE
+    st.caption(f"{len(df_resultats)} ligne(s) produit — lignes {start + 1} à "
+               f"{min(start + RESULTS_PAGE_SIZE, len(df_resultats))}")
+    st.dataframe(
+        df_resultats.iloc[start:start + RESULTS_PAGE_SIZE],
+        hide_index=True,
+        column_config={"État": st.column_config.TextColumn("État", width="small")},
+    )
+
+
+def show_issues(issues):
+    """Un seul tableau repliable pour toutes les références en anomalie (au lieu d'une alerte par référence)."""
+    if not issues:
+        return
+    df_issues = pd.DataFrame(issues)
+    n_refs = df_issues["Référence"].nunique()
+    with st.expander(f"⚠️ {n_refs} référence(s) à vérifier"):
+        st.caption(" · ".join(f"{kind} : {count}" for kind, count in df_issues["Problème"].value_counts().items()))
+        st.dataframe(df_issues, hide_index=True)
+
+
+def show_job(job):
+    """Panneau du job : rafraîchi chaque seconde tant qu'il tourne, sans relancer tout le script."""
+    polling = job.running
+
+    @st.fragment(run_every=1.0 if polling else None)
+    def job_panel():
+        snap = job.snapshot()
+        st.write("### Scraping en arrière-plan")
+
+        fraction = snap["current"] / snap["total"] if snap["total"] else 0.0
+        st.progress(fraction, text=f"{snap['status']} — {snap['current']}/{snap['total']} références")
+        stats = snap["stats"]
+        if stats:
+            st.caption(f"⚡ {stats['rate']:.2f} req/s — {stats['concurrency']} requêtes simultanées"
+                       f" — 429 : {stats['http_429']} · 5xx : {stats['http_5xx']} · timeouts : {stats['timeouts']}")
+
+        if job.running and st.button("⏹ Arrêter", key=f"stop_{snap['id']}"):
+            job.stop()
+
+        with st.expander("Journal du scraping"):
+            st.code("\n".join(snap["logs"][-40:]) or "…")
+
+        rows = job.partial_rows()
+        if snap["status"] == STATUS_DONE:
+            st.success(f"✅ Scraping terminé ! Données enregistrées dans : {snap['result_path']}")
+        elif snap["status"] == STATUS_FAILED:
+            st.warning(f"⚠️ Fin : {snap['message']}")
+        show_issues(snap["issues"])
+        if not job.running and job.scraper is not None:
+            with st.expander("⏱️ Mesures du run (metriques_scraping.json / .prom)"):
+                st.code("\n".join(job.scraper.metrics.summary_lines()))
+        if rows:
+            show_results(rows, snap["id"])
+        elif not job.running:
+            st.warning("⚠️ Aucun produit trouvé.")
+
+        # Fin du job pendant le rafraîchissement : dernier rendu complet, sans polling
+        if polling and not job.running:
+            st.rerun()
+
+    job_panel()
 
+# -------------------------------
+# 6️⃣ Bouton de lancement
+# -------------------------------
+launch_col, reparse_col = st.columns(2)
+with launch_col:
+    launch = st.button("Lancer le scraping")
+with reparse_col:
+    reparse = st.button("♻️ Re-parser l'archive")
+if launch or reparse:
+    job = carloerba_scraper(email, password, excel_path, manual_references, search_option, force_refresh,
+                            resume and launch, archive_pages, from_archive=reparse)
+    if job is not None:
+        st.session_state["job_id"] = job.id
+
+# Le job survit aux reruns : on le retrouve via son identifiant de session
+current_job = registry.get(st.session_state.get("job_id"))
+if current_job is not None:
+    show_job(current_job)
 
+# -------------------------------
+# 7️⃣ Historique des prix (comparaisons calculées en SQL)
+# -------------------------------
+st.write("### Historique des prix")
+history = get_history()
+tab_changes, tab_stock, tab_series = st.tabs(["Variations de prix", "Passés hors stock", "Série de prix"])
+last_runs = history.last_two_runs()
+
+with tab_changes:
+    if last_runs is None:
+        st.caption("Il faut au moins deux runs terminés pour comparer.")
+    else:
+        changes = history.price_changes()
+        st.caption(f"Run {last_runs[1]} comparé au run {last_runs[0]} : {len(changes)} variation(s)")
+        if changes:
+            st.dataframe(pd.DataFrame(changes, columns=["Référence", "Produit", "Cdt", "Ancien prix",
+                                                        "Nouveau prix", "Écart"]), hide_index=True)
+
+with tab_stock:
+    if last_runs is None:
+        st.caption("Il faut au moins deux runs terminés pour comparer.")
+    else:
+        out_of_stock = history.went_out_of_stock()
+        st.caption(f"Run {last_runs[1]} comparé au run {last_runs[0]} : {len(out_of_stock)} produit(s)")
+        if out_of_stock:
+            st.dataframe(pd.DataFrame(out_of_stock, columns=["Référence", "Produit", "Cdt", "Disponibilité"]),
+                         hide_index=True)
+
+with tab_series:
+    series_ref = st.text_input("Référence", key="history_ref")
+    if series_ref:
+        series = pd.DataFrame(history.price_series(ref=series_ref),
+                              columns=["Date", "Run", "Produit", "Cdt", "Prix €", "Disponibilité"])
+        if series.empty:
+            st.caption("Aucun relevé pour cette référence.")
+        else:
+            series["Date"] = pd.to_datetime(series["Date"], unit="s")
+            st.line_chart(series, x="Date", y="Prix €", color="Produit")
+            st.dataframe(series, hide_index=True)
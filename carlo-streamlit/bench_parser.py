@@ -0,0 +1,131 @@
+# bench_parser.py
+"""
+Micro-benchmark du parsing des pages de recherche Carlo Erba.
+Compare l'ancienne extraction (BeautifulSoup sur toute la page + find/find_all par ligne)
+à carlo_parser.parse_search_page, et vérifie que les deux donnent les mêmes lignes.
+
+Usage :
+    python bench_parser.py                       # pages synthétiques (0, 1, 5, 25 produits)
+    python bench_parser.py page1.html page2.html # pages de recherche enregistrées
+"""
+
+import argparse
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+
+from carlo_parser import AVAILABILITY_LABELS, parse_search_page
+
+_AVAILABILITY_TITLES = list(AVAILABILITY_LABELS) + [""]
+
+_ROW_TEMPLATE = """
+<tr class="quickAddToCart item__list--item">
+  <td class="item__image"><img src="/medias/{code}.jpg" alt="{name}"></td>
+  <td class="item__info--variantDescription"> {cdt} </td>
+  <td class="item__info"> Flacon verre </td>
+  <td class="item__info"> 1 </td>
+  <td class="item__quantity">
+    <input type="hidden" name="productNamePost" value="{name}">
+    <input type="hidden" name="productCodePost" value="{code}">
+    <input type="text" name="initialQuantityVariant" value="1">
+    <input type="hidden" name="productPostPrice" value="{price}">
+  </td>
+  <td class="item__stock"><i class="glyphicon" title="{title}"></i></td>
+</tr>"""
+
+
+def make_search_page(ref, n_products=5, filler_kb=150):
+    """
+    Page de recherche synthétique proche du site : en-tête, menus et scripts volumineux
+    (`filler_kb` Ko) puis un tableau de `n_products` lignes 'quickAddToCart'.
+    Utilisée aussi par le serveur local de benchmark.
+    """
+    filler_item = '<li class="nav__item"><a href="/cer-fr/c/{0}">Catégorie {0}</a></li>\n'
+    nav = "".join(filler_item.format(i) for i in range(max(1, filler_kb * 1024 // len(filler_item))))
+    rows = "".join(
+        _ROW_TEMPLATE.format(
+            code=f"{ref}-{i}",
+            name=f"Produit {ref} qualité {i}",
+            cdt=f"{(i + 1) * 100} ml",
+            price=f"{10 + i * 1.5:.2f}",
+            title=_AVAILABILITY_TITLES[i % len(_AVAILABILITY_TITLES)],
+        )
+        for i in range(n_products)
+    )
+    table = f'<table class="item__list"><tbody>{rows}</tbody></table>' if n_products else (
+        '<div class="search-empty">Aucun résultat</div>')
+    return (
+        "<!DOCTYPE html><html><head><title>Recherche</title>"
+        "<script>var ACC = {config: {}};</script></head><body>"
+        f'<nav><ul class="nav__links">{nav}</ul></nav>'
+        f'<main><h1>Résultats pour « {ref} »</h1>{table}</main>'
+        "<footer>Carlo Erba Reagents</footer></body></html>"
+    )
+
+
+def legacy_parse(page, ref):
+    """Ancienne extraction (copie de la boucle de CarloScraperThread avant carlo_parser)."""
+    soup = BeautifulSoup(page, "html.parser")
+    rows = []
+    for product in soup.find_all('tr', class_='quickAddToCart'):
+        product_name = product.find('input', {'name': 'productNamePost'}).get('value', '')
+        cond_elem = product.find('td', class_='item__info--variantDescription')
+        tds = product.find_all('td')
+        quantite_input = product.find('input', {'name': 'initialQuantityVariant'})
+        price_input = product.find('input', {'name': 'productPostPrice'})
+        availability_icon = product.find('i')
+        availability_title = availability_icon.get('title') if availability_icon else None
+        rows.append({
+            'Référence cherchée': ref,
+            'Produit': product_name,
+            'Cdt': cond_elem.text.strip() if cond_elem else "",
+            'Emballage': tds[2].text.strip() if len(tds) > 2 else "",
+            'Unité de vente': tds[3].text.strip() if len(tds) > 3 else "",
+            'Qté': quantite_input.get('value') if quantite_input else "",
+            'Prix €': price_input.get('value') if price_input else "",
+            'Disponibilité': AVAILABILITY_LABELS.get(availability_title, "Non précisé"),
+        })
+    return rows
+
+
+def _time_per_page(func, page, ref, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(page, ref)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def run(pages, repeat):
+    print(f"{'page':<28}{'Ko':>8}{'lignes':>8}{'legacy ms':>12}{'nouveau ms':>12}{'gain':>8}")
+    for label, page in pages:
+        expected = legacy_parse(page, "REF")
+        rows, errors = parse_search_page(page, "REF")
+        if rows != expected or errors:
+            raise SystemExit(f"❌ Résultats différents pour {label} : {errors or 'lignes divergentes'}")
+        legacy_ms = _time_per_page(legacy_parse, page, "REF", repeat)
+        new_ms = _time_per_page(lambda p, r: parse_search_page(p, r), page, "REF", repeat)
+        print(f"{label:<28}{len(page) / 1024:>8.0f}{len(rows):>8}{legacy_ms:>12.2f}{new_ms:>12.2f}"
+              f"{legacy_ms / new_ms if new_ms else float('inf'):>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du parsing des pages de recherche Carlo Erba")
+    parser.add_argument("pages", nargs="*", help="pages de recherche HTML enregistrées")
+    parser.add_argument("--repeat", type=int, default=20, help="répétitions par page (médiane)")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append((path[-28:], f.read()))
+    else:
+        pages = [(f"synthétique {n} produit(s)", make_search_page("528203", n)) for n in (0, 1, 5, 25)]
+    run(pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+# bench_scraper.py
+"""
+Benchmark hors ligne du scraping : un serveur HTTP local imite Carlo Erba et le scraper l'interroge.
+- FakeCarloServer: page de login (CSRFToken), j_spring_security_check, my-account et search/?text=,
+  avec latence, taux d'erreurs 5xx / 429 et taille des pages réglables (pages de bench_parser
+  ou pages de recherche enregistrées).
+- Scénarios : CarloScraperThread tel que lancé par ExcelFrame, le même en pipeline (parsing dans
+  --parse-processes processus) et job de la page Streamlit (scrape_jobs.registry avec les réglages
+  de app.py, lectures des résultats partiels comprises).
+- Rapport : références/s, latence par référence p50/p99, temps de parsing, pic mémoire ;
+  --json pour garder les chiffres et comparer deux commits.
+
+Usage :
+    python bench_scraper.py                                  # 200 références, deux scénarios
+    python bench_scraper.py --refs 1000 --latency 0.2 --error-rate 0.05 --json bench.json
+    python bench_scraper.py --pages-dir pages_enregistrees/ --scenarios thread
+    python bench_scraper.py --latency 0.01 --workers 16 --scenarios thread pipeline --parse-processes 4
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bench_parser import make_search_page
+from carlo_scraper import CarloScraperThread
+from carlo_session import STORE_PATH
+from run_metrics import RunMetrics
+from scrape_jobs import STREAMLIT_SCRAPER_OPTIONS, registry
+
+_LOGIN_PAGE = ('<html><body><form action="{store}/j_spring_security_check" method="post">'
+               '<input type="hidden" name="CSRFToken" value="bench-csrf-token"></form></body></html>')
+_SESSION_COOKIE = "JSESSIONID=bench"
+_REF_PLACEHOLDER = "__REF__"
+
+
+# ----------------------------
+# Serveur local
+# ----------------------------
+class FakeCarloServer:
+    """Serveur local (un thread par connexion, keep-alive) ; `start()` retourne l'URL de base."""
+
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, rate_limit_rate=0.0,
+                 n_products=5, filler_kb=150, empty_rate=0.1, pages_dir=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.empty_rate = empty_rate
+        self.status_counts = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        if pages_dir:
+            self._recorded = []
+            for name in sorted(os.listdir(pages_dir)):
+                if name.endswith((".html", ".htm")):
+                    with open(os.path.join(pages_dir, name), "r", encoding="utf-8") as f:
+                        self._recorded.append(f.read())
+            if not self._recorded:
+                raise SystemExit(f"❌ Aucune page .html dans {pages_dir}")
+        else:
+            self._recorded = None
+            # Pages générées une fois, la référence est substituée à chaque requête
+            self._templates = {
+                True: make_search_page(_REF_PLACEHOLDER, 0, filler_kb),
+                False: make_search_page(_REF_PLACEHOLDER, n_products, filler_kb),
+            }
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._handle(self, "GET")
+
+            def do_POST(self):
+                server._handle(self, "POST")
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True, name="fake-carlo").start()
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def _draw(self):
+        with self._lock:
+            return self._random.random(), self._random.uniform(-self.jitter, self.jitter)
+
+    def _handle(self, request, method):
+        url = urlsplit(request.path)
+        page = url.path[len(STORE_PATH) + 1:] if url.path.startswith(STORE_PATH + "/") else None
+        headers = {}
+        if method == "POST":
+            length = int(request.headers.get("Content-Length") or 0)
+            form = parse_qs(request.rfile.read(length).decode("utf-8"))
+        if page == "login" and method == "GET":
+            status, body = 200, _LOGIN_PAGE.format(store=STORE_PATH)
+        elif page == "j_spring_security_check" and method == "POST":
+            ok = form.get("CSRFToken") == ["bench-csrf-token"]
+            status, body = 302, ""
+            headers["Location"] = f"{STORE_PATH}/" if ok else f"{STORE_PATH}/login?error=true"
+            if ok:
+                headers["Set-Cookie"] = f"{_SESSION_COOKIE}; Path=/"
+        elif page == "my-account":
+            logged_in = _SESSION_COOKIE in (request.headers.get("Cookie") or "")
+            status, body = (200, "<html>compte</html>") if logged_in else (302, "")
+            if not logged_in:
+                headers["Location"] = f"{STORE_PATH}/login"
+        elif page is not None and page.startswith("search/"):
+            status, body = self._search(parse_qs(url.query).get("text", [""])[0], headers)
+        else:
+            status, body = 404, "introuvable"
+
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        data = body.encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(data)
+
+    def _search(self, ref, headers):
+        draw, jitter = self._draw()
+        time.sleep(max(0.0, self.latency + jitter))
+        if draw < self.rate_limit_rate:
+            headers["Retry-After"] = "1"
+            return 429, "trop de requêtes"
+        draw -= self.rate_limit_rate
+        if draw < self.error_rate:
+            return 503, "service indisponible"
+        if self._recorded is not None:
+            return 200, self._recorded[zlib.crc32(ref.encode("utf-8")) % len(self._recorded)]
+        empty = (draw - self.error_rate) < self.empty_rate
+        return 200, self._templates[empty].replace(_REF_PLACEHOLDER, ref)
+
+
+# ----------------------------
+# Mesures
+# ----------------------------
+@contextmanager
+def instrument():
+    """
+    Chronomètre chaque référence (recherche + tentatives + parsing) pendant le bloc ; les durées
+    de parsing sont celles relevées par le scraper (étape "parse", mesurée dans le processus de parsing
+    en pipeline).
+    """
+    timings = {"reference": [], "parse": []}
+    search_reference = CarloScraperThread._search_reference
+    submit_pipelined = CarloScraperThread._submit_pipelined
+    observe = RunMetrics.observe
+
+    def timed_search(self, *args):
+        start = time.perf_counter()
+        try:
+            return search_reference(self, *args)
+        finally:
+            timings["reference"].append(time.perf_counter() - start)
+
+    def timed_submit(self, *args):
+        # Pipeline : de la soumission de la requête à la fin du parsing
+        start = time.perf_counter()
+        future = submit_pipelined(self, *args)
+        future.add_done_callback(lambda _: timings["reference"].append(time.perf_counter() - start))
+        return future
+
+    def recorded_observe(self, name, seconds, **labels):
+        if name == "parse":
+            timings["parse"].append(seconds)
+        observe(self, name, seconds, **labels)
+
+    CarloScraperThread._search_reference = timed_search
+    CarloScraperThread._submit_pipelined = timed_submit
+    RunMetrics.observe = recorded_observe
+    try:
+        yield timings
+    finally:
+        CarloScraperThread._search_reference = search_reference
+        CarloScraperThread._submit_pipelined = submit_pipelined
+        RunMetrics.observe = observe
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run_thread(base_url, references, output_folder, args, parse_processes=0):
+    """Scénario Tk : CarloScraperThread avec les réglages de ExcelFrame."""
+    outcome = {}
+    done = threading.Event()
+    scraper = CarloScraperThread(
+        email="bench@example.com", password="bench", references=references, output_folder=output_folder,
+        finished_callback=lambda success, msg: (outcome.update(success=success, message=msg), done.set()),
+        rate_delay=args.rate_delay, workers=args.workers, adaptive=True, base_url=base_url,
+        parse_processes=parse_processes,
+    )
+    scraper.start()
+    done.wait()
+    scraper.join()
+    return outcome
+
+
+def run_streamlit(base_url, references, output_folder, args):
+    """Scénario Streamlit : job du registre, résultats partiels relus chaque seconde comme la page."""
+    job = registry.submit(output_folder, email="bench@example.com", password="bench", references=references,
+                          base_url=base_url, **STREAMLIT_SCRAPER_OPTIONS)
+    while job.running:
+        job.snapshot()
+        job.partial_rows()
+        time.sleep(1.0)
+    return {"success": job.status == "terminé", "message": job.message}
+
+
+def run_pipeline(base_url, references, output_folder, args):
+    """Scénario Tk en pipeline : requêtes dans les threads, parsing dans --parse-processes processus."""
+    return run_thread(base_url, references, output_folder, args, parse_processes=args.parse_processes)
+
+
+SCENARIOS = {"thread": run_thread, "pipeline": run_pipeline, "streamlit": run_streamlit}
+
+
+def run_scenario(name, base_url, references, args):
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as output_folder, instrument() as timings:
+        if args.tracemalloc:
+            tracemalloc.start()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        outcome = SCENARIOS[name](base_url, references, output_folder, args)
+        elapsed = time.perf_counter() - start
+        if args.tracemalloc:
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+        else:
+            # ru_maxrss en Ko (Linux) : pic du processus, seule la hausse pendant le scénario est visible
+            peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        rss_growth_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+
+    return {
+        "scenario": name,
+        "success": bool(outcome.get("success")),
+        "references": len(references),
+        "seconds": round(elapsed, 3),
+        "refs_per_s": round(len(references) / elapsed, 2) if elapsed else 0.0,
+        "ref_p50_ms": round(_percentile(timings["reference"], 50) * 1000, 1),
+        "ref_p99_ms": round(_percentile(timings["reference"], 99) * 1000, 1),
+        "parse_mean_ms": round(sum(timings["parse"]) / len(timings["parse"]) * 1000, 2) if timings["parse"] else 0.0,
+        "parse_p99_ms": round(_percentile(timings["parse"], 99) * 1000, 2),
+        "peak_mb": round(peak_mb, 1),
+        "peak_kind": "tracemalloc" if args.tracemalloc else "rss",
+        "rss_growth_mb": round(rss_growth_mb, 1),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du scraping contre un faux serveur Carlo Erba local")
+    parser.add_argument("--refs", type=int, default=200, help="nombre de références à rechercher")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=["thread", "streamlit"])
+    parser.add_argument("--latency", type=float, default=0.05, help="latence moyenne d'une recherche (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="variation de latence (± s)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="part des recherches en HTTP 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="part des recherches en HTTP 429")
+    parser.add_argument("--empty-rate", type=float, default=0.1, help="part des recherches sans résultat")
+    parser.add_argument("--products", type=int, default=5, help="produits par page de résultats")
+    parser.add_argument("--filler-kb", type=int, default=150, help="taille du reste de la page (Ko)")
+    parser.add_argument("--pages-dir", help="dossier de pages de recherche enregistrées (.html) à servir")
+    parser.add_argument("--workers", type=int, default=8, help="requêtes simultanées (scénario thread)")
+    parser.add_argument("--rate-delay", type=float, default=0.4, help="délai initial entre requêtes (s)")
+    parser.add_argument("--parse-processes", type=int, default=os.cpu_count() or 2,
+                        help="processus de parsing (scénario pipeline)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="pic mémoire Python exact (tracemalloc, ralentit le run) au lieu du RSS")
+    parser.add_argument("--json", help="écrit les résultats (et le commit courant) dans ce fichier")
+    args = parser.parse_args()
+
+    server = FakeCarloServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                             rate_limit_rate=args.rate_limit_rate, n_products=args.products,
+                             filler_kb=args.filler_kb, empty_rate=args.empty_rate, pages_dir=args.pages_dir)
+    base_url = server.start()
+    references = [f"BENCH{i:05d}" for i in range(args.refs)]
+    results = []
+    try:
+        print(f"{'scénario':<11}{'réfs/s':>9}{'durée s':>9}{'p50 ms':>9}{'p99 ms':>9}"
+              f"{'parse ms':>10}{'parse p99':>11}{'pic Mo':>9}")
+        for name in args.scenarios:
+            result = run_scenario(name, base_url, references, args)
+            results.append(result)
+            status = "" if result["success"] else "  ❌ échec"
+            print(f"{name:<11}{result['refs_per_s']:>9.2f}{result['seconds']:>9.1f}{result['ref_p50_ms']:>9.1f}"
+                  f"{result['ref_p99_ms']:>9.1f}{result['parse_mean_ms']:>10.2f}{result['parse_p99_ms']:>11.2f}"
+                  f"{result['peak_mb']:>9.1f}{status}")
+    finally:
+        server.stop()
+    print(f"Réponses du serveur : {dict(sorted(server.status_counts.items()))}")
+
+    if args.json:
+        report = {"commit": _git_commit(), "time": time.time(), "settings": vars(args), "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Résultats écrits dans {args.json}")
+
+
+if __name__ == "__main__":
+    main()
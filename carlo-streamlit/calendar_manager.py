@@ -2,15 +2,26 @@
 """
 Module Calendrier (CTkFrame).
 - Permet de charger un fichier .ics, afficher les événements et ajouter un événement simple.
+- Événements indexés en mémoire (ics_store.IcsStore) : le fichier n'est relu que s'il change sur disque,
+  un ajout écrit un seul bloc VEVENT en fin de fichier.
+- Affichage du mois visible (ou de la semaine du jour sélectionné) ; les jours ayant des événements
+  sont marqués sur le calendrier, récurrences développées seulement pour la période affichée.
 """
 
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from tkcalendar import Calendar
-from ics import Calendar as ICSCalendar, Event
 import datetime
 import os
 
+from ics_store import IcsStore
+
+MONTHS = ["janvier", "février", "mars", "avril", "mai", "juin",
+          "juillet", "août", "septembre", "octobre", "novembre", "décembre"]
+# Grille de tkcalendar : 6 semaines, en commençant le lundi
+GRID_DAYS = 42
+
+
 class CalendarFrame(ctk.CTkFrame):
     """Frame pour gérer un calendrier .ics simple."""
     def __init__(self, parent):
@@ -18,6 +29,7 @@ class CalendarFrame(ctk.CTkFrame):
         self.pack(fill="both", expand=True, padx=10, pady=10)
 
         self.ics_path = None
+        self.store = None
 
         title = ctk.CTkLabel(self, text="📅 Module Calendrier", font=ctk.CTkFont(size=18, weight="bold"))
         title.pack(pady=(6, 10))
@@ -31,12 +43,21 @@ class CalendarFrame(ctk.CTkFrame):
         self.lbl_path = ctk.CTkLabel(controls, text="Aucun fichier sélectionné")
         self.lbl_path.grid(row=0, column=1, padx=6, pady=6, sticky="w")
 
+        self.view_var = ctk.StringVar(value="Mois")
+        self.view_switch = ctk.CTkSegmentedButton(controls, values=["Mois", "Semaine"], variable=self.view_var,
+                                                  command=lambda _value: self._refresh_if_loaded())
+        self.view_switch.grid(row=0, column=2, padx=6, pady=6, sticky="e")
+        controls.grid_columnconfigure(1, weight=1)
+
         # Calendar widget (tkcalendar)
         cal_frame = ctk.CTkFrame(self)
         cal_frame.pack(pady=10)
         # Note: tkcalendar.Calendar is a Tk widget; on CTk we can place it inside the CTkFrame
-        self.tk_calendar = Calendar(cal_frame, selectmode='day')
+        self.tk_calendar = Calendar(cal_frame, selectmode='day', firstweekday='monday')
         self.tk_calendar.pack()
+        self.tk_calendar.tag_config("event", background="#1f6aa5", foreground="white")
+        self.tk_calendar.bind("<<CalendarMonthChanged>>", lambda _e: self._refresh_if_loaded())
+        self.tk_calendar.bind("<<CalendarSelected>>", lambda _e: self._on_day_selected())
 
         # Event entry
         self.title_entry = ctk.CTkEntry(self, placeholder_text="Titre de l'événement")
@@ -54,49 +75,81 @@ class CalendarFrame(ctk.CTkFrame):
         if not path:
             return
         self.ics_path = path
+        self.store = IcsStore(path)
         self.lbl_path.configure(text=os.path.basename(path))
         self.refresh_events()
 
+    def _refresh_if_loaded(self):
+        if self.store is not None:
+            self.refresh_events()
+
+    def _on_day_selected(self):
+        # En vue mois, le jour sélectionné ne change pas la période affichée
+        if self.view_var.get() == "Semaine":
+            self._refresh_if_loaded()
+
+    def _selected_day(self):
+        return self.tk_calendar.selection_get() or datetime.date.today()
+
+    def _visible_window(self):
+        """(début, fin exclusive, libellé) de la période affichée : mois visible ou semaine du jour sélectionné."""
+        if self.view_var.get() == "Semaine":
+            day = self._selected_day()
+            monday = datetime.datetime.combine(day - datetime.timedelta(days=day.weekday()), datetime.time())
+            return monday, monday + datetime.timedelta(days=7), f"semaine du {monday:%d/%m/%Y}"
+        month, year = self.tk_calendar.get_displayed_month()
+        start = datetime.datetime(year, month, 1)
+        end = datetime.datetime(year + month // 12, month % 12 + 1, 1)
+        return start, end, f"{MONTHS[month - 1]} {year}"
+
+    def _grid_window(self):
+        """Jours visibles dans la grille du calendrier, jours des mois voisins compris."""
+        month, year = self.tk_calendar.get_displayed_month()
+        first = datetime.datetime(year, month, 1)
+        start = first - datetime.timedelta(days=first.weekday())
+        return start, start + datetime.timedelta(days=GRID_DAYS)
+
     def refresh_events(self):
-        """Lit le .ics et affiche les événements dans la textbox."""
-        if not self.ics_path:
+        """Affiche les événements de la période et marque les jours occupés (index relu seulement si le .ics a changé)."""
+        if self.store is None:
             messagebox.showinfo("Aucun fichier", "Aucun fichier .ics chargé.")
             return
+        start, end, label = self._visible_window()
         try:
-            with open(self.ics_path, "r", encoding="utf-8") as f:
-                ics_content = f.read()
-            cal = ICSCalendar(ics_content)
-            self.events_box.delete("0.0", "end")
-            for ev in sorted(cal.events, key=lambda e: e.begin):
-                try:
-                    begin_str = ev.begin.to('local').format("DD/MM/YYYY HH:mm")
-                except Exception:
-                    begin_str = str(ev.begin)
-                self.events_box.insert("end", f"{begin_str} — {ev.name}\n")
+            occurrences = self.store.between(start, end)
+            days = self.store.event_days(*self._grid_window())
         except Exception as e:
             messagebox.showerror("Erreur", f"Impossible de lire le fichier .ics : {e}")
+            return
+
+        # Marquage des jours : une seule entrée par jour, quel que soit le nombre d'événements
+        self.tk_calendar.calevent_remove("all")
+        for day, count in days.items():
+            self.tk_calendar.calevent_create(day, f"{count} événement(s)", "event")
+
+        # Déjà triées par date de début ; une seule insertion dans la textbox
+        lines = [f"{len(occurrences)} événement(s) — {label}"]
+        lines += [f"{begin.strftime('%d/%m/%Y %H:%M')} — {ev.name}" for begin, _, ev in occurrences]
+        self.events_box.delete("0.0", "end")
+        self.events_box.insert("end", "\n".join(lines) + "\n")
 
     def add_event(self):
         """Ajoute un événement simple (heure fixe 09:00) au fichier .ics chargé."""
-        if not self.ics_path:
+        if self.store is None:
             messagebox.showwarning("Aucun fichier", "Charge d'abord un fichier .ics.")
             return
         title = self.title_entry.get().strip()
         if not title:
             messagebox.showwarning("Titre manquant", "Renseigne un titre pour l'événement.")
             return
-        selected = self.tk_calendar.selection_get()
+        selected = self._selected_day()
         # créer événement à 09:00 du jour sélectionné
         dt = datetime.datetime.combine(selected, datetime.time(9, 0))
         try:
-            with open(self.ics_path, "r", encoding="utf-8") as f:
-                cal = ICSCalendar(f.read())
-        except Exception:
-            cal = ICSCalendar()
-
-        ev = Event(name=title, begin=dt)
-        cal.events.add(ev)
-        with open(self.ics_path, "w", encoding="utf-8") as f:
-            f.writelines(cal.serialize_iter())
+            # Ajout d'un seul bloc VEVENT en fin de fichier ; l'index en mémoire est mis à jour sur place
+            self.store.append_event(title, dt)
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Impossible d'écrire dans le fichier .ics : {e}")
+            return
         messagebox.showinfo("Ajouté", f"Événement ajouté : {title} — {dt.strftime('%d/%m/%Y %H:%M')}")
         self.refresh_events()
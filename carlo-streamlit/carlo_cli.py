@@ -0,0 +1,254 @@
+# carlo_cli.py
+"""
+Scraping Carlo Erba en ligne de commande, sans interface graphique (serveur, tâche planifiée).
+- Références : classeur Excel (colonne 'Référence'), liste manuelle et/ou fichier texte.
+- Identifiants : variables d'environnement CARLO_EMAIL / CARLO_PASSWORD ou fichier (--credentials).
+- Planificateur intégré optionnel : --every 6h (intervalle) ou --at 06:30 (chaque jour).
+- Archive des pages brutes : --archive les conserve, --from-archive re-parse sans réseau ni identifiants
+  (toutes les références archivées si aucune n'est indiquée).
+N'importe ni tkinter ni customtkinter : démarre vite sur une machine sans affichage.
+
+Usage :
+    python carlo_cli.py --excel carlo.xlsx --format xlsx parquet
+    python carlo_cli.py --refs "528203, 524125" --credentials ~/.carlo.json --every 6h
+    python carlo_cli.py --from-archive --output resultats_reparse --format xlsx csv
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+from carlo_scraper import CarloScraperThread
+from carlo_session import close_session_managers
+from page_archive import DEFAULT_ARCHIVE_PATH, PageArchive
+from price_history import PriceHistory
+from reference_ingest import build_plan
+from result_cache import ResultCache
+from result_export import EXPORT_FORMATS
+from run_metrics import RunMetrics
+from suppliers import CarloErbaSupplier
+
+# Messages détaillés par référence, masqués avec --quiet
+_DETAIL_PREFIXES = ("🔍", "📦", "💾 En cache", "♻️", "➡️", "🔑", "🗄️ Page archivée")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def load_credentials(path=None):
+    """
+    (email, mot de passe) depuis CARLO_EMAIL / CARLO_PASSWORD, sinon depuis le fichier `path`
+    (ou CARLO_CREDENTIALS_FILE) : JSON {"email", "password"} ou lignes CLÉ=valeur.
+    """
+    email, password = os.environ.get("CARLO_EMAIL"), os.environ.get("CARLO_PASSWORD")
+    path = path or os.environ.get("CARLO_CREDENTIALS_FILE")
+    if path and not (email and password):
+        with open(os.path.expanduser(path), "r", encoding="utf-8") as f:
+            content = f.read()
+        try:
+            data = json.loads(content)
+        except ValueError:
+            data = {}
+            for line in content.splitlines():
+                key, sep, value = line.partition("=")
+                if sep and not line.lstrip().startswith("#"):
+                    data[key.strip()] = value.strip().strip('"\'')
+        email = email or data.get("email") or data.get("CARLO_EMAIL")
+        password = password or data.get("password") or data.get("CARLO_PASSWORD")
+    return email, password
+
+
+def parse_interval(text):
+    """'90s', '30m', '6h', '1d' (ou un nombre de secondes) -> secondes."""
+    text = text.strip().lower()
+    try:
+        if text[-1] in _UNITS:
+            return float(text[:-1]) * _UNITS[text[-1]]
+        return float(text)
+    except (ValueError, IndexError):
+        raise argparse.ArgumentTypeError(f"intervalle invalide : {text!r} (ex. 30m, 6h, 1d)")
+
+
+def parse_daily_time(text):
+    try:
+        return datetime.datetime.strptime(text, "%H:%M").time()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"heure invalide : {text!r} (format HH:MM)")
+
+
+def next_run_at(now, every=None, at=None):
+    """Prochaine échéance du planificateur (datetime) après `now`."""
+    if every is not None:
+        return now + datetime.timedelta(seconds=every)
+    target = datetime.datetime.combine(now.date(), at)
+    return target if target > now else target + datetime.timedelta(days=1)
+
+
+def _log(msg, quiet=False):
+    msg = msg.strip("\n")
+    if quiet and msg.lstrip().startswith(_DETAIL_PREFIXES):
+        return
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{stamp}] {msg}", flush=True)
+
+
+def collect_references(args):
+    """Plan de références (normalisées, dédoublonnées) depuis le classeur, --refs et --refs-file."""
+    # Une référence par ligne : passée telle quelle, sans découpage sur les virgules
+    lines = []
+    if args.refs_file:
+        with open(args.refs_file, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+    return build_plan(
+        excel_source=args.excel,
+        manual_text=args.refs or "",
+        column=args.column,
+        sheet=args.sheet,
+        references=lines,
+    )
+
+
+def run_once(args, email, password, cache=None, history=None, resume=False, archive=None):
+    """Un run complet (bloquant). Retourne True si des résultats ont été exportés."""
+    references = []
+    metrics = RunMetrics()
+    if not resume:
+        with metrics.stage("plan"):
+            if args.from_archive and not (args.excel or args.refs or args.refs_file):
+                plan = build_plan(references=archive.references(CarloErbaSupplier.key))
+            else:
+                plan = collect_references(args)
+        if not plan:
+            _log("⚠️ Aucune référence à rechercher.")
+            return False
+        _log(f"ℹ️ {plan.summary()}")
+        references = plan.references
+
+    outcome = {}
+    scraper = CarloScraperThread(
+        email=email,
+        password=password,
+        references=references,
+        output_folder=args.output,
+        log_callback=lambda msg: _log(msg, args.quiet),
+        finished_callback=lambda success, path_or_msg: outcome.update(success=success, message=path_or_msg),
+        cache=cache,
+        history=history,
+        force_refresh=args.force_refresh,
+        resume=resume,
+        workers=args.workers,
+        parse_processes=args.parse_processes,
+        export_formats=args.format,
+        metrics=metrics,
+        archive=archive,
+        from_archive=args.from_archive,
+    )
+    scraper.start()
+    try:
+        # join par tranches : Ctrl+C reste traité pendant le run
+        while scraper.is_alive():
+            scraper.join(0.5)
+    except KeyboardInterrupt:
+        _log("⏹️ Arrêt demandé (Ctrl+C)...")
+        scraper.stop()
+        scraper.join()
+        raise
+    return bool(outcome.get("success"))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scraping Carlo Erba sans interface graphique")
+    source = parser.add_argument_group("références")
+    source.add_argument("--excel", help="classeur .xlsx/.xls contenant les références")
+    source.add_argument("--sheet", help="feuille du classeur (première feuille par défaut)")
+    source.add_argument("--column", default="Référence", help="colonne des références (défaut : Référence)")
+    source.add_argument("--refs", help="références séparées par des virgules")
+    source.add_argument("--refs-file", help="fichier texte, une référence par ligne")
+    source.add_argument("--resume", action="store_true",
+                        help="reprendre le run interrompu du dossier de sortie (premier run uniquement)")
+
+    output = parser.add_argument_group("sortie")
+    output.add_argument("--output", default=os.path.join(os.getcwd(), "resultats_cli"),
+                        help="dossier de sortie (défaut : ./resultats_cli)")
+    output.add_argument("--format", nargs="+", choices=EXPORT_FORMATS, default=["xlsx"],
+                        help="formats des fichiers de résultats")
+    output.add_argument("--quiet", action="store_true", help="n'afficher que les messages de synthèse")
+
+    scraping = parser.add_argument_group("scraping")
+    scraping.add_argument("--credentials", help="fichier d'identifiants (JSON ou CLÉ=valeur)")
+    scraping.add_argument("--workers", type=int, default=4, help="requêtes simultanées maximum")
+    scraping.add_argument("--parse-processes", type=int, default=0,
+                          help="parser les pages dans N processus (pipeline ; 0 : dans les threads de requête)")
+    scraping.add_argument("--force-refresh", action="store_true", help="ignorer le cache des résultats")
+    scraping.add_argument("--no-cache", action="store_true", help="ne pas utiliser le cache des résultats")
+    scraping.add_argument("--no-history", action="store_true", help="ne pas alimenter l'historique des prix")
+
+    archiving = parser.add_argument_group("archive des pages")
+    archiving.add_argument("--archive", action="store_true", help="conserver chaque page de résultats brute")
+    archiving.add_argument("--from-archive", action="store_true",
+                           help="re-parser les pages archivées, sans réseau (toutes si aucune référence)")
+    archiving.add_argument("--archive-path", default=DEFAULT_ARCHIVE_PATH,
+                           help="fichier de l'archive (défaut : carlo_archive.sqlite)")
+
+    schedule = parser.add_argument_group("planification")
+    when = schedule.add_mutually_exclusive_group()
+    when.add_argument("--every", type=parse_interval, help="relancer à intervalle fixe (ex. 30m, 6h, 1d)")
+    when.add_argument("--at", type=parse_daily_time, help="lancer chaque jour à HH:MM")
+    schedule.add_argument("--max-runs", type=int, help="arrêter le planificateur après N runs")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not (args.excel or args.refs or args.refs_file or args.resume or args.from_archive):
+        parser.error("indiquer des références : --excel, --refs, --refs-file, --resume ou --from-archive")
+
+    scheduled = args.every is not None or args.at is not None
+    if args.from_archive:
+        if scheduled:
+            parser.error("--from-archive ne se planifie pas (--every / --at)")
+        if not os.path.exists(args.archive_path):
+            parser.error(f"archive introuvable : {args.archive_path}")
+        # Relecture hors ligne : identifiants inutiles
+        email = password = None
+    else:
+        email, password = load_credentials(args.credentials)
+        if not email or not password:
+            parser.error("identifiants manquants : CARLO_EMAIL / CARLO_PASSWORD ou --credentials")
+
+    # Cache, historique et archive ouverts une fois pour tous les runs planifiés
+    cache = None if args.no_cache else ResultCache()
+    history = None if args.no_history else PriceHistory()
+    archive = PageArchive(args.archive_path) if args.archive or args.from_archive else None
+    runs = 0
+    success = False
+    try:
+        if scheduled and args.at is not None:
+            first = next_run_at(datetime.datetime.now(), at=args.at)
+            _log(f"⏰ Premier run prévu le {first:%d/%m/%Y à %H:%M}.")
+            time.sleep(max(0.0, (first - datetime.datetime.now()).total_seconds()))
+        while True:
+            started = datetime.datetime.now()
+            success = run_once(args, email, password, cache, history, resume=args.resume and runs == 0,
+                               archive=archive)
+            runs += 1
+            if not scheduled or (args.max_runs and runs >= args.max_runs):
+                break
+            upcoming = next_run_at(datetime.datetime.now() if args.at else started, args.every, args.at)
+            _log(f"⏰ Prochain run le {upcoming:%d/%m/%Y à %H:%M:%S}.")
+            time.sleep(max(0.0, (upcoming - datetime.datetime.now()).total_seconds()))
+    except KeyboardInterrupt:
+        _log("⏹️ Arrêt.")
+        return 130
+    finally:
+        for store in (cache, history, archive):
+            if store is not None:
+                store.close()
+        close_session_managers()
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
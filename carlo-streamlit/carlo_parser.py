@@ -0,0 +1,92 @@
+# carlo_parser.py
+"""
+Extraction des lignes produit d'une page de recherche Carlo Erba.
+Utilisé par suppliers.CarloErbaSupplier (donc CarloScraperThread : ExcelFrame, jobs Streamlit, carlo_cli,
+comparaison multi-fournisseurs), par carlo_session (login) et par les benchmarks.
+- Texte 'quickAddToCart' absent de la page : aucune ligne possible, retour immédiat sans parsing.
+- Sinon la page est parsée avec lxml et les lignes sont les <tr> de classe 'quickAddToCart' (XPath) :
+  le même texte dans un script, un commentaire ou un attribut ne fausse pas l'extraction.
+- parse_csrf_token: jeton CSRF de la page de login.
+- parse_page_timed: étage de parsing du pipeline du scraper (exécuté dans un processus du pool).
+"""
+
+import time
+
+from lxml import html as lxml_html
+
+RESULT_ROW_CLASS = "quickAddToCart"
+
+COLUMNS = ['Référence cherchée', 'Produit', 'Cdt', 'Emballage', 'Unité de vente', 'Qté', 'Prix €', 'Disponibilité']
+
+AVAILABILITY_LABELS = {
+    "Produit en stock": "En stock",
+    "Disponible sous 15 jours": "Disponible sous 15 jours",
+    "Disponible en plus de 30 jours": "Disponible en plus de 30 jours",
+}
+DEFAULT_AVAILABILITY = "Non précisé"
+
+_ROWS_XPATH = f"//tr[contains(concat(' ', normalize-space(@class), ' '), ' {RESULT_ROW_CLASS} ')]"
+
+
+def _input_value(row, name):
+    values = row.xpath(f".//input[@name='{name}']/@value")
+    return values[0] if values else ""
+
+
+def _parse_row(row, ref):
+    names = row.xpath(".//input[@name='productNamePost']")
+    if not names:
+        raise ValueError("champ 'productNamePost' absent")
+    product_name = names[0].get("value", "")
+
+    cond = row.xpath(".//td[contains(@class, 'item__info--variantDescription')]")
+    tds = row.xpath(".//td")
+    titles = row.xpath("(.//i)[1]/@title")
+
+    return {
+        'Référence cherchée': ref,
+        'Produit': product_name,
+        'Cdt': cond[0].text_content().strip() if cond else "",
+        'Emballage': tds[2].text_content().strip() if len(tds) > 2 else "",
+        'Unité de vente': tds[3].text_content().strip() if len(tds) > 3 else "",
+        'Qté': _input_value(row, "initialQuantityVariant"),
+        'Prix €': _input_value(row, "productPostPrice"),
+        'Disponibilité': AVAILABILITY_LABELS.get(titles[0] if titles else None, DEFAULT_AVAILABILITY),
+    }
+
+
+def parse_search_page(page, ref):
+    """
+    Extrait les produits d'une page de recherche.
+    Retourne (lignes, erreurs) : lignes = dicts aux colonnes COLUMNS,
+    erreurs = messages des lignes produit qui n'ont pas pu être lues.
+    Aucune ligne et aucune erreur = aucun produit trouvé pour `ref`.
+    """
+    # Préfiltre : une ligne de résultat porte forcément ce texte dans son attribut class
+    if RESULT_ROW_CLASS not in page:
+        return [], []
+
+    tree = lxml_html.fromstring(page)
+    rows, errors = [], []
+    for row in tree.xpath(_ROWS_XPATH):
+        try:
+            rows.append(_parse_row(row, ref))
+        except Exception as e:
+            errors.append(str(e))
+    return rows, errors
+
+
+def parse_page_timed(parser, page, ref):
+    """
+    Étage de parsing du pipeline, exécuté dans un processus du pool : `parser(page, ref)` et sa durée.
+    `parser` doit être une fonction de module (transmise par référence au processus).
+    """
+    start = time.perf_counter()
+    items, errors = parser(page, ref)
+    return items, errors, time.perf_counter() - start
+
+
+def parse_csrf_token(page):
+    """Valeur du champ caché CSRFToken de la page de login (None si absent)."""
+    values = lxml_html.fromstring(page).xpath("//input[@name='CSRFToken']/@value")
+    return values[0] if values else None
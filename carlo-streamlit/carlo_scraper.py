@@ -0,0 +1,480 @@
+# carlo_scraper.py
+"""
+Scraper Carlo Erba sans interface graphique.
+- CarloScraperThread: exécute le scraping dans un thread (non bloquant) et communique par callbacks.
+  Utilisé par ExcelFrame (Tk) et par les jobs d'arrière-plan de l'app Streamlit ; n'importe ni tkinter
+  ni customtkinter. Le site interrogé est un fournisseur (suppliers.Supplier), Carlo Erba par défaut ;
+  supplier_orchestrator lance un thread par fournisseur pour comparer plusieurs sites.
+- Pipeline optionnel (parse_processes > 0) : les workers (threads) ne font que les requêtes, les pages
+  brutes sont parsées par un pool de processus et le thread du run reste l'unique écrivain.
+  La fenêtre glissante de références borne le nombre de pages en mémoire (contre-pression).
+  Processus lancés par forkserver (spawn hors Linux) : le script lanceur doit protéger son code
+  par `if __name__ == "__main__":` (main.py, carlo_cli.py, bench_scraper.py).
+- Archive optionnelle (page_archive.PageArchive) : chaque page de résultats brute est conservée ;
+  from_archive=True re-parse les dernières pages archivées sans aucune requête réseau, dans des fichiers
+  à part (resultats_archive.*) : le flux et le journal d'un run interrompu restent intacts.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import requests
+
+from carlo_parser import parse_page_timed
+from carlo_session import BASE_URL, LoginError
+from price_history import RUN_DONE, RUN_INTERRUPTED
+from rate_limiter import AdaptiveController
+from reference_ingest import normalize_reference
+from result_export import export_rows
+from result_sink import ARCHIVE_RESULTS_STEM, RESULTS_STEM, JsonlResultSink, iter_jsonl, results_stream_path
+from run_metrics import RunMetrics
+from run_journal import RunJournal, discard_unjournaled_rows, journal_path
+from suppliers import CarloErbaSupplier
+
+# Nombre de tentatives par référence sur 429 / 5xx / timeout
+MAX_ATTEMPTS = 3
+# Délais (connexion, lecture) d'une recherche : bornent aussi l'attente d'un worker après un arrêt
+REQUEST_TIMEOUT = (5, 15)
+# Processus de parsing : jamais de fork d'un processus qui a des threads (verrous urllib3, sqlite, logging)
+PARSE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# ----------------------------
+# Worker de scraping (thread)
+# ----------------------------
+class CarloScraperThread(threading.Thread):
+    """
+    Thread pour exécuter le scraping sans bloquer l'interface.
+    Appelle les callbacks pour logger / mettre à jour la progression.
+    """
+
+    def __init__(self, email, password, references, output_folder,
+                 log_callback=None, progress_callback=None, finished_callback=None, rate_delay=0.4,
+                 workers=4, adaptive=True, stats_callback=None, cache=None, force_refresh=False,
+                 resume=False, chunk_size=200, issue_callback=None, export_formats=("xlsx",), history=None,
+                 base_url=BASE_URL, metrics=None, supplier=None, parse_processes=0, archive=None,
+                 from_archive=False):
+        super().__init__(daemon=True)
+        self.email = email
+        self.password = password
+        self.references = references
+        self.output_folder = output_folder
+        self.log = log_callback or (lambda msg: None)
+        self.progress = progress_callback or (lambda current, total: None)
+        self.finished = finished_callback or (lambda success, path_or_msg: None)
+        self.rate_delay = rate_delay
+        self.workers = max(1, int(workers))
+        self.stats = stats_callback or (lambda stats: None)
+        # Problèmes par référence (type, détail) pour un récapitulatif agrégé côté interface
+        self.issue = issue_callback or (lambda ref, kind, detail: None)
+        self.archive = archive              # PageArchive optionnelle : pages brutes conservées
+        self.from_archive = from_archive    # re-parse les pages archivées au lieu d'interroger le site
+        if from_archive and archive is None:
+            raise ValueError("from_archive=True nécessite une archive de pages")
+        self.results_stem = ARCHIVE_RESULTS_STEM if from_archive else RESULTS_STEM
+        self.stream_file = results_stream_path(output_folder, from_archive)
+        # Relecture : pas de cache ni d'historique, les pages datent de leur récupération d'origine
+        self.cache = None if from_archive else cache            # ResultCache optionnel
+        self.force_refresh = force_refresh  # ignore les entrées en cache (elles sont réécrites)
+        self.resume = resume                # reprend le run interrompu de output_folder (references ignorées)
+        self.chunk_size = chunk_size        # produits mis en tampon avant écriture sur disque
+        self.export_formats = tuple(export_formats)  # fichiers finaux (xlsx, csv, parquet), typés
+        self.history = None if from_archive else history        # PriceHistory optionnel : lignes récupérées à chaque run
+        # Site interrogé : connexion, URL de recherche et extraction (Carlo Erba par défaut)
+        self.supplier = supplier or CarloErbaSupplier(email, password, base_url=base_url)
+        # Processus dédiés au parsing des pages (0 : parsing dans les threads de requête)
+        self.parse_processes = max(0, int(parse_processes))
+        # Durées par étape et compteurs ; résumé en fin de run + metriques_scraping.json / .prom
+        self.metrics = metrics or RunMetrics()
+        # Adaptatif : démarre à 1 requête / rate_delay et ajuste selon la réactivité du site ;
+        # sinon débit et concurrence fixes (comportement historique).
+        if adaptive:
+            self.controller = AdaptiveController(1.0 / rate_delay if rate_delay > 0 else 1e9, self.workers)
+        else:
+            self.controller = AdaptiveController.fixed(rate_delay, self.workers)
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """
+        Arrêt immédiat du run : réveille les attentes du limiteur, le thread du run n'attend plus
+        les requêtes en cours (terminées en arrière-plan, bornées par REQUEST_TIMEOUT).
+        La session n'est pas fermée : elle est partagée avec les autres runs du même compte.
+        """
+        self._stop_event.set()
+
+    def run(self):
+        """Exécute le scraping en se basant sur le code fourni par l'utilisateur."""
+        run_id = None
+        try:
+            # Les lignes produit sont écrites au fil de l'eau (JSON Lines) : mémoire constante
+            # et résultats partiels toujours sur disque, même en cas d'arrêt ou de plantage.
+            # Le journal associé liste les références traitées pour pouvoir reprendre le run.
+            os.makedirs(self.output_folder, exist_ok=True)
+            stream_file = self.stream_file
+            if self.resume:
+                journal = RunJournal.load(journal_path(stream_file))
+                if journal is None:
+                    self.log("⚠️ Aucun scraping interrompu à reprendre dans ce dossier.")
+                    self.finished(False, "Rien à reprendre")
+                    return
+                discard_unjournaled_rows(stream_file, journal.done)
+                references = journal.remaining()
+                run_id = self._history_run(journal.history_run)
+                self.log(f"⏯️ Reprise : {len(journal.done)} référence(s) déjà traitée(s), {len(references)} restante(s).")
+            else:
+                references = self.references
+                run_id = self._history_run(None)
+                journal = RunJournal.start(journal_path(stream_file), references, history_run=run_id)
+
+            # 0) Cache : les références encore fraîches sont servies sans requête HTTP
+            cached = {}
+            if self.cache is not None and not self.force_refresh:
+                with self.metrics.stage("cache"):
+                    cached = self.cache.get_many(references)
+            to_fetch = sum(1 for ref in references if normalize_reference(ref) not in cached)
+
+            session = None
+            if to_fetch and self.from_archive:
+                self.log("🗄️ Relecture de l'archive des pages : aucune requête réseau.")
+            elif to_fetch:
+                with self.metrics.stage("login"):
+                    session = self._login()
+                if session is None:
+                    journal.close()
+                    if run_id is not None:
+                        self.history.finish_run(run_id, RUN_INTERRUPTED)
+                    return
+            else:
+                self.log("💾 Toutes les références sont en cache : aucune connexion nécessaire.")
+
+            # 3) Préparer la liste de références et exécuter les recherches en parallèle
+            total = len(references)
+            page_parser = self.supplier.page_parser()
+            parse_pool = None
+            if to_fetch and self.parse_processes and page_parser is not None:
+                parse_pool = ProcessPoolExecutor(max_workers=self.parse_processes,
+                                                 mp_context=multiprocessing.get_context(PARSE_START_METHOD))
+                # Démarre le pool ici, avant les threads de requête, plutôt que depuis un callback
+                parse_pool.submit(os.getpid).result()
+                self.log(f"ℹ️ {total} références à rechercher ({self.workers} requêtes simultanées, "
+                         f"parsing sur {self.parse_processes} processus).")
+            else:
+                self.log(f"ℹ️ {total} références à rechercher ({self.workers} requêtes simultanées).")
+            # Le contrôleur (seau à jetons + limite de concurrence) remplace la pause fixe
+            controller = self.controller
+            hits = misses = 0
+            history_rows = []
+
+            def after_flush():
+                # Lignes sur disque : marquer leurs références traitées puis les ajouter à l'historique
+                journal.flush()
+                if run_id is not None and history_rows:
+                    self.history.add_rows(run_id, history_rows)
+                    history_rows.clear()
+
+            sink = JsonlResultSink(stream_file, chunk_size=self.chunk_size, append=self.resume,
+                                   after_flush=after_flush)
+
+            # Fenêtre glissante de futures : mémoire bornée et résultats traités dans l'ordre d'entrée.
+            # En pipeline, elle couvre aussi les pages en attente de parsing.
+            pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="carlo-search")
+            pending = deque()
+            ref_iter = iter(enumerate(references, start=1))
+            window = self.workers * 2 + (self.parse_processes * 2 if parse_pool is not None else 0)
+
+            def fill_window():
+                while len(pending) < window and not self._stop_event.is_set():
+                    item = next(ref_iter, None)
+                    if item is None:
+                        return
+                    idx, ref = item
+                    entry = cached.get(normalize_reference(ref))
+                    if entry is not None:
+                        future = Future()
+                        future.set_result(self._cached_result(ref, entry))
+                    elif parse_pool is not None:
+                        future = self._submit_pipelined(pool, parse_pool, page_parser, session, controller, ref)
+                    else:
+                        future = pool.submit(self._search_reference, session, controller, ref)
+                    pending.append((idx, ref, future, entry is not None))
+
+            try:
+                fill_window()
+                while pending:
+                    idx, ref, future, from_cache = pending[0]
+                    # Attente interruptible : un arrêt n'attend pas la fin des requêtes en cours
+                    while not future.done() and not self._stop_event.is_set():
+                        wait([future], timeout=0.2, return_when=FIRST_COMPLETED)
+                    if not future.done():
+                        break
+                    pending.popleft()
+                    messages, items, fetched, issues = future.result()
+
+                    self.progress(idx, total)   # callback mise à jour progress bar
+                    self.log(f"\n🔍 Recherche ({idx}/{total}) : {ref}")
+                    for msg in messages:
+                        self.log(msg)
+                    for kind, detail in issues:
+                        self.issue(ref, kind, detail)
+                    with self.metrics.stage("write"):
+                        sink.write(items)
+                    self.metrics.incr("references", source="cache" if from_cache else "archive" if self.from_archive else "site")
+                    self.metrics.incr("products", len(items))
+                    # Lignes servies par le cache : déjà enregistrées par le run qui les a récupérées ;
+                    # les réinscrire comme observations de ce run fausserait la comparaison des deux derniers runs
+                    if run_id is not None and not from_cache:
+                        history_rows.extend(items)
+                    if from_cache:
+                        hits += 1
+                    else:
+                        misses += 1
+                    if fetched or from_cache:
+                        journal.mark_done(ref)
+                    if fetched and self.cache is not None:
+                        self.cache.put(ref, items)
+                    self.stats(controller.snapshot())
+                    fill_window()
+                interrupted = self._stop_event.is_set() and (pending or next(ref_iter, None) is not None)
+            finally:
+                # Réveille les workers encore en attente du contrôleur et abandonne le reste ;
+                # les résultats déjà obtenus sont écrits sur disque (puis le journal).
+                self._stop_event.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+                if parse_pool is not None:
+                    # Parsings en cours : quelques millisecondes ; ceux en file sont abandonnés
+                    parse_pool.shutdown(wait=True, cancel_futures=True)
+                sink.close()
+                journal.close()
+
+            if interrupted:
+                self.log("⏹️ Scraping interrompu par l'utilisateur.")
+                self.log(f"💾 Résultats partiels ({sink.count} produits) : {stream_file} — utilisez « Reprendre » pour continuer.")
+                if run_id is not None:
+                    self.history.finish_run(run_id, RUN_INTERRUPTED)
+                self._report_metrics()
+                self.finished(False, "Interrompu")
+                return
+            journal.complete()
+
+            stats = controller.snapshot()
+            self.log(f"\n📊 Débit final : {stats['rate']:.2f} req/s, {stats['concurrency']} requêtes simultanées "
+                     f"— 429 : {stats['http_429']}, 5xx : {stats['http_5xx']}, timeouts : {stats['timeouts']}")
+            if self.cache is not None:
+                refresh = " (rafraîchissement forcé)" if self.force_refresh else ""
+                self.log(f"💾 Cache : {hits} référence(s) servie(s) depuis le cache, {misses} recherche(s) en ligne{refresh}")
+            if run_id is not None:
+                self.history.finish_run(run_id, RUN_DONE)
+                self.log(f"📈 Historique (run {run_id}) : {len(self.history.price_changes())} variation(s) de prix, "
+                         f"{len(self.history.went_out_of_stock())} passage(s) hors stock depuis le run précédent.")
+
+            # 4) Exporter résultats si présents : fichiers typés construits depuis le flux
+            if sink.count:
+                output_files = []
+                for fmt in self.export_formats:
+                    output_file = os.path.join(self.output_folder, f"{self.results_stem}.{fmt}")
+                    with self.metrics.stage("export", format=fmt):
+                        export_rows(iter_jsonl(stream_file), output_file, fmt=fmt)
+                    output_files.append(output_file)
+                self._report_metrics()
+                # Sans format d'export (comparaison multi-fournisseurs), le flux JSONL est le résultat
+                output_files = output_files or [stream_file]
+                self.log(f"\n✅ Données enregistrées dans : {', '.join(output_files)}")
+                self.finished(True, output_files[0])
+            else:
+                self._report_metrics()
+                self.log("\n⚠️ Aucun produit trouvé pour les références fournies.")
+                self.finished(False, "Aucun résultat")
+
+        except Exception as e:
+            if run_id is not None:
+                self.history.finish_run(run_id, RUN_INTERRUPTED)
+            self.log(f"❌ Exception durant le scraping : {e}")
+            self._report_metrics()
+            self.finished(False, str(e))
+
+    def _report_metrics(self):
+        """Résumé des mesures dans le log et fichiers JSON / Prometheus (textfile) dans le dossier de sortie."""
+        for line in self.metrics.summary_lines():
+            self.log(line)
+        base = os.path.join(self.output_folder, "metriques_scraping")
+        try:
+            self.metrics.write_json(base + ".json")
+            self.metrics.write_prometheus(base + ".prom")
+        except OSError as e:
+            self.log(f"⚠️ Mesures non enregistrées : {e}")
+
+    def _history_run(self, previous_run):
+        """Run de l'historique des prix : celui du run repris s'il existe encore, sinon un nouveau."""
+        if self.history is None:
+            return None
+        if previous_run is not None and self.history.reopen_run(previous_run):
+            return previous_run
+        return self.history.start_run()
+
+    def _login(self):
+        """
+        Session connectée (réutilisée d'un run à l'autre si encore valide), pool dimensionné sur les workers.
+        Retourne la session, ou None après avoir appelé `finished` en cas d'échec.
+        """
+        try:
+            return self.supplier.login(log=self.log, pool_size=self.workers)
+        except LoginError as e:
+            self.log(f"❌ {e}.")
+            self.finished(False, str(e))
+            return None
+
+    def _search_reference(self, session, controller, ref):
+        """
+        Exécuté dans un worker : requête (voir `_fetch_reference`) puis extraction des produits.
+        Retourne (messages de log, lignes produit, réponse exploitable à mettre en cache,
+        problèmes [(type, détail)]) ; les callbacks sont appelés par le thread principal.
+        """
+        messages, html, fetched, issues = self._fetch_reference(session, controller, ref)
+        if html is None:
+            return messages, [], fetched, issues
+        found_messages, items, issues = self._extract_products(ref, html)
+        return messages + found_messages, items, True, issues
+
+    def _submit_pipelined(self, fetch_pool, parse_pool, page_parser, session, controller, ref):
+        """
+        Pipeline d'une référence : requête dans un thread, parsing dans un processus du pool.
+        Retourne un Future du même résultat que `_search_reference`.
+        """
+        result = Future()
+
+        def parsed(parse_future, messages):
+            try:
+                items, errors, seconds = parse_future.result()
+                self.metrics.observe("parse", seconds)
+                found_messages, items, issues = self._page_outcome(ref, items, errors)
+                result.set_result((messages + found_messages, items, True, issues))
+            except BaseException as e:
+                result.set_exception(e)
+
+        def fetched(fetch_future):
+            try:
+                messages, html, ok, issues = fetch_future.result()
+                if html is None:
+                    result.set_result((messages, [], ok, issues))
+                    return
+                parse_future = parse_pool.submit(parse_page_timed, page_parser, html, ref)
+                parse_future.add_done_callback(lambda f: parsed(f, messages))
+            except BaseException as e:
+                # Arrêt : requêtes annulées ou pool fermé
+                result.set_exception(e)
+
+        fetch_pool.submit(self._fetch_reference, session, controller, ref).add_done_callback(fetched)
+        return result
+
+    def _fetch_reference(self, session, controller, ref):
+        """
+        Attend le feu vert du contrôleur et lance la recherche ; les 429/5xx/timeouts sont signalés
+        au contrôleur puis retentés (MAX_ATTEMPTS au total). En relecture, la page vient de l'archive.
+        Retourne (messages, page HTML ou None, réponse exploitable, problèmes).
+        """
+        if self.from_archive:
+            return self._archived_page(ref)
+        messages = []
+        error = ""
+        issue = None
+        search_url = self.supplier.search_url(ref)
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt:
+                self.metrics.incr("retries")
+            with self.metrics.stage("throttle"):
+                allowed = controller.acquire(self._stop_event)
+            if not allowed:
+                return messages, None, False, []
+
+            start = time.monotonic()
+            try:
+                r = session.get(search_url, timeout=REQUEST_TIMEOUT)
+            except requests.Timeout as e:
+                latency = time.monotonic() - start
+                self.metrics.observe("fetch", latency)
+                self.metrics.incr("timeouts")
+                note = controller.release(latency, timed_out=True)
+                if note:
+                    messages.append(note)
+                error = f"❗ Délai dépassé pour {ref} : {e}"
+                issue = ("Délai dépassé", str(e))
+                continue
+            except Exception as e:
+                self.metrics.incr("network_errors")
+                note = controller.release(time.monotonic() - start, failed=True)
+                if note:
+                    messages.append(note)
+                messages.append(f"❗ Erreur réseau pour {ref} : {e}")
+                return messages, None, False, [("Erreur réseau", str(e))]
+
+            latency = time.monotonic() - start
+            self.metrics.observe("fetch", latency)
+            self.metrics.incr("http_responses", code=r.status_code)
+            retry_after = r.headers.get("Retry-After") if r.status_code == 429 else None
+            note = controller.release(latency, status=r.status_code, retry_after=retry_after)
+            if note:
+                messages.append(note)
+
+            if r.status_code == 429 or r.status_code >= 500:
+                error = f"❗ HTTP {r.status_code} pour {ref}"
+                issue = (f"HTTP {r.status_code}", "")
+                continue
+            if r.status_code != 200:
+                messages.append(f"❗ HTTP {r.status_code} pour {ref}")
+                return messages, None, False, [(f"HTTP {r.status_code}", "")]
+
+            if self.archive is not None:
+                with self.metrics.stage("archive"):
+                    self.archive.put(ref, r.text, self.supplier.key)
+            return messages, r.text, True, []
+
+        messages.append(f"{error} (après {MAX_ATTEMPTS} tentatives)")
+        kind, detail = issue
+        return messages, None, False, [(kind, f"{detail} (après {MAX_ATTEMPTS} tentatives)".lstrip())]
+
+    def _archived_page(self, ref):
+        """Dernière page archivée de `ref`, au format de `_fetch_reference`."""
+        with self.metrics.stage("archive"):
+            entry = self.archive.latest(ref, self.supplier.key)
+        if entry is None:
+            return [f"⚠️ Page absente de l'archive pour : {ref}"], None, False, [("Absente de l'archive", "")]
+        page, fetched_at = entry
+        return [f"🗄️ Page archivée le {time.strftime('%d/%m/%Y %H:%M', time.localtime(fetched_at))}"], page, True, []
+
+    def _cached_result(self, ref, entry):
+        """Résultat servi depuis le cache, au même format que `_search_reference`."""
+        rows, fetched_at = entry
+        age_min = int((time.time() - fetched_at) // 60)
+        messages = [f"💾 En cache (récupéré il y a {age_min} min)"]
+        items = [{**row, 'Référence cherchée': ref} for row in rows]
+        issues = []
+        if not items:
+            messages.append(f"⚠️ Aucun produit trouvé pour : {ref}")
+            issues.append(("Aucun produit", "réponse en cache"))
+        for item in items:
+            messages.append(f"  📦 {item['Produit']} — {item['Prix €']}€ — {item['Disponibilité']}")
+        return messages, items, False, issues
+
+    def _extract_products(self, ref, html):
+        """Extrait les lignes produit d'une page de résultats. Retourne (messages, lignes, problèmes)."""
+        # Étape unique "parse" : parsing et construction des lignes, mesurée de la même façon
+        # dans le pool de processus (carlo_parser.parse_page_timed)
+        with self.metrics.stage("parse"):
+            items, errors = self.supplier.extract(html, ref)
+        return self._page_outcome(ref, items, errors)
+
+    def _page_outcome(self, ref, items, errors):
+        """Messages, compteurs et problèmes d'une page parsée (dans ce processus ou dans le pool)."""
+        messages = [f"⚠️ Erreur d'extraction pour {ref} : {e}" for e in errors]
+        issues = [("Erreur d'extraction", e) for e in errors]
+        if errors:
+            self.metrics.incr("extraction_errors", len(errors))
+        if not items and not errors:
+            self.metrics.incr("empty_results")
+            messages.append(f"⚠️ Aucun produit trouvé pour : {ref}")
+            issues.append(("Aucun produit", ""))
+        # Log plus détaillé
+        messages.extend(f"  📦 {item['Produit']} — {item['Prix €']}€ — {item['Disponibilité']}" for item in items)
+        return messages, items, issues
@@ -0,0 +1,157 @@
+# carlo_session.py
+"""
+Session authentifiée Carlo Erba réutilisable entre les runs (et les reruns Streamlit).
+- CarloSessionManager: garde la session connectée (cookies + connexions TCP/TLS ouvertes),
+  vérifie sa validité par une requête légère et ne se reconnecte qu'en cas de besoin.
+- get_session_manager: registre par identifiant (et site), partagé par tout le processus ;
+  close_session_managers le vide à l'arrêt du processus (un run ne ferme jamais une session partagée).
+- site_url: URL d'une page ; la base est remplaçable (serveur local de bench_scraper.py).
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from carlo_parser import parse_csrf_token
+
+BASE_URL = "https://www.carloerbareagents.com"
+STORE_PATH = "/cerstorefront/cer-fr"
+
+
+def site_url(base_url, page):
+    """URL d'une page de la boutique pour le site `base_url`."""
+    return f"{base_url.rstrip('/')}{STORE_PATH}/{page}"
+
+
+class LoginError(Exception):
+    """Connexion impossible (CSRFToken introuvable, identifiants refusés, HTTP inattendu)."""
+
+
+class CarloSessionManager:
+    """
+    Session connectée pour un compte.
+    `session()` renvoie la session existante si elle est encore valide, sinon se reconnecte.
+    La validité est vérifiée au plus une fois toutes les `probe_interval` secondes.
+    """
+
+    def __init__(self, email, password, pool_size=4, probe_interval=60, base_url=BASE_URL):
+        self.email = email
+        self.password = password
+        self.base_url = base_url
+        self.login_page_url = site_url(base_url, "login")
+        self.login_url = site_url(base_url, "j_spring_security_check")
+        self.account_url = site_url(base_url, "my-account")
+        self.pool_size = 0
+        self.probe_interval = probe_interval
+        self._session = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._http = requests.Session()
+        self._http.headers.update({"User-Agent": "Mozilla/5.0 (compatible; UnivScraper/1.0)"})
+        self.ensure_pool(pool_size)
+
+    def ensure_pool(self, size):
+        """
+        Dimensionne le pool de connexions HTTP sur le nombre de workers.
+        L'adaptateur n'est remplacé que si le pool doit grandir (les connexions ouvertes sont conservées sinon).
+        Retry uniquement sur les erreurs de connexion : 429/5xx et timeouts de lecture restent visibles
+        de l'appelant (contrôleur adaptatif du scraper). urllib3 ne doit ni honorer Retry-After ni lever
+        d'erreur sur ces statuts : la réponse 429/503 est rendue telle quelle au scraper.
+        """
+        size = max(1, int(size))
+        if size <= self.pool_size:
+            return
+        retries = Retry(total=3, read=0, status=0, backoff_factor=0.5,
+                        respect_retry_after_header=False, raise_on_status=False)
+        adapter = HTTPAdapter(max_retries=retries, pool_connections=1, pool_maxsize=size)
+        self._http.mount("https://", adapter)
+        self._http.mount("http://", adapter)
+        self.pool_size = size
+
+    def session(self, log=None, force_login=False):
+        """Retourne une session connectée (réutilisée si possible). Lève LoginError en cas d'échec."""
+        log = log or (lambda msg: None)
+        with self._lock:
+            if self._session is not None and not force_login:
+                if time.monotonic() - self._checked_at < self.probe_interval or self._probe():
+                    log("♻️ Session Carlo Erba existante réutilisée.")
+                    return self._session
+                log("⌛ Session expirée : reconnexion.")
+            self._login(log)
+            return self._session
+
+    def _probe(self):
+        """Requête légère : la page compte répond 200 si connecté, redirige vers le login sinon."""
+        try:
+            resp = self._http.get(self.account_url, allow_redirects=False, timeout=10)
+        except requests.RequestException:
+            return False
+        valid = resp.status_code == 200
+        if valid:
+            self._checked_at = time.monotonic()
+        return valid
+
+    def _login(self, log):
+        self._session = None
+        self._http.cookies.clear()
+
+        # 1) Récupérer CSRF token
+        log(f"➡️ Requête page login : {self.login_page_url}")
+        resp = self._http.get(self.login_page_url, timeout=15)
+        csrf_token = parse_csrf_token(resp.text)
+        if csrf_token is None:
+            raise LoginError("CSRFToken introuvable sur la page de login")
+        log("🔑 CSRFToken récupéré.")
+
+        # 2) Formulaire de connexion
+        payload = {"j_username": self.email, "j_password": self.password, "CSRFToken": csrf_token}
+        headers = {
+            "User-Agent": "Mozilla/5.0",
+            "Referer": self.login_page_url,
+            "Origin": self.base_url,
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+        login_resp = self._http.post(self.login_url, data=payload, headers=headers, allow_redirects=False, timeout=15)
+        if login_resp.status_code not in (302, 200):
+            raise LoginError(f"Échec de connexion HTTP {login_resp.status_code}")
+        if "error" in login_resp.headers.get("Location", ""):
+            raise LoginError("Identifiants refusés par Carlo Erba")
+        log("✅ Connexion réussie.")
+
+        self._session = self._http
+        self._checked_at = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._session = None
+            self._http.close()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_session_manager(email, password, pool_size=4, base_url=BASE_URL):
+    """Gestionnaire de session partagé pour ce compte (recréé si le mot de passe change)."""
+    with _managers_lock:
+        manager = _managers.get((base_url, email))
+        if manager is None or manager.password != password:
+            if manager is not None:
+                manager.close()
+            manager = CarloSessionManager(email, password, pool_size, base_url=base_url)
+            _managers[(base_url, email)] = manager
+        else:
+            manager.ensure_pool(pool_size)
+        return manager
+
+
+def close_session_managers():
+    """Ferme toutes les sessions partagées (fin du processus)."""
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        manager.close()
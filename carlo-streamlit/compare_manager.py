@@ -0,0 +1,177 @@
+# compare_manager.py
+"""
+Module Comparaison fournisseurs (CTkFrame).
+- Une liste de références (classeur Excel et/ou saisie manuelle) interrogée chez tous les fournisseurs
+  cochés en même temps (supplier_orchestrator.MultiSupplierScraper), chacun avec son propre débit.
+- Table de comparaison (moins cher marqué) exportée dans le dossier « comparaison ».
+- Logs et progression transmis par ui_events.UiEventQueue, comme ExcelFrame.
+"""
+
+import os
+
+import customtkinter as ctk
+from tkinter import filedialog, messagebox
+
+from reference_ingest import build_plan
+from supplier_orchestrator import MultiSupplierScraper
+from suppliers import available_suppliers, create_supplier
+from ui_events import UiEventQueue
+
+UI_REFRESH_MS = 100
+LOG_MAX_LINES = 2000
+
+
+class CompareFrame(ctk.CTkFrame):
+    """Frame de comparaison des prix entre fournisseurs."""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.excel_path = None
+        self.scraper = None
+
+        title = ctk.CTkLabel(self, text="🧾 Comparaison fournisseurs", font=ctk.CTkFont(size=18, weight="bold"))
+        title.pack(pady=(6, 10))
+
+        # --- Fournisseurs : case à cocher + identifiants si le site en demande ---
+        suppliers_frame = ctk.CTkFrame(self)
+        suppliers_frame.pack(fill="x", padx=6, pady=6)
+        self.supplier_widgets = {}
+        for row, (key, name, needs_credentials) in enumerate(available_suppliers()):
+            enabled = ctk.BooleanVar(value=True)
+            ctk.CTkCheckBox(suppliers_frame, text=name, variable=enabled).grid(row=row, column=0, padx=6, pady=6, sticky="w")
+            email = password = None
+            if needs_credentials:
+                email = ctk.CTkEntry(suppliers_frame, placeholder_text=f"Email ({name})")
+                email.grid(row=row, column=1, padx=6, pady=6, sticky="we")
+                password = ctk.CTkEntry(suppliers_frame, placeholder_text="Mot de passe", show="*")
+                password.grid(row=row, column=2, padx=6, pady=6, sticky="we")
+            self.supplier_widgets[key] = (name, enabled, email, password)
+        suppliers_frame.grid_columnconfigure(1, weight=1)
+        suppliers_frame.grid_columnconfigure(2, weight=1)
+
+        # --- Références : classeur (colonne 'Référence') et/ou saisie manuelle ---
+        refs_frame = ctk.CTkFrame(self)
+        refs_frame.pack(fill="x", padx=6, pady=6)
+        self.btn_open = ctk.CTkButton(refs_frame, text="📂 Classeur de références", command=self.open_excel_file)
+        self.btn_open.grid(row=0, column=0, padx=6, pady=6, sticky="w")
+        self.lbl_path = ctk.CTkLabel(refs_frame, text="Aucun fichier sélectionné", anchor="w")
+        self.lbl_path.grid(row=0, column=1, padx=6, sticky="we")
+        refs_frame.grid_columnconfigure(1, weight=1)
+        self.manual_entry = ctk.CTkEntry(self, placeholder_text="Références manuelles, séparées par des virgules")
+        self.manual_entry.pack(fill="x", padx=6, pady=(0, 12))
+
+        # --- Actions ---
+        actions_frame = ctk.CTkFrame(self)
+        actions_frame.pack(fill="x", padx=6, pady=(0, 12))
+        self.btn_run = ctk.CTkButton(actions_frame, text="▶ Comparer", fg_color="green", command=self.start_comparison)
+        self.btn_run.grid(row=0, column=0, padx=6, pady=6)
+        self.btn_stop = ctk.CTkButton(actions_frame, text="⏹ Arrêter", fg_color="orange", command=self.stop_comparison)
+        self.btn_stop.grid(row=0, column=1, padx=6, pady=6)
+        self.btn_stop.configure(state="disabled")
+        self.force_refresh_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(actions_frame, text="🔄 Forcer le rafraîchissement",
+                        variable=self.force_refresh_var).grid(row=0, column=2, padx=6, pady=6)
+
+        # --- Progression et logs ---
+        self.progress = ctk.CTkProgressBar(self)
+        self.progress.pack(fill="x", padx=6, pady=(6, 4))
+        self.progress.set(0)
+        self.log_box = ctk.CTkTextbox(self, height=220)
+        self.log_box.pack(fill="both", expand=True, padx=6, pady=(4, 6))
+
+        # File d'événements des threads fournisseur, vidée par la boucle Tk
+        self.events = UiEventQueue(max_pending=LOG_MAX_LINES)
+        self.after(UI_REFRESH_MS, self._drain_events)
+
+    def open_excel_file(self):
+        path = filedialog.askopenfilename(title="Choisir un classeur", filetypes=[("Excel files", "*.xlsx *.xls")])
+        if path:
+            self.excel_path = path
+            self.lbl_path.configure(text=os.path.basename(path))
+
+    def _selected_suppliers(self):
+        """Fournisseurs cochés, instanciés avec leurs identifiants ; None si des identifiants manquent."""
+        suppliers = []
+        for key, (name, enabled, email, password) in self.supplier_widgets.items():
+            if not enabled.get():
+                continue
+            if email is None:
+                suppliers.append(create_supplier(key))
+                continue
+            if not email.get().strip() or not password.get().strip():
+                messagebox.showwarning("Identifiants", f"Renseigne l'email et le mot de passe pour {name}.")
+                return None
+            suppliers.append(create_supplier(key, email=email.get().strip(), password=password.get().strip()))
+        return suppliers
+
+    def start_comparison(self):
+        suppliers = self._selected_suppliers()
+        if suppliers is None:
+            return
+        if not suppliers:
+            messagebox.showwarning("Fournisseurs", "Coche au moins un fournisseur.")
+            return
+        try:
+            plan = build_plan(excel_source=self.excel_path, manual_text=self.manual_entry.get().strip())
+        except Exception as e:
+            messagebox.showerror("Erreur lecture Excel", str(e))
+            return
+        if not plan:
+            messagebox.showinfo("Aucune référence", "Aucune référence à rechercher.")
+            return
+
+        self.btn_run.configure(state="disabled")
+        self.btn_stop.configure(state="normal")
+        self.log_box.delete("0.0", "end")
+        self.progress.set(0)
+        base = os.path.dirname(self.excel_path) if self.excel_path else os.getcwd()
+        self.events.put_log(f"ℹ️ {plan.summary()}")
+        self.scraper = MultiSupplierScraper(
+            suppliers,
+            plan.references,
+            os.path.join(base, "comparaison"),
+            log_callback=self.events.put_log,
+            progress_callback=lambda current, total: self.events.set_latest("progress", current / total if total else 0),
+            finished_callback=self._thread_finished,
+            force_refresh=self.force_refresh_var.get(),
+        )
+        self.scraper.start()
+
+    def stop_comparison(self):
+        if self.scraper:
+            self.scraper.stop()
+            self.events.put_log("⏹️ Arrêt demandé...")
+
+    # ----------------------------
+    # Mises à jour UI (thread Tk)
+    # ----------------------------
+    def _drain_events(self):
+        try:
+            logs, dropped, latest, actions = self.events.drain()
+            if logs:
+                if dropped:
+                    logs = [f"… {dropped} ligne(s) omise(s)"] + logs
+                self.log_box.insert("end", "\n".join(logs) + "\n")
+                line_count = int(self.log_box.index("end-1c").split(".")[0]) - 1
+                if line_count > LOG_MAX_LINES:
+                    self.log_box.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
+                self.log_box.see("end")
+            if "progress" in latest:
+                self.progress.set(latest["progress"])
+            for action in actions:
+                action()
+        finally:
+            self.after(UI_REFRESH_MS, self._drain_events)
+
+    def _thread_finished(self, success, path_or_msg):
+        def finish_ui():
+            if success:
+                messagebox.showinfo("Terminé", f"Comparaison enregistrée :\n{path_or_msg}")
+            else:
+                messagebox.showwarning("Terminé", f"Fin: {path_or_msg}")
+            self.btn_run.configure(state="normal")
+            self.btn_stop.configure(state="disabled")
+            self.progress.set(0)
+        self.events.put_action(finish_ui)
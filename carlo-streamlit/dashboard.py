@@ -1,14 +1,22 @@
 import customtkinter as ctk
 import datetime
+import importlib
+import os
 import threading
-from tkinter import messagebox
-import requests
-from bs4 import BeautifulSoup
+
+from dashboard_stats import DashboardStats
 
 # === MODULES INTERNES ===
-# Ici tu pourras importer tes futurs modules :
-# from module_excel import ExcelModule
-# from module_calendrier import CalendrierModule
+# ExcelFrame (excel_manager), CalendarFrame (calendar_manager) et CompareFrame (compare_manager)
+# sont importés à la première ouverture de leur vue : voir App._view_builders. Rien de lourd (requests, lxml, openpyxl,
+# tkcalendar…) n'est chargé avant l'affichage de la fenêtre : voir startup_profile.
+
+# Préchargés dans un thread une fois la fenêtre affichée : l'ouverture d'une vue est ensuite immédiate
+WARMUP_MODULES = ("excel_manager", "calendar_manager", "compare_manager", "openpyxl")
+WARMUP_DELAY_MS = 300
+
+# Contrôle des fichiers sources des statistiques (relus seulement s'ils ont changé)
+STATS_REFRESH_MS = 5000
 
 # === CLASSE PRINCIPALE ===
 class App(ctk.CTk):
@@ -35,10 +43,28 @@ class App(ctk.CTk):
         self.sidebar.grid(row=1, column=0, sticky="nswe")
         self._create_sidebar()
 
+        # Statistiques calculées en arrière-plan, dernières valeurs affichées immédiatement
+        self.stats = DashboardStats()
+        self.card_values = {}
+        self.stats_info = None
+        self._stats_after = None
+
+        # Vues construites à la première ouverture puis conservées (masquées / ré-affichées) :
+        # un scraping en cours continue quand on change de vue
+        self.views = {}
+        self.current_view = None
+        self._view_builders = {
+            "dashboard": self._build_dashboard,
+            "excel": self._build_excel,
+            "calendar": self._build_calendar,
+            "scraping": self._build_scraping,
+        }
+
         # Zone principale (tableau de bord)
         self.main_frame = ctk.CTkFrame(self, corner_radius=10)
         self.main_frame.grid(row=1, column=1, sticky="nsew")
         self.show_dashboard()
+        self.after(WARMUP_DELAY_MS, self._start_warmup)
 
     # ==== BARRE SUPÉRIEURE ====
     def _create_topbar(self):
@@ -76,104 +102,128 @@ class App(ctk.CTk):
         btn_calendar = ctk.CTkButton(self.sidebar, text="🗓️ Calendrier (.ics)", command=self.show_calendar)
         btn_calendar.pack(pady=5)
 
-        btn_scraping = ctk.CTkButton(self.sidebar, text="🧾 Scraping produits", command=self.show_scraping)
+        btn_scraping = ctk.CTkButton(self.sidebar, text="🧾 Comparaison fournisseurs", command=self.show_scraping)
         btn_scraping.pack(pady=5)
 
         btn_quit = ctk.CTkButton(self.sidebar, text="🚪 Quitter", fg_color="red", command=self.destroy)
         btn_quit.pack(pady=30)
 
+    # ==== VUES ====
+    def show_view(self, name):
+        """Affiche la vue `name`, construite au premier appel ; la vue précédente est seulement masquée."""
+        view = self.views.get(name)
+        if view is None:
+            view = self.views[name] = self._view_builders[name](self.main_frame)
+        if self.current_view is not None and self.current_view != name:
+            self.views[self.current_view].pack_forget()
+        if not view.winfo_manager():
+            view.pack(fill="both", expand=True, padx=10, pady=10)
+        self.current_view = name
+        return view
+
     # ==== TABLEAU DE BORD ====
     def show_dashboard(self):
-        self._clear_main_frame()
-
-        title = ctk.CTkLabel(self.main_frame, text="Tableau de bord d’accueil", font=("Roboto Bold", 20))
+        self.show_view("dashboard")
+        # Calendrier chargé dans le module Calendrier : source des livraisons du jour
+        calendar = self.views.get("calendar")
+        if calendar is not None and calendar.ics_path:
+            self.stats.set_ics_path(calendar.ics_path)
+        # Dossier de sortie du module Excel : cherché en plus des emplacements par défaut
+        excel = self.views.get("excel")
+        if excel is not None and excel.excel_path:
+            self.stats.add_root(os.path.dirname(excel.excel_path))
+        self._refresh_stats()
+
+    def _build_dashboard(self, parent):
+        view = ctk.CTkFrame(parent, fg_color="transparent")
+
+        title = ctk.CTkLabel(view, text="Tableau de bord d’accueil", font=("Roboto Bold", 20))
         title.pack(pady=20)
 
         # --- Cartes de statistiques ---
-        stats_frame = ctk.CTkFrame(self.main_frame)
+        stats_frame = ctk.CTkFrame(view)
         stats_frame.pack(pady=10)
 
-        cards = [
-            ("📦 Articles en stock", "620"),
-            ("📅 Livraisons du jour", "4"),
-            ("⚠️ Alertes à vérifier", "2"),
-            ("👥 Utilisateurs actifs", "10")
-        ]
-
-        for text, value in cards:
+        for text, value in self.stats.cards():
             card = ctk.CTkFrame(stats_frame, width=200, height=100, corner_radius=10)
             card.pack(side="left", padx=10, pady=10)
             ctk.CTkLabel(card, text=text, font=("Roboto", 14)).pack(pady=5)
-            ctk.CTkLabel(card, text=value, font=("Roboto Bold", 24)).pack()
+            self.card_values[text] = ctk.CTkLabel(card, text=value, font=("Roboto Bold", 24))
+            self.card_values[text].pack()
+
+        self.stats_info = ctk.CTkLabel(view, text="", font=("Roboto", 12))
+        self.stats_info.pack(pady=5)
+        self._update_cards(self.stats.snapshot)
+        return view
+
+    def _refresh_stats(self):
+        """Lance un recalcul en arrière-plan (fichiers inchangés : simple contrôle de taille et de date)."""
+        if self._stats_after is not None:
+            self.after_cancel(self._stats_after)
+        self._poll_stats(self.stats.refresh())
+
+    def _poll_stats(self, future):
+        if not future.done():
+            self._stats_after = self.after(100, lambda: self._poll_stats(future))
+            return
+        if future.exception() is None:
+            self._update_cards(future.result())
+        # Contrôle périodique tant que le tableau de bord est affiché
+        if self.current_view == "dashboard":
+            self._stats_after = self.after(STATS_REFRESH_MS, self._refresh_stats)
+        else:
+            self._stats_after = None
+
+    def _update_cards(self, snapshot):
+        if self.stats_info is None:
+            return
+        for text, value in self.stats.cards(snapshot):
+            self.card_values[text].configure(text=value)
+        if snapshot:
+            source = snapshot["results_path"] or "aucun résultat de scraping trouvé"
+            self.stats_info.configure(text=f"Résultats : {source} — mis à jour à {snapshot['computed_at']:%H:%M:%S}")
 
     # ==== MODULE EXCEL ====
     def show_excel(self):
-        self._clear_main_frame()
-        label = ctk.CTkLabel(self.main_frame, text="Module Excel (à intégrer)", font=("Roboto Bold", 20))
-        label.pack(pady=20)
-        # Tu pourras ici intégrer ton module Excel directement
+        self.show_view("excel")
+
+    def _build_excel(self, parent):
+        from excel_manager import ExcelFrame
+        return ExcelFrame(parent)
 
     # ==== MODULE CALENDRIER ====
     def show_calendar(self):
-        self._clear_main_frame()
-        label = ctk.CTkLabel(self.main_frame, text="Module Calendrier (.ics)", font=("Roboto Bold", 20))
-        label.pack(pady=20)
-
-        info = ctk.CTkLabel(self.main_frame, text="Lecture du fichier calendrier.ics :", font=("Roboto", 14))
-        info.pack(pady=10)
+        self.show_view("calendar")
 
-        btn_load = ctk.CTkButton(self.main_frame, text="Charger calendrier", command=self.load_calendar)
-        btn_load.pack(pady=10)
-
-    def load_calendar(self):
-        try:
-            with open("calendrier.ics", "r", encoding="utf-8") as f:
-                content = f.read()
-                # TODO : gérer les fichiers multiples si nécessaire avec parse_multiple()
-            messagebox.showinfo("Calendrier chargé", f"Fichier lu avec succès ({len(content)} caractères)")
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Impossible de lire le fichier : {e}")
+    def _build_calendar(self, parent):
+        from calendar_manager import CalendarFrame
+        return CalendarFrame(parent)
 
     # ==== MODULE SCRAPING ====
     def show_scraping(self):
-        self._clear_main_frame()
-        label = ctk.CTkLabel(self.main_frame, text="Scraping produits en ligne", font=("Roboto Bold", 20))
-        label.pack(pady=20)
-
-        btn_scrape = ctk.CTkButton(self.main_frame, text="Lancer le scraping", command=self.run_scraping)
-        btn_scrape.pack(pady=10)
-
-        self.scrape_output = ctk.CTkTextbox(self.main_frame, width=800, height=400)
-        self.scrape_output.pack(pady=10)
-
-    def run_scraping(self):
-        def task():
-            self.scrape_output.delete("1.0", "end")
-            self.scrape_output.insert("end", "Chargement...\n")
+        self.show_view("scraping")
 
-            # Exemple : scraping fictif sur une URL
-            url = "https://books.toscrape.com/"
-            try:
-                response = requests.get(url)
-                soup = BeautifulSoup(response.text, "html.parser")
-                books = soup.find_all("article", class_="product_pod")
-
-                for b in books[:10]:
-                    title = b.h3.a["title"]
-                    price = b.find("p", class_="price_color").text
-                    stock = b.find("p", class_="instock availability").text.strip()
-
-                    self.scrape_output.insert("end", f"📗 {title}\n💰 {price}\n📦 {stock}\n\n")
-            except Exception as e:
-                self.scrape_output.insert("end", f"❌ Erreur : {e}\n")
-
-        threading.Thread(target=task).start()
+    def _build_scraping(self, parent):
+        # Même liste de références interrogée chez tous les fournisseurs en parallèle
+        from compare_manager import CompareFrame
+        return CompareFrame(parent)
 
     # ==== OUTILS ====
-    def _clear_main_frame(self):
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
-
+    def _start_warmup(self):
+        """Import des modules des vues en arrière-plan (le verrou d'import protège une vue ouverte entre-temps)."""
+        def warm():
+            for name in WARMUP_MODULES:
+                try:
+                    importlib.import_module(name)
+                except Exception:
+                    # L'erreur sera levée à nouveau, et affichée, à l'ouverture de la vue
+                    pass
+
+        threading.Thread(target=warm, name="warmup-imports", daemon=True).start()
+
+    def destroy(self):
+        self.stats.close()
+        super().destroy()
 
 # ==== LANCEMENT ====
 if __name__ == "__main__":
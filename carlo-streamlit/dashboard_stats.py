@@ -0,0 +1,208 @@
+# dashboard_stats.py
+"""
+Statistiques du tableau de bord, calculées sur les données réelles et mises en cache.
+- ResultsTally: agrégats du dernier flux de résultats (resultats_scraping.jsonl) mis à jour
+  incrémentalement : seules les lignes ajoutées depuis le dernier passage sont lues,
+  le fichier n'est relu en entier que s'il a été remplacé (nouveau run).
+- DashboardStats: cartes du tableau de bord (articles en stock, livraisons du jour, alertes
+  délai long, références suivies), recalculées dans un thread d'arrière-plan ; l'interface
+  affiche immédiatement les dernières valeurs connues.
+Les événements du jour viennent du .ics via ics_store.IcsStore (relu seulement s'il change).
+"""
+
+import datetime
+import glob
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ics_store import IcsStore
+from result_sink import RESULTS_STEM
+
+# Libellés de carlo_parser.AVAILABILITY_LABELS (non importé : lxml n'est pas nécessaire ici)
+IN_STOCK = "En stock"
+LONG_LEAD_TIME = "Disponible en plus de 30 jours"
+
+RESULTS_FILE = f"{RESULTS_STEM}.jsonl"
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ICS_PATH = os.path.join(_BASE_DIR, "rdv.ics")
+# Emplacements des flux écrits par ExcelFrame, carlo_cli et l'application Streamlit
+RESULT_PATTERNS = (
+    RESULTS_FILE,
+    os.path.join("resultats_cli", RESULTS_FILE),
+    os.path.join("resultats_streamlit", "*", RESULTS_FILE),
+)
+# Octets comparés en début et fin de la partie déjà lue pour détecter un fichier réécrit
+_FINGERPRINT_BYTES = 4096
+
+
+def default_roots():
+    """Dossiers de départ des recherches : dossier courant et dossier de l'application."""
+    return list(dict.fromkeys([os.getcwd(), _BASE_DIR]))
+
+
+def latest_results_file(roots=None, patterns=RESULT_PATTERNS):
+    """Flux de résultats le plus récemment modifié parmi les emplacements connus (None si aucun)."""
+    roots = roots or default_roots()
+    latest, latest_mtime = None, None
+    for root in roots:
+        for pattern in patterns:
+            for path in glob.glob(os.path.join(root, pattern)):
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    continue
+                if latest_mtime is None or mtime > latest_mtime:
+                    latest, latest_mtime = os.path.abspath(path), mtime
+    return latest
+
+
+class ResultsTally:
+    """Compteurs d'un fichier JSONL de résultats, mis à jour à partir de la dernière position lue."""
+
+    def __init__(self, path):
+        self.path = path
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.rows = 0
+        self.in_stock = 0
+        self.long_lead_time = 0
+        self.references = set()
+        self._fingerprint = b""
+
+    def _read_fingerprint(self, f):
+        head = min(self.offset, _FINGERPRINT_BYTES)
+        f.seek(0)
+        data = f.read(head)
+        if self.offset > head:
+            f.seek(max(head, self.offset - _FINGERPRINT_BYTES))
+            data += f.read(self.offset - max(head, self.offset - _FINGERPRINT_BYTES))
+        return data
+
+    def update(self):
+        """Lit les lignes ajoutées ; repart de zéro si le fichier a raccourci ou été réécrit. True si modifié."""
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            changed = self.rows > 0
+            self._reset()
+            return changed
+        with open(self.path, "rb") as f:
+            # Nouveau run : fichier tronqué puis réécrit, éventuellement déjà plus long qu'avant
+            if size < self.offset or self._read_fingerprint(f) != self._fingerprint:
+                self._reset()
+            if size == self.offset:
+                return False
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+            end = chunk.rfind(b"\n") + 1
+            for line in chunk[:end].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue    # ligne corrompue : ignorée plutôt que de bloquer les compteurs
+                self._count(row)
+            self.offset += end
+            self._fingerprint = self._read_fingerprint(f)
+        return end > 0
+
+    def _count(self, row):
+        self.rows += 1
+        availability = row.get('Disponibilité')
+        if availability == IN_STOCK:
+            self.in_stock += 1
+        elif availability == LONG_LEAD_TIME:
+            self.long_lead_time += 1
+        self.references.add(row.get('Référence cherchée'))
+
+
+class DashboardStats:
+    """
+    Cartes du tableau de bord. `snapshot` contient les dernières valeurs calculées (lecture immédiate) ;
+    `refresh()` les recalcule dans un thread dédié et retourne un Future.
+    """
+
+    def __init__(self, ics_path=DEFAULT_ICS_PATH, roots=None):
+        self.roots = list(roots or default_roots())
+        self.ics_path = ics_path
+        self.snapshot = {}
+        self._tally = None
+        self._store = None
+        self._future = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dashboard-stats")
+
+    def set_ics_path(self, path):
+        """Calendrier utilisé pour les livraisons du jour (celui chargé dans le module Calendrier)."""
+        with self._lock:
+            self.ics_path = path
+
+    def add_root(self, folder):
+        """Dossier supplémentaire où chercher un flux de résultats (dossier de sortie du module Excel)."""
+        folder = os.path.abspath(folder)
+        with self._lock:
+            if folder not in self.roots:
+                self.roots = self.roots + [folder]
+
+    def refresh(self):
+        """Recalcul en arrière-plan ; un recalcul déjà en cours est réutilisé."""
+        with self._lock:
+            if self._future is None or self._future.done():
+                self._future = self._executor.submit(self._compute)
+            return self._future
+
+    def _compute(self):
+        with self._lock:
+            ics_path, roots = self.ics_path, self.roots
+        path = latest_results_file(roots)
+        if path is None:
+            self._tally = None
+        elif self._tally is None or self._tally.path != path:
+            self._tally = ResultsTally(path)
+        if self._tally is not None:
+            self._tally.update()
+
+        if ics_path and os.path.exists(ics_path):
+            if self._store is None or self._store.path != ics_path:
+                self._store = IcsStore(ics_path)
+            today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+            today_events = len(self._store.between(today, today + datetime.timedelta(days=1)))
+        else:
+            self._store = None
+            today_events = None
+
+        tally = self._tally
+        self.snapshot = {
+            "results_path": tally.path if tally else None,
+            "rows": tally.rows if tally else None,
+            "in_stock": tally.in_stock if tally else None,
+            "long_lead_time": tally.long_lead_time if tally else None,
+            "references": len(tally.references) if tally else None,
+            "today_events": today_events,
+            "computed_at": datetime.datetime.now(),
+        }
+        return self.snapshot
+
+    def cards(self, snapshot=None):
+        """[(libellé, valeur affichée)] ; '…' tant qu'aucun calcul n'a abouti, '—' sans source de données."""
+        snapshot = self.snapshot if snapshot is None else snapshot
+
+        def value(key):
+            if not snapshot:
+                return "…"
+            return "—" if snapshot.get(key) is None else str(snapshot[key])
+
+        return [
+            ("📦 Articles en stock", value("in_stock")),
+            ("📅 Livraisons du jour", value("today_events")),
+            ("⚠️ Délais > 30 jours", value("long_lead_time")),
+            ("🔎 Références suivies", value("references")),
+        ]
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
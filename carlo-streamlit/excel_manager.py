@@ -2,180 +2,35 @@
 """
 Module Excel + Scraper Carlo Erba intégré.
 - ExcelFrame: interface pour ouvrir un fichier Excel, afficher un aperçu et lancer le scraping.
-- CarloScraperThread: adapte ton code de scraping pour s'exécuter dans un thread (non bloquant).
+  L'aperçu est virtuel : seules les lignes visibles sont lues (workbook_preview.py, thread de fond).
+  Les messages du thread de scraping passent par une file (ui_events.py) vidée à intervalle fixe.
+- HistoryWindow: fenêtre de l'historique des prix (variations, ruptures, série de prix d'une référence).
+- Archive des pages (page_archive.py) : option d'archivage des pages brutes et re-parsing hors ligne.
+- CarloScraperThread (carlo_scraper.py): scraping dans un thread (non bloquant), réexporté ici.
 """
 
 import os
-import threading
 import time
-import pandas as pd
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+
+from carlo_scraper import CarloScraperThread
+from page_archive import PageArchive
+from price_history import PriceHistory
+from reference_ingest import build_plan
+from result_cache import ResultCache
+from result_export import export_rows
+from result_sink import results_stream_path
+from run_journal import journal_path
+from run_metrics import RunMetrics
+from suppliers import CarloErbaSupplier
+from ui_events import UiEventQueue
+from workbook_preview import WorkbookWindow, sheet_names
 
 import customtkinter as ctk
 from tkinter import filedialog, messagebox, ttk
 
-# ----------------------------
-# Worker de scraping (thread)
-# ----------------------------
-class CarloScraperThread(threading.Thread):
-    """
-    Thread pour exécuter le scraping sans bloquer l'interface.
-    Appelle les callbacks pour logger / mettre à jour la progression.
-    """
-
-    def __init__(self, email, password, references, output_folder,
-                 log_callback=None, progress_callback=None, finished_callback=None, rate_delay=0.4):
-        super().__init__(daemon=True)
-        self.email = email
-        self.password = password
-        self.references = references
-        self.output_folder = output_folder
-        self.log = log_callback or (lambda msg: None)
-        self.progress = progress_callback or (lambda current, total: None)
-        self.finished = finished_callback or (lambda success, path_or_msg: None)
-        self.rate_delay = rate_delay
-        self._stop_flag = False
-
-    def stop(self):
-        self._stop_flag = True
-
-    def run(self):
-        """Exécute le scraping en se basant sur le code fourni par l'utilisateur."""
-        try:
-            session = requests.Session()
-            # Setup retry pour tolérance réseau
-            retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[500,502,503,504])
-            session.mount("https://", HTTPAdapter(max_retries=retries))
-            session.headers.update({
-                "User-Agent": "Mozilla/5.0 (compatible; UnivScraper/1.0)"
-            })
-
-            # 1) Récupérer CSRF token
-            login_page_url = "https://www.carloerbareagents.com/cerstorefront/cer-fr/login"
-            self.log(f"➡️ Requête page login : {login_page_url}")
-            resp = session.get(login_page_url, timeout=15)
-            soup = BeautifulSoup(resp.text, "lxml")
-            token_input = soup.find("input", {"name": "CSRFToken"})
-            if not token_input:
-                self.log("❌ Impossible de trouver le CSRFToken sur la page de login.")
-                self.finished(False, "CSRFToken introuvable")
-                return
-            csrf_token = token_input.get("value", "")
-            self.log("🔑 CSRFToken récupéré.")
-
-            # 2) Formulaire de connexion
-            payload = {"j_username": self.email, "j_password": self.password, "CSRFToken": csrf_token}
-            headers = {
-                "User-Agent": "Mozilla/5.0",
-                "Referer": login_page_url,
-                "Origin": "https://www.carloerbareagents.com",
-                "Content-Type": "application/x-www-form-urlencoded",
-            }
-            login_url = "https://www.carloerbareagents.com/cerstorefront/cer-fr/j_spring_security_check"
-            login_resp = session.post(login_url, data=payload, headers=headers, allow_redirects=False, timeout=15)
-            if login_resp.status_code not in (302, 200):
-                self.log(f"❌ Échec de la connexion (HTTP {login_resp.status_code}).")
-                self.finished(False, f"Échec de connexion HTTP {login_resp.status_code}")
-                return
-            self.log("✅ Connexion réussie.")
-
-            # 3) Préparer la liste de références et exécuter les recherches
-            total = len(self.references)
-            self.log(f"ℹ️ {total} références à rechercher.")
-            results = []
-            for idx, ref in enumerate(self.references, start=1):
-                if self._stop_flag:
-                    self.log("⏹️ Scraping interrompu par l'utilisateur.")
-                    self.finished(False, "Interrompu")
-                    return
-
-                self.progress(idx, total)   # callback mise à jour progress bar
-                self.log(f"\n🔍 Recherche ({idx}/{total}) : {ref}")
-
-                search_url = f"https://www.carloerbareagents.com/cerstorefront/cer-fr/search/?text={ref}"
-                try:
-                    r = session.get(search_url, timeout=15)
-                except Exception as e:
-                    self.log(f"❗ Erreur réseau pour {ref} : {e}")
-                    time.sleep(self.rate_delay)
-                    continue
-
-                if r.status_code != 200:
-                    self.log(f"❗ HTTP {r.status_code} pour {ref}")
-                    time.sleep(self.rate_delay)
-                    continue
-
-                soup = BeautifulSoup(r.text, "html.parser")
-                products = soup.find_all('tr', class_='quickAddToCart')
-
-                if not products:
-                    self.log(f"⚠️ Aucun produit trouvé pour : {ref}")
-                    time.sleep(self.rate_delay)
-                    continue
-
-                for product in products:
-                    try:
-                        product_name = product.find('input', {'name': 'productNamePost'}).get('value', '')
-                        cond_elem = product.find('td', class_='item__info--variantDescription')
-                        conditionnement = cond_elem.text.strip() if cond_elem else ""
-                        tds = product.find_all('td')
-                        emballage = tds[2].text.strip() if len(tds) > 2 else ""
-                        unite_vente = tds[3].text.strip() if len(tds) > 3 else ""
-                        quantite_input = product.find('input', {'name': 'initialQuantityVariant'})
-                        quantite = quantite_input.get('value') if quantite_input else ""
-                        price_input = product.find('input', {'name': 'productPostPrice'})
-                        price = price_input.get('value') if price_input else ""
-
-                        availability_icon = product.find('i')
-                        availability_title = availability_icon.get('title') if availability_icon else None
-                        if availability_title == "Produit en stock":
-                            disponibilite = "En stock"
-                        elif availability_title == "Disponible sous 15 jours":
-                            disponibilite = "Disponible sous 15 jours"
-                        elif availability_title == "Disponible en plus de 30 jours":
-                            disponibilite = "Disponible en plus de 30 jours"
-                        else:
-                            disponibilite = "Non précisé"
-
-                        item = {
-                            'Référence cherchée': ref,
-                            'Produit': product_name,
-                            'Cdt': conditionnement,
-                            'Emballage': emballage,
-                            'Unité de vente': unite_vente,
-                            'Qté': quantite,
-                            'Prix €': price,
-                            'Disponibilité': disponibilite
-                        }
-                        results.append(item)
-
-                        # Log plus détaillé
-                        self.log(f"  📦 {product_name} — {price}€ — {disponibilite}")
-                    except Exception as e:
-                        self.log(f"⚠️ Erreur d'extraction pour {ref} : {e}")
-                        continue
-
-                time.sleep(self.rate_delay)
-
-            # 4) Exporter résultats si présents
-            if results:
-                os.makedirs(self.output_folder, exist_ok=True)
-                output_file = os.path.join(self.output_folder, "resultats_scraping.xlsx")
-                df = pd.DataFrame(results)
-                df.to_excel(output_file, index=False)
-                self.log(f"\n✅ Données enregistrées dans : {output_file}")
-                self.finished(True, output_file)
-            else:
-                self.log("\n⚠️ Aucun produit trouvé pour les références fournies.")
-                self.finished(False, "Aucun résultat")
-
-        except Exception as e:
-            self.log(f"❌ Exception durant le scraping : {e}")
-            self.finished(False, str(e))
-
+UI_REFRESH_MS = 100      # intervalle de vidage de la file d'événements
+LOG_MAX_LINES = 2000     # lignes conservées dans la zone de logs (le reste est dans scraping.log)
 
 # ----------------------------
 # ExcelFrame : UI pour Excel + Scraper
@@ -196,10 +51,18 @@ class ExcelFrame(ctk.CTkFrame):
         self.pack(fill="both", expand=True, padx=10, pady=10)
 
         # Variables & state
-        self.df = None
         self.excel_path = None
         self.scraper_thread = None
 
+        # Aperçu virtuel : feuille ouverte, première ligne affichée, lignes visibles
+        self.preview = None
+        self._preview_start = 0
+        self._preview_visible = 30
+        self._preview_loading = False
+        self._preview_items = []
+        # Un seul thread de lecture : openpyxl n'est pas thread-safe et les demandes sont fusionnées
+        self._preview_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="excel-preview")
+
         # --- Titre ---
         title = ctk.CTkLabel(self, text="📊 Module Excel et Scraper Carlo Erba", font=ctk.CTkFont(size=18, weight="bold"))
         title.pack(pady=(6, 10))
@@ -215,6 +78,12 @@ class ExcelFrame(ctk.CTkFrame):
         self.lbl_path.grid(row=0, column=1, padx=6, sticky="we")
         top_frame.grid_columnconfigure(1, weight=1)
 
+        # Choix de la feuille + nombre de lignes (estimé tant que la fin n'a pas été lue)
+        self.sheet_menu = ctk.CTkOptionMenu(top_frame, values=["—"], command=self._select_sheet, state="disabled")
+        self.sheet_menu.grid(row=0, column=2, padx=6, pady=6)
+        self.lbl_rows = ctk.CTkLabel(top_frame, text="", anchor="e")
+        self.lbl_rows.grid(row=0, column=3, padx=6)
+
         # --- Identifiants utilisateur pour Carlo Erba (email / password) ---
         creds_frame = ctk.CTkFrame(self)
         creds_frame.pack(fill="x", padx=6, pady=(6, 12))
@@ -243,7 +112,7 @@ class ExcelFrame(ctk.CTkFrame):
         self.manual_entry = ctk.CTkEntry(self, placeholder_text="Références manuelles, séparées par des virgules")
         self.manual_entry.pack(fill="x", padx=6, pady=(0, 12))
 
-        # --- Boutons d'action : Lancer / Arrêter, Exporter aperçu ---
+        # --- Boutons d'action : Lancer / Arrêter / Reprendre, Exporter aperçu ---
         actions_frame = ctk.CTkFrame(self)
         actions_frame.pack(fill="x", padx=6, pady=(0, 12))
 
@@ -254,20 +123,47 @@ class ExcelFrame(ctk.CTkFrame):
         self.btn_stop.grid(row=0, column=1, padx=6, pady=6)
         self.btn_stop.configure(state="disabled")
 
+        self.btn_resume = ctk.CTkButton(actions_frame, text="⏯ Reprendre", command=self.resume_scraping)
+        self.btn_resume.grid(row=0, column=2, padx=6, pady=6)
+
         self.btn_export_preview = ctk.CTkButton(actions_frame, text="💾 Exporter aperçu", command=self.export_preview)
-        self.btn_export_preview.grid(row=0, column=2, padx=6, pady=6)
+        self.btn_export_preview.grid(row=0, column=3, padx=6, pady=6)
+
+        # Ignorer le cache des résultats (les entrées sont réécrites avec les nouvelles valeurs)
+        self.force_refresh_var = ctk.BooleanVar(value=False)
+        self.chk_force_refresh = ctk.CTkCheckBox(actions_frame, text="🔄 Forcer le rafraîchissement",
+                                                 variable=self.force_refresh_var)
+        self.chk_force_refresh.grid(row=0, column=4, padx=6, pady=6)
+
+        self.btn_history = ctk.CTkButton(actions_frame, text="📈 Historique", command=self.open_history)
+        self.btn_history.grid(row=0, column=5, padx=6, pady=6)
+        self.history = PriceHistory()
+        # Cache des résultats partagé par tous les runs de la fenêtre (une seule connexion SQLite)
+        self.cache = ResultCache()
+
+        # Archive des pages brutes : re-parsing sans réseau après une correction du parser
+        self.archive_var = ctk.BooleanVar(value=False)
+        self.chk_archive = ctk.CTkCheckBox(actions_frame, text="🗄️ Archiver les pages", variable=self.archive_var)
+        self.chk_archive.grid(row=1, column=0, padx=6, pady=6, sticky="w")
+        self.btn_reparse = ctk.CTkButton(actions_frame, text="♻️ Re-parser l'archive", command=self.reparse_archive)
+        self.btn_reparse.grid(row=1, column=1, padx=6, pady=6)
+        self.archive = PageArchive()
 
         # --- Aperçu du fichier Excel (Treeview) ---
         preview_frame = ctk.CTkFrame(self)
         preview_frame.pack(fill="both", expand=True, padx=6, pady=6)
 
-        # On utilise ttk.Treeview (widget tkinter natif) pour le tableau
+        # On utilise ttk.Treeview (widget tkinter natif) pour le tableau.
+        # Le Treeview ne contient que les lignes visibles : la scrollbar représente toute la feuille
+        # et chaque déplacement demande la fenêtre correspondante au thread de lecture.
         self.tree = ttk.Treeview(preview_frame, show="headings")
         self.tree.pack(fill="both", expand=True, side="left")
-        # Ajouter scrollbar
-        vsb = ttk.Scrollbar(preview_frame, orient="vertical", command=self.tree.yview)
-        vsb.pack(side="right", fill="y")
-        self.tree.configure(yscrollcommand=vsb.set)
+        self.preview_scrollbar = ttk.Scrollbar(preview_frame, orient="vertical", command=self._on_preview_scroll)
+        self.preview_scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<Configure>", self._on_preview_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self._scroll_preview_by(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self._scroll_preview_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_preview_by(3))
 
         # --- Zone logs et progression en bas ---
         bottom_frame = ctk.CTkFrame(self)
@@ -277,56 +173,192 @@ class ExcelFrame(ctk.CTkFrame):
         self.progress.pack(fill="x", padx=6, pady=(6, 4))
         self.progress.set(0)
 
+        # Débit / concurrence courants du contrôleur adaptatif
+        self.lbl_rate = ctk.CTkLabel(bottom_frame, text="", anchor="w")
+        self.lbl_rate.pack(fill="x", padx=6)
+
         self.log_box = ctk.CTkTextbox(bottom_frame, height=140)
         self.log_box.pack(fill="x", padx=6, pady=(4, 6))
 
+        # File d'événements du thread de scraping, vidée par la boucle Tk
+        self.events = UiEventQueue(max_pending=LOG_MAX_LINES)
+        self.after(UI_REFRESH_MS, self._drain_events)
+
     # ----------------------------
     # Fonctions UI / I/O
     # ----------------------------
     def open_excel_file(self):
-        """Ouvre un fichier Excel et affiche un aperçu dans le Treeview."""
+        """Ouvre un fichier Excel et affiche un aperçu dans le Treeview (lecture en arrière-plan)."""
         path = filedialog.askopenfilename(title="Choisir fichier Excel", filetypes=[("Excel", "*.xlsx *.xls")])
         if not path:
             return
-        try:
-            df = pd.read_excel(path)
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Impossible de lire le fichier Excel : {e}")
-            return
+        self.lbl_path.configure(text=f"⏳ Ouverture de {os.path.basename(path)}...")
+        self._open_sheet(path, None)
+
+    def _select_sheet(self, sheet):
+        if self.excel_path and self.preview is not None and sheet != self.preview.sheet:
+            self._open_sheet(self.excel_path, sheet)
 
-        self.df = df
+    def _open_sheet(self, path, sheet):
+        """Ouvre la feuille dans le thread de lecture puis met l'aperçu à jour (thread UI)."""
+        def open_in_background():
+            try:
+                names = sheet_names(path)
+                window = WorkbookWindow(path, sheet)
+            except Exception as e:
+                self.after(0, lambda error=e: self._preview_failed(error))
+                return
+            self.after(0, lambda: self._show_sheet(path, names, window))
+
+        self._preview_executor.submit(open_in_background)
+
+    def _preview_failed(self, error):
+        self.lbl_path.configure(text=os.path.basename(self.excel_path) if self.excel_path else "Aucun fichier sélectionné")
+        messagebox.showerror("Erreur", f"Impossible de lire le fichier Excel : {error}")
+
+    def _show_sheet(self, path, names, window):
+        if self.preview is not None:
+            old = self.preview
+            self._preview_executor.submit(old.close)
+        self.preview = window
         self.excel_path = path
         self.lbl_path.configure(text=os.path.basename(path))
-        self.display_preview(df)
+        self.sheet_menu.configure(values=names, state="normal" if len(names) > 1 else "disabled")
+        self.sheet_menu.set(window.sheet if isinstance(window.sheet, str) else names[window.sheet])
 
-    def display_preview(self, df, max_rows=200):
-        """Affiche un aperçu du DataFrame dans le Treeview (limité)."""
         # vider l'ancienne table
-        for col in self.tree.get_children():
-            self.tree.delete(col)
-        self.tree["columns"] = list(df.columns)
-
-        # configure headings & column widths
-        for col in df.columns:
+        self.tree.delete(*self.tree.get_children())
+        self._preview_items = []
+        self.tree["columns"] = window.columns
+        for col in window.columns:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=120)
+        self._preview_start = 0
+        self._update_row_count()
+        self._request_preview(0)
+
+    def _update_row_count(self):
+        count = self.preview.estimated_rows() if self.preview is not None else None
+        if count is None:
+            self.lbl_rows.configure(text="")
+        else:
+            prefix = "" if self.preview.exact else "≈ "
+            self.lbl_rows.configure(text=f"{prefix}{count:,} lignes".replace(",", " "))
 
-        rows = df.head(max_rows).itertuples(index=False, name=None)
-        for r in rows:
-            self.tree.insert("", "end", values=r)
+    # ----------------------------
+    # Aperçu virtuel (fenêtre de lignes autour de la position de défilement)
+    # ----------------------------
+    def _on_preview_resize(self, event):
+        visible = max(10, event.height // 20 + 1)
+        if visible != self._preview_visible:
+            self._preview_visible = visible
+            self._request_preview(self._preview_start)
+
+    def _on_preview_scroll(self, action, *args):
+        """Commande de la scrollbar : 'moveto' fraction ou 'scroll' n units|pages."""
+        total = self._preview_total()
+        if action == "moveto":
+            self._request_preview(int(float(args[0]) * total))
+        elif action == "scroll":
+            step = self._preview_visible if args[1] == "pages" else 1
+            self._scroll_preview_by(int(args[0]) * step)
+
+    def _scroll_preview_by(self, rows):
+        self._request_preview(self._preview_start + rows)
+        return "break"
+
+    def _preview_total(self):
+        if self.preview is None:
+            return 0
+        count = self.preview.estimated_rows()
+        return count if count is not None else self._preview_start + 10 * self._preview_visible
+
+    def _request_preview(self, start):
+        """Mémorise la position demandée ; au plus une lecture en cours, la dernière demande l'emporte."""
+        if self.preview is None:
+            return
+        self._preview_start = max(0, min(start, self._preview_total() - self._preview_visible))
+        self._update_scrollbar()
+        if self._preview_loading:
+            return
+        self._preview_loading = True
+        window, start, count = self.preview, self._preview_start, self._preview_visible
+
+        def read_in_background():
+            try:
+                rows = window.read(start, count)
+            except Exception as e:
+                rows = []
+                self._thread_log(f"❗ Lecture de l'aperçu impossible : {e}")
+            self.after(0, lambda: self._show_preview_rows(window, start, count, rows))
+
+        self._preview_executor.submit(read_in_background)
+
+    def _show_preview_rows(self, window, start, count, rows):
+        """Remplace les valeurs des lignes du Treeview (items réutilisés) par la fenêtre lue."""
+        self._preview_loading = False
+        if window is not self.preview:
+            return
+        for i, row in enumerate(rows):
+            values = ["" if v is None or v != v else v for v in row]
+            if i < len(self._preview_items):
+                self.tree.item(self._preview_items[i], values=values)
+            else:
+                self._preview_items.append(self.tree.insert("", "end", values=values))
+        if len(self._preview_items) > len(rows):
+            self.tree.delete(*self._preview_items[len(rows):])
+            del self._preview_items[len(rows):]
+        self._update_row_count()
+        self._update_scrollbar()
+        # Position changée pendant la lecture : lire la nouvelle fenêtre
+        if (start, count) != (self._preview_start, self._preview_visible):
+            self._request_preview(self._preview_start)
+
+    def _update_scrollbar(self):
+        total = self._preview_total()
+        if total <= 0:
+            self.preview_scrollbar.set(0, 1)
+            return
+        first = self._preview_start / total
+        self.preview_scrollbar.set(first, min(1.0, (self._preview_start + self._preview_visible) / total))
 
     def export_preview(self):
-        """Export simple du DataFrame chargé (si présent)."""
-        if self.df is None:
+        """
+        Export de la feuille ouverte, recopiée en flux (la feuille n'est jamais chargée entière)
+        dans le thread de lecture de l'aperçu. Format selon l'extension choisie ; les valeurs sont
+        recopiées telles quelles (classeur quelconque : pas de typage des colonnes de résultats).
+        """
+        if self.preview is None:
             messagebox.showinfo("Aucun fichier", "Aucun fichier Excel chargé.")
             return
-        save_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx")])
-        if save_path:
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv"), ("Parquet", "*.parquet")],
+        )
+        if not save_path:
+            return
+        window = self.preview
+        self.btn_export_preview.configure(state="disabled")
+
+        def export_in_background():
             try:
-                self.df.to_excel(save_path, index=False)
-                messagebox.showinfo("Exporté", f"Fichier exporté : {save_path}")
+                count = export_rows(window.iter_rows(), save_path, columns=window.columns, schema=None)
             except Exception as e:
-                messagebox.showerror("Erreur", str(e))
+                self.events.put_action(lambda error=e: self._export_done(None, error))
+                return
+            self.events.put_action(lambda: self._export_done(save_path, None, count))
+
+        self._preview_executor.submit(export_in_background)
+
+    def _export_done(self, save_path, error, count=0):
+        self.btn_export_preview.configure(state="normal")
+        if error is not None:
+            messagebox.showerror("Erreur", str(error))
+        else:
+            messagebox.showinfo("Exporté", f"Fichier exporté ({count} lignes) : {save_path}")
+
+    def open_history(self):
+        HistoryWindow(self, self.history)
 
     # ----------------------------
     # Scraping orchestration
@@ -346,48 +378,101 @@ class ExcelFrame(ctk.CTkFrame):
             messagebox.showwarning("Identifiants", "Renseigne ton email et mot de passe pour Carlo Erba.")
             return
 
-        # Construire la liste de références
-        refs = []
-        if option in ("excel", "both"):
-            # On s'attend à une colonne 'Référence' dans l'excel ; sinon on prend toute la première colonne
-            try:
-                df = pd.read_excel(self.excel_path)
-                if 'Référence' in df.columns:
-                    refs.extend(df['Référence'].dropna().astype(str).tolist())
-                else:
-                    # fallback : première colonne
-                    first_col = df.columns[0]
-                    refs.extend(df[first_col].dropna().astype(str).tolist())
-            except Exception as e:
-                messagebox.showerror("Erreur lecture Excel", str(e))
-                return
+        metrics = RunMetrics()
+        plan = self._build_plan(metrics)
+        if plan is None:
+            return
+        if not plan:
+            messagebox.showinfo("Aucune référence", "Aucune référence à rechercher.")
+            return
 
-        if option in ("manual", "both") and manual_text:
-            refs.extend([r.strip() for r in manual_text.split(",") if r.strip()])
+        self._launch_scraper(email, password, plan.references, f"ℹ️ {plan.summary()}", metrics=metrics)
 
-        if not refs:
-            messagebox.showinfo("Aucune référence", "Aucune référence à rechercher.")
+    def _build_plan(self, metrics):
+        """
+        Plan de références (normalisées, dédoublonnées) en une seule lecture : colonne 'Référence'
+        (sinon première colonne) de la feuille sélectionnée, lue en flux, et/ou saisie manuelle.
+        Retourne None (après un message) si le classeur est illisible.
+        """
+        option = self.search_var.get()
+        use_excel = option in ("excel", "both") and self.excel_path
+        use_manual = option in ("manual", "both")
+        try:
+            with metrics.stage("plan"):
+                return build_plan(
+                    excel_source=self.excel_path if use_excel else None,
+                    manual_text=self.manual_entry.get().strip() if use_manual else "",
+                    sheet=self.preview.sheet if use_excel and self.preview is not None else None,
+                )
+        except Exception as e:
+            messagebox.showerror("Erreur lecture Excel", str(e))
+            return None
+
+    def reparse_archive(self):
+        """Reconstruit les résultats depuis les pages archivées (références du plan, sinon toutes)."""
+        metrics = RunMetrics()
+        plan = self._build_plan(metrics)
+        if plan is None:
+            return
+        references = plan.references if plan else self.archive.references(CarloErbaSupplier.key)
+        if not references:
+            messagebox.showinfo("Archive vide", "Aucune page archivée : coche « Archiver les pages » lors d'un scraping.")
             return
+        intro = f"🗄️ Re-parsing de {len(references)} référence(s) depuis l'archive..."
+        self._launch_scraper(None, None, references, intro, metrics=metrics, from_archive=True)
 
-        # Désactiver bouton run & activer stop
+    def resume_scraping(self):
+        """Reprend le dernier scraping interrompu (références restantes du journal)."""
+        email = self.email_entry.get().strip()
+        password = self.password_entry.get().strip()
+        if not email or not password:
+            messagebox.showwarning("Identifiants", "Renseigne ton email et mot de passe pour Carlo Erba.")
+            return
+        stream_file = results_stream_path(self._output_folder())
+        if not os.path.exists(journal_path(stream_file)):
+            messagebox.showinfo("Rien à reprendre", "Aucun scraping interrompu dans le dossier de sortie.")
+            return
+        self._launch_scraper(email, password, [], "⏯️ Reprise du scraping interrompu...", resume=True)
+
+    def _output_folder(self):
+        """Dossier de sortie situé à côté du fichier Excel s'il existe, sinon dossier courant."""
+        return os.path.dirname(self.excel_path) if self.excel_path else os.getcwd()
+
+    def _launch_scraper(self, email, password, references, intro, resume=False, metrics=None, from_archive=False):
+        """Instancie et démarre le thread de scraping (nouveau run ou reprise)."""
+        # Désactiver boutons run/reprise & activer stop
         self.btn_run.configure(state="disabled")
+        self.btn_resume.configure(state="disabled")
+        self.btn_reparse.configure(state="disabled")
         self.btn_stop.configure(state="normal")
         self.log_box.delete("0.0", "end")
         self.progress.set(0)
 
-        # Dossier de sortie situé à côté du fichier Excel s'il existe, sinon dossier courant
-        output_folder = os.path.dirname(self.excel_path) if self.excel_path else os.getcwd()
+        output_folder = self._output_folder()
+        os.makedirs(output_folder, exist_ok=True)
+        self.events.open_spill(os.path.join(output_folder, "scraping.log"))
+        self._log(intro)
 
         # Instancier et démarrer le thread
         self.scraper_thread = CarloScraperThread(
             email=email,
             password=password,
-            references=refs,
+            references=references,
             output_folder=output_folder,
             log_callback=self._thread_log,
             progress_callback=self._thread_progress,
             finished_callback=self._thread_finished,
-            rate_delay=0.4
+            stats_callback=self._thread_stats,
+            cache=self.cache,
+            history=self.history,
+            force_refresh=self.force_refresh_var.get(),
+            rate_delay=0.4,
+            workers=8,
+            adaptive=True,
+            resume=resume,
+            metrics=metrics,
+            archive=self.archive if from_archive or self.archive_var.get() else None,
+            from_archive=from_archive,
         )
         self.scraper_thread.start()
 
@@ -400,20 +485,50 @@ class ExcelFrame(ctk.CTkFrame):
     # ----------------------------
     # Callbacks du thread -> mises à jour UI
     # ----------------------------
+    # Les callbacks ne touchent jamais aux widgets : ils alimentent la file, vidée par _drain_events.
     def _thread_log(self, msg):
         """Callback utilisé par le thread pour envoyer un message de log."""
-        # on utilise after pour garantir exécution dans thread principal (safe UI)
-        self.after(0, lambda: self._log(msg))
+        self.events.put_log(msg)
 
     def _log(self, msg):
         """Affiche un message dans la zone de log (UI thread)."""
-        self.log_box.insert("end", msg + "\n")
-        # scroll automatique
-        self.log_box.see("end")
+        self.events.put_log(msg)
 
     def _thread_progress(self, current, total):
-        """Callback de progression du thread -> met à jour la progressbar."""
-        self.after(0, lambda: self._set_progress(current/total if total else 0))
+        """Callback de progression du thread -> seule la dernière valeur est affichée."""
+        self.events.set_latest("progress", current/total if total else 0)
+
+    def _thread_stats(self, stats):
+        """Callback du thread -> affiche débit et concurrence du contrôleur adaptatif."""
+        text = (f"⚡ {stats['rate']:.2f} req/s — {stats['concurrency']} requêtes simultanées"
+                f" — 429 : {stats['http_429']} · 5xx : {stats['http_5xx']} · timeouts : {stats['timeouts']}")
+        self.events.set_latest("stats", text)
+
+    def _drain_events(self):
+        """Vide la file d'événements : logs insérés en un bloc, dernière progression, actions (UI thread)."""
+        try:
+            logs, dropped, latest, actions = self.events.drain()
+            if logs:
+                self._append_logs(logs, dropped)
+            if "progress" in latest:
+                self._set_progress(latest["progress"])
+            if "stats" in latest:
+                self.lbl_rate.configure(text=latest["stats"])
+            for action in actions:
+                action()
+        finally:
+            self.after(UI_REFRESH_MS, self._drain_events)
+
+    def _append_logs(self, lines, dropped=0):
+        """Ajoute un lot de lignes et ne garde que les LOG_MAX_LINES dernières dans la zone de logs."""
+        if dropped:
+            lines = [f"… {dropped} ligne(s) omise(s) ici (voir scraping.log)"] + lines
+        self.log_box.insert("end", "\n".join(lines) + "\n")
+        line_count = int(self.log_box.index("end-1c").split(".")[0]) - 1
+        if line_count > LOG_MAX_LINES:
+            self.log_box.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
+        # scroll automatique
+        self.log_box.see("end")
 
     def _set_progress(self, fraction):
         try:
@@ -429,6 +544,84 @@ class ExcelFrame(ctk.CTkFrame):
             else:
                 messagebox.showwarning("Terminé", f"Fin: {path_or_msg}")
             self.btn_run.configure(state="normal")
+            self.btn_resume.configure(state="normal")
+            self.btn_reparse.configure(state="normal")
             self.btn_stop.configure(state="disabled")
             self.progress.set(0)
-        self.after(0, finish_ui)
+            self.lbl_rate.configure(text="")
+            self.events.close_spill()
+        self.events.put_action(finish_ui)
+
+
+# ----------------------------
+# HistoryWindow : historique des prix (requêtes SQL sur price_history)
+# ----------------------------
+class HistoryWindow(ctk.CTkToplevel):
+    """Fenêtre de consultation de l'historique : comparaison des deux derniers runs terminés ou série de prix."""
+
+    VIEWS = ("Variations de prix", "Passés hors stock", "Série de prix")
+
+    def __init__(self, parent, history):
+        super().__init__(parent)
+        self.title("📈 Historique des prix")
+        self.geometry("900x500")
+        self.history = history
+
+        controls = ctk.CTkFrame(self)
+        controls.pack(fill="x", padx=6, pady=6)
+        self.view = ctk.CTkSegmentedButton(controls, values=list(self.VIEWS), command=lambda _: self.refresh())
+        self.view.set(self.VIEWS[0])
+        self.view.grid(row=0, column=0, padx=6, pady=6)
+        self.ref_entry = ctk.CTkEntry(controls, placeholder_text="Référence (série de prix)")
+        self.ref_entry.grid(row=0, column=1, padx=6, pady=6, sticky="we")
+        self.ref_entry.bind("<Return>", lambda e: self.refresh())
+        controls.grid_columnconfigure(1, weight=1)
+        self.lbl_info = ctk.CTkLabel(self, text="", anchor="w")
+        self.lbl_info.pack(fill="x", padx=12)
+
+        table = ctk.CTkFrame(self)
+        table.pack(fill="both", expand=True, padx=6, pady=6)
+        self.tree = ttk.Treeview(table, show="headings")
+        self.tree.pack(fill="both", expand=True, side="left")
+        vsb = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
+        vsb.pack(side="right", fill="y")
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.refresh()
+
+    def refresh(self):
+        view = self.view.get()
+        if view == "Série de prix":
+            ref = self.ref_entry.get().strip()
+            if not ref:
+                self._show(["Date", "Run", "Produit", "Cdt", "Prix €", "Disponibilité"], [],
+                           "Saisir une référence puis Entrée.")
+                return
+            rows = [(time.strftime("%d/%m/%Y %H:%M", time.localtime(at)), run, product, cdt, price, avail)
+                    for at, run, product, cdt, price, avail in self.history.price_series(ref=ref)]
+            self._show(["Date", "Run", "Produit", "Cdt", "Prix €", "Disponibilité"], rows,
+                       f"{len(rows)} relevé(s) pour {ref}")
+            return
+
+        pair = self.history.last_two_runs()
+        if pair is None:
+            self._show([], [], "Il faut au moins deux runs terminés pour comparer.")
+            return
+        info = f"Run {pair[1]} comparé au run {pair[0]}"
+        if view == "Variations de prix":
+            rows = self.history.price_changes()
+            self._show(["Référence", "Produit", "Cdt", "Ancien prix", "Nouveau prix", "Écart"], rows,
+                       f"{info} : {len(rows)} variation(s)")
+        else:
+            rows = self.history.went_out_of_stock()
+            self._show(["Référence", "Produit", "Cdt", "Disponibilité"], rows,
+                       f"{info} : {len(rows)} produit(s) passé(s) hors stock")
+
+    def _show(self, columns, rows, info):
+        self.lbl_info.configure(text=info)
+        self.tree.delete(*self.tree.get_children())
+        self.tree["columns"] = columns
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=120)
+        for row in rows:
+            self.tree.insert("", "end", values=["" if v is None else v for v in row])
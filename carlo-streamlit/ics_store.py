@@ -0,0 +1,382 @@
+# ics_store.py
+"""
+Stockage indexé d'un fichier .ics pour le module Calendrier.
+- IcsStore: index des événements (triés par date de début) gardé en mémoire et validé par la date de
+  modification et la taille du fichier : le .ics n'est relu que s'il a changé sur disque.
+- between / event_days: événements d'une fenêtre (mois, semaine) par recherche dichotomique dans le
+  tableau trié des débuts ; les récurrences (RRULE) ne sont développées que dans la fenêtre demandée.
+- append_event: ajoute un seul bloc VEVENT en fin de fichier (juste avant END:VCALENDAR),
+  sans relire ni re-sérialiser le calendrier ; l'index en mémoire est mis à jour sur place.
+Lecture ligne à ligne (lignes repliées RFC 5545) des seules propriétés utiles :
+DTSTART, DTEND, SUMMARY, UID, RRULE, EXDATE. Les débuts / fins sont exposés en heure locale
+(datetime naïf) ; les récurrences sont développées dans le fuseau de l'événement (TZID ou UTC) et
+seules les occurrences obtenues sont converties en heure locale (pas de décalage au changement d'heure).
+"""
+
+import datetime
+import os
+import re
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+
+CRLF = "\r\n"
+CALENDAR_HEADER = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//carlo-streamlit//Calendrier//FR\r\n"
+CALENDAR_FOOTER = "END:VCALENDAR\r\n"
+# Taille de fin de fichier relue pour retrouver END:VCALENDAR avant un ajout
+_TAIL_BYTES = 4096
+_UTC_UNTIL = re.compile(r"UNTIL=(\d{8}T\d{6})Z", re.IGNORECASE)
+_LOCAL_UNTIL = re.compile(r"UNTIL=(\d{8}T\d{6})(?![\dZz])", re.IGNORECASE)
+
+
+class IcsEvent:
+    """
+    Un VEVENT : début / fin en heure locale, titre, UID, règle de récurrence brute (RRULE) ou None
+    et dates exclues de la récurrence (EXDATE).
+    `dtstart` : DTSTART d'origine avec son fuseau (TZID ou UTC), None pour l'heure flottante ;
+    les EXDATE sont alors exprimées dans ce même fuseau.
+    """
+    __slots__ = ("begin", "end", "name", "uid", "rrule", "all_day", "exdates", "dtstart")
+
+    def __init__(self, begin, end=None, name="", uid=None, rrule=None, all_day=False, exdates=(), dtstart=None):
+        self.begin = begin
+        self.end = end
+        self.name = name
+        self.uid = uid
+        self.rrule = rrule
+        self.all_day = all_day
+        self.exdates = exdates
+        self.dtstart = dtstart
+
+    @property
+    def duration(self):
+        """Durée d'une occurrence ; une journée pour un événement « journée entière » sans fin."""
+        if self.end is not None and self.end > self.begin:
+            return self.end - self.begin
+        return datetime.timedelta(days=1) if self.all_day else datetime.timedelta(0)
+
+    def __repr__(self):
+        return f"IcsEvent({self.begin:%d/%m/%Y %H:%M}, {self.name!r})"
+
+
+# ----------------------------
+# Lecture
+# ----------------------------
+def _unfold(lines):
+    """Lignes logiques : une ligne commençant par un espace ou une tabulation prolonge la précédente."""
+    current = None
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _split_property(line):
+    """'DTSTART;TZID=Europe/Paris:20250101T090000' -> ('DTSTART', {'TZID': 'Europe/Paris'}, '20250101T090000')."""
+    head, _, value = line.partition(":")
+    name, *params = head.split(";")
+    options = {}
+    for param in params:
+        key, _, param_value = param.partition("=")
+        options[key.upper()] = param_value.strip('"')
+    return name.upper(), options, value
+
+
+def _unescape(text):
+    return (text.replace("\\n", "\n").replace("\\N", "\n")
+            .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\"))
+
+
+def _escape(text):
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _parse_ics_value(value, params):
+    """
+    Valeur DTSTART / DTEND / EXDATE -> (datetime dans son fuseau d'origine, journée entière ?).
+    Datetime avec fuseau pour l'UTC (suffixe Z) et TZID, naïf pour les dates seules et l'heure flottante.
+    """
+    value = value.strip()
+    try:
+        if params.get("VALUE") == "DATE" or len(value) == 8:
+            return datetime.datetime.strptime(value[:8], "%Y%m%d"), True
+        dt = datetime.datetime.strptime(value.rstrip("Z")[:15], "%Y%m%dT%H%M%S")
+    except ValueError:
+        return None, False
+    if value.endswith("Z"):
+        return dt.replace(tzinfo=datetime.timezone.utc), False
+    tzid = params.get("TZID")
+    if tzid:
+        try:
+            from zoneinfo import ZoneInfo
+            return dt.replace(tzinfo=ZoneInfo(tzid)), False
+        except Exception:
+            # Fuseau inconnu (noms Windows…) : heure flottante
+            pass
+    return dt, False
+
+
+def _to_local(dt):
+    """Datetime avec fuseau -> heure locale naïve ; un datetime naïf (flottant) est laissé tel quel."""
+    return dt.astimezone().replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+
+def parse_ics_datetime(value, params=None):
+    """
+    Valeur DTSTART / DTEND -> (datetime local naïf, journée entière ?).
+    Gère les dates seules (VALUE=DATE), l'UTC (suffixe Z), TZID et l'heure flottante ; None si illisible.
+    """
+    dt, all_day = _parse_ics_value(value, params or {})
+    return (_to_local(dt) if dt is not None else None), all_day
+
+
+def parse_ics_events(lines):
+    """Itère les VEVENT d'un flux de lignes .ics (les composants imbriqués, VALARM…, sont ignorés)."""
+    props = None
+    depth = 0
+    for line in _unfold(lines):
+        upper = line.upper()
+        if upper == "BEGIN:VEVENT":
+            props, depth = {}, 0
+            continue
+        if props is None:
+            continue
+        if upper.startswith("BEGIN:"):
+            depth += 1
+        elif upper == "END:VEVENT":
+            event = _build_event(props)
+            if event is not None:
+                yield event
+            props = None
+        elif upper.startswith("END:"):
+            depth -= 1
+        elif depth == 0:
+            name, params, value = _split_property(line)
+            if name == "EXDATE":
+                # Propriété répétable, valeurs séparées par des virgules
+                props.setdefault(name, []).extend((params, v) for v in value.split(","))
+            else:
+                props.setdefault(name, (params, value))
+
+
+def _build_event(props):
+    if "DTSTART" not in props:
+        return None
+    dtstart, all_day = _parse_ics_value(props["DTSTART"][1], props["DTSTART"][0])
+    if dtstart is None:
+        return None
+    zone = dtstart.tzinfo
+    end = None
+    if "DTEND" in props:
+        end, _ = parse_ics_datetime(props["DTEND"][1], props["DTEND"][0])
+    name = _unescape(props.get("SUMMARY", ({}, ""))[1])
+    uid = props.get("UID", ({}, None))[1]
+    rrule = props.get("RRULE", ({}, None))[1]
+    exdates = []
+    for params, value in props.get("EXDATE", ()):
+        dt, _ = _parse_ics_value(value, params)
+        if dt is None:
+            continue
+        if zone is None:
+            exdates.append(_to_local(dt))
+        else:
+            # EXDATE sans fuseau : heure du fuseau de l'événement
+            exdates.append(dt.astimezone(zone) if dt.tzinfo is not None else dt.replace(tzinfo=zone))
+    return IcsEvent(_to_local(dtstart), end, name, uid, rrule, all_day, tuple(exdates),
+                    dtstart if zone is not None else None)
+
+
+def serialize_event(event):
+    """Bloc VEVENT (CRLF) ; heure flottante : l'événement reste à l'heure saisie quel que soit le fuseau."""
+    fmt = "%Y%m%d" if event.all_day else "%Y%m%dT%H%M%S"
+    value = ";VALUE=DATE:" if event.all_day else ":"
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    lines = ["BEGIN:VEVENT", f"UID:{event.uid}", f"DTSTAMP:{stamp}",
+             f"DTSTART{value}{event.begin.strftime(fmt)}"]
+    if event.end is not None:
+        lines.append(f"DTEND{value}{event.end.strftime(fmt)}")
+    if event.rrule:
+        lines.append(f"RRULE:{event.rrule}")
+    lines.append(f"SUMMARY:{_escape(event.name)}")
+    lines.append("END:VEVENT")
+    return CRLF.join(lines) + CRLF
+
+
+def expand_occurrences(event, start, end):
+    """
+    Débuts des occurrences d'un événement récurrent qui chevauchent [start, end[.
+    La règle n'est développée qu'entre `start - durée` et `end` : coût proportionnel à la fenêtre.
+    `start` / `end` et les débuts retournés sont en heure locale naïve ; pour un événement avec fuseau
+    (TZID ou UTC), le développement se fait dans ce fuseau : 08:00 Europe/Paris reste 08:00 à Paris
+    de part et d'autre d'un changement d'heure, quel que soit le fuseau local.
+    """
+    from dateutil.rrule import rrulestr
+
+    zone = event.dtstart.tzinfo if event.dtstart is not None else None
+    if zone is None:
+        # UNTIL en UTC avec un DTSTART naïf : dateutil refuse le mélange, on ramène UNTIL en heure locale
+        rule_text = _UTC_UNTIL.sub(
+            lambda m: "UNTIL=" + parse_ics_datetime(m.group(1) + "Z")[0].strftime("%Y%m%dT%H%M%S"), event.rrule)
+        dtstart = event.begin
+    else:
+        # DTSTART avec fuseau : dateutil exige un UNTIL en UTC, un UNTIL sans Z est lu dans le fuseau de l'événement
+        rule_text = _LOCAL_UNTIL.sub(lambda m: "UNTIL=" + datetime.datetime.strptime(m.group(1), "%Y%m%dT%H%M%S")
+                                     .replace(tzinfo=zone).astimezone(datetime.timezone.utc)
+                                     .strftime("%Y%m%dT%H%M%SZ"), event.rrule)
+        dtstart = event.dtstart
+        # Fenêtre locale naïve -> fuseau de l'événement
+        start, end = start.astimezone(zone), end.astimezone(zone)
+    try:
+        rule = rrulestr(rule_text, dtstart=dtstart)
+    except (ValueError, TypeError):
+        occurrences = [dtstart] if dtstart < end and dtstart + event.duration >= start else []
+        return [_to_local(dt) for dt in occurrences]
+    duration = event.duration
+    excluded = set(event.exdates)
+    after = start - duration if duration else start
+    return [
+        _to_local(dt) for dt in rule.between(after, end, inc=True)
+        if dt < end and dt not in excluded and (dt + duration > start or dt >= start)
+    ]
+
+
+# ----------------------------
+# Index
+# ----------------------------
+class IcsStore:
+    """
+    Événements d'un fichier .ics, indexés par date de début.
+    `events()` ne relit le fichier que si sa signature (mtime, taille) a changé depuis la dernière lecture.
+    Requêtes par fenêtre : événements simples dans un tableau trié (débuts + plus longue durée),
+    événements récurrents développés à la demande.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._signature = None
+        self._events = []
+        self._begins = []
+        self._single = []
+        self._single_begins = []
+        self._max_duration = datetime.timedelta(0)
+        self._recurring = []
+        self._lock = threading.Lock()
+
+    def _index(self, event):
+        if event.rrule:
+            self._recurring.append(event)
+            return
+        idx = bisect_right(self._single_begins, event.begin)
+        self._single.insert(idx, event)
+        self._single_begins.insert(idx, event.begin)
+        self._max_duration = max(self._max_duration, event.duration)
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        """Recharge l'index si le fichier a changé sur disque (à appeler sous verrou)."""
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return False
+        events = []
+        if signature is not None:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                events = list(parse_ics_events(f))
+        events.sort(key=lambda ev: ev.begin)
+        self._events = events
+        self._begins = [ev.begin for ev in events]
+        self._single = [ev for ev in events if not ev.rrule]
+        self._single_begins = [ev.begin for ev in self._single]
+        self._max_duration = max((ev.duration for ev in self._single), default=datetime.timedelta(0))
+        self._recurring = [ev for ev in events if ev.rrule]
+        self._signature = signature
+        return True
+
+    def reload_if_changed(self):
+        """True si le fichier a été relu."""
+        with self._lock:
+            return self._load()
+
+    def events(self):
+        """Tous les événements, triés par date de début (liste partagée : ne pas la modifier)."""
+        with self._lock:
+            self._load()
+            return self._events
+
+    def __len__(self):
+        return len(self.events())
+
+    def between(self, start, end):
+        """
+        Occurrences qui chevauchent [start, end[ : [(début, fin, événement)] triées par début.
+        Un événement sans durée est retenu si son début est dans la fenêtre.
+        """
+        with self._lock:
+            self._load()
+            # Seuls les événements commençant après `start - plus longue durée` peuvent chevaucher la fenêtre
+            lo = bisect_left(self._single_begins, start - self._max_duration)
+            hi = bisect_left(self._single_begins, end)
+            found = []
+            for event in self._single[lo:hi]:
+                finish = event.begin + event.duration
+                if finish > start or event.begin >= start:
+                    found.append((event.begin, finish, event))
+            recurring = list(self._recurring)
+        for event in recurring:
+            found.extend((dt, dt + event.duration, event) for dt in expand_occurrences(event, start, end))
+        found.sort(key=lambda occurrence: occurrence[0])
+        return found
+
+    def event_days(self, start, end):
+        """{date: nombre d'occurrences} pour les jours de [start, end[ couverts par au moins un événement."""
+        days = {}
+        first, last = start.date(), (end - datetime.timedelta(microseconds=1)).date()
+        for begin, finish, _ in self.between(start, end):
+            # Un événement sur plusieurs jours marque chacun d'eux (fin exclusive)
+            day = max(begin.date(), first)
+            stop = min(max(begin, finish - datetime.timedelta(microseconds=1)).date(), last)
+            while day <= stop:
+                days[day] = days.get(day, 0) + 1
+                day += datetime.timedelta(days=1)
+        return days
+
+    def append_event(self, name, begin, end=None, all_day=False, rrule=None, uid=None):
+        """Ajoute un VEVENT en fin de fichier (crée le calendrier si besoin) et retourne l'événement."""
+        event = IcsEvent(begin, end, name, uid or f"{uuid.uuid4()}@carlo-streamlit", rrule, all_day)
+        block = serialize_event(event).encode("utf-8")
+        footer = CALENDAR_FOOTER.encode("utf-8")
+        with self._lock:
+            # Index à jour avant l'ajout : une modification extérieure est relue, pas écrasée
+            self._load()
+            with open(self.path, "r+b" if self._signature else "wb") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size == 0:
+                    f.write(CALENDAR_HEADER.encode("utf-8") + block + footer)
+                else:
+                    start = max(0, size - _TAIL_BYTES)
+                    f.seek(start)
+                    tail = f.read()
+                    pos = tail.upper().rfind(b"END:VCALENDAR")
+                    f.seek(start + pos if pos >= 0 else size)
+                    if pos < 0 and not tail.endswith(b"\n"):
+                        f.write(b"\r\n")
+                    f.write(block + footer)
+                    f.truncate()
+            idx = bisect_right(self._begins, event.begin)
+            self._events.insert(idx, event)
+            self._begins.insert(idx, event.begin)
+            self._index(event)
+            self._signature = self._stat_signature()
+        return event
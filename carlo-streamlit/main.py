@@ -1,6 +1,20 @@
 # main.py
+import sys
+
+from startup_profile import StartupProfile
+
+# Créé avant tout autre import : mesure le temps jusqu'à la première fenêtre (--startup-report pour le détail)
+profile = StartupProfile.from_environment(sys.argv[1:])
+
 from dashboard import App  # On importe la classe App depuis dashboard.py
 
+profile.mark("import de dashboard")
+
 if __name__ == "__main__":
     app = App()
+    profile.mark("construction de App")
+    profile.watch_first_window(app)
     app.mainloop()
+    # Fin du processus : sessions partagées fermées (module chargé seulement si un scraping a eu lieu)
+    if "carlo_session" in sys.modules:
+        sys.modules["carlo_session"].close_session_managers()
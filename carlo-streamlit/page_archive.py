@@ -0,0 +1,111 @@
+# page_archive.py
+"""
+Archive locale (SQLite) des pages de recherche brutes, pour re-parser sans refaire le scraping.
+- Pages compressées (zlib) et adressées par leur contenu (SHA-256) : une page identique d'un run
+  à l'autre n'est stockée qu'une fois.
+- Chaque récupération est indexée par fournisseur, référence normalisée et date.
+- Relecture : dernière page archivée de chaque référence (CarloScraperThread(from_archive=True)),
+  aucune requête réseau ; utile après une correction du parser ou un changement des colonnes.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from reference_ingest import normalize_reference
+
+DEFAULT_ARCHIVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "carlo_archive.sqlite")
+COMPRESSION_LEVEL = 6
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS pages ("
+    " hash TEXT PRIMARY KEY,"
+    " size INTEGER NOT NULL,"
+    " data BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS fetches ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " supplier TEXT NOT NULL,"
+    " ref TEXT NOT NULL,"
+    " searched TEXT NOT NULL,"
+    " fetched_at REAL NOT NULL,"
+    " hash TEXT NOT NULL REFERENCES pages(hash))",
+    "CREATE INDEX IF NOT EXISTS idx_fetches_ref ON fetches (supplier, ref, fetched_at)",
+)
+
+
+def page_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class PageArchive:
+    """
+    Archive thread-safe (une connexion partagée, verrou sur chaque accès) ; hachage et
+    compression sont faits hors verrou, dans le thread appelant (workers du scraper).
+    """
+
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def put(self, ref, page, supplier, fetched_at=None):
+        """Archive une page de résultats de `ref` ; retourne son empreinte."""
+        data = page.encode("utf-8")
+        digest = page_hash(data)
+        compressed = zlib.compress(data, COMPRESSION_LEVEL)
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO pages (hash, size, data) VALUES (?, ?, ?)",
+                               (digest, len(data), compressed))
+            self._conn.execute(
+                "INSERT INTO fetches (supplier, ref, searched, fetched_at, hash) VALUES (?, ?, ?, ?, ?)",
+                (supplier, normalize_reference(ref), ref, fetched_at if fetched_at is not None else time.time(), digest),
+            )
+            self._conn.commit()
+        return digest
+
+    def page(self, digest):
+        """Page décompressée d'après son empreinte (None si absente)."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM pages WHERE hash = ?", (digest,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def latest(self, ref, supplier, before=None):
+        """(page, fetched_at) de la dernière récupération de `ref` (avant `before` si donné), sinon None."""
+        sql = "SELECT hash, fetched_at FROM fetches WHERE supplier = ? AND ref = ?"
+        params = [supplier, normalize_reference(ref)]
+        if before is not None:
+            sql += " AND fetched_at < ?"
+            params.append(before)
+        with self._lock:
+            row = self._conn.execute(sql + " ORDER BY fetched_at DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        page = self.page(row[0])
+        return (page, row[1]) if page is not None else None
+
+    def references(self, supplier):
+        """Références archivées d'un fournisseur (telles que cherchées), par ordre de première récupération."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT searched FROM fetches WHERE supplier = ? GROUP BY ref ORDER BY MIN(id)", (supplier,)
+            ).fetchall()
+        return [searched for (searched,) in rows]
+
+    def stats(self):
+        """Nombre de récupérations et de pages distinctes, tailles brute et compressée (octets)."""
+        with self._lock:
+            fetches = self._conn.execute("SELECT COUNT(*) FROM fetches").fetchone()[0]
+            pages, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM pages"
+            ).fetchone()
+        return {"fetches": fetches, "pages": pages, "raw_bytes": raw, "stored_bytes": stored}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
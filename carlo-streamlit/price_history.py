@@ -0,0 +1,190 @@
+# price_history.py
+"""
+Historique local (SQLite) des prix et disponibilités, alimenté à chaque run de scraping.
+- Ajout seul : un run = une ligne dans `runs`, ses lignes produit dans `observations` (prix et quantité typés).
+  Seules les lignes récupérées sur le site sont observées : une ligne servie par le cache n'est pas
+  ré-enregistrée comme observation du run en cours.
+- Index par référence, par produit et par run : les comparaisons entre runs sont faites en SQL,
+  sans relire les fichiers Excel des runs précédents.
+- Requêtes : variations de prix, passages hors stock, série de prix d'une référence ou d'un produit.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from reference_ingest import normalize_reference
+from result_export import parse_price, parse_quantity
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "carlo_history.sqlite")
+IN_STOCK = "En stock"
+
+RUN_RUNNING = "en cours"
+RUN_DONE = "terminé"
+RUN_INTERRUPTED = "interrompu"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " started_at REAL NOT NULL,"
+    " finished_at REAL,"
+    " status TEXT NOT NULL,"
+    " row_count INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS observations ("
+    " run_id INTEGER NOT NULL REFERENCES runs(id),"
+    " ref TEXT NOT NULL,"
+    " searched TEXT NOT NULL,"
+    " product TEXT NOT NULL,"
+    " cdt TEXT NOT NULL,"
+    " price REAL,"
+    " quantity INTEGER,"
+    " availability TEXT,"
+    " observed_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_observations_run ON observations (run_id, ref, product, cdt)",
+    "CREATE INDEX IF NOT EXISTS idx_observations_ref ON observations (ref, observed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_observations_product ON observations (product, observed_at)",
+)
+
+# Même produit (référence cherchée + nom + conditionnement) dans deux runs
+_COMPARE_SQL = """
+    SELECT cur.searched, cur.product, cur.cdt, prev.price, cur.price, prev.availability, cur.availability
+    FROM observations AS cur
+    JOIN observations AS prev
+      ON prev.run_id = ? AND prev.ref = cur.ref AND prev.product = cur.product AND prev.cdt = cur.cdt
+    WHERE cur.run_id = ? AND {condition}
+    ORDER BY cur.ref, cur.product, cur.cdt
+"""
+
+
+class PriceHistory:
+    """
+    Historique thread-safe (une connexion partagée, verrou sur chaque accès).
+    Le scraper appelle start_run / add_rows / finish_run ; les interfaces appellent les requêtes.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL : les lectures de l'interface ne bloquent pas l'écriture d'un run en cours
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    # ----------------------------
+    # Écriture (thread de scraping)
+    # ----------------------------
+    def start_run(self):
+        """Crée un run et retourne son identifiant."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (started_at, status) VALUES (?, ?)", (time.time(), RUN_RUNNING))
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def add_rows(self, run_id, rows, observed_at=None):
+        """Ajoute des lignes produit (dicts du scraper) au run."""
+        if not rows:
+            return
+        observed_at = observed_at if observed_at is not None else time.time()
+        values = [
+            (
+                run_id,
+                normalize_reference(row.get('Référence cherchée', "")),
+                str(row.get('Référence cherchée', "")),
+                str(row.get('Produit') or ""),
+                str(row.get('Cdt') or ""),
+                parse_price(row.get('Prix €')),
+                parse_quantity(row.get('Qté')),
+                row.get('Disponibilité'),
+                observed_at,
+            )
+            for row in rows
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT INTO observations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", values)
+            self._conn.execute("UPDATE runs SET row_count = row_count + ? WHERE id = ?", (len(values), run_id))
+            self._conn.commit()
+
+    def finish_run(self, run_id, status=RUN_DONE):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ? WHERE id = ?", (time.time(), status, run_id))
+            self._conn.commit()
+
+    def reopen_run(self, run_id):
+        """Reprise d'un run interrompu : les lignes suivantes complètent le même run."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE runs SET finished_at = NULL, status = ? WHERE id = ?", (RUN_RUNNING, run_id))
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    # ----------------------------
+    # Requêtes
+    # ----------------------------
+    def runs(self, limit=20):
+        """Derniers runs : [(id, started_at, finished_at, status, row_count)], le plus récent d'abord."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, started_at, finished_at, status, row_count FROM runs ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def last_two_runs(self):
+        """(run précédent, dernier run) parmi les runs terminés ; None si moins de deux runs."""
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT id FROM runs WHERE status = ? ORDER BY id DESC LIMIT 2", (RUN_DONE,))]
+        return (ids[1], ids[0]) if len(ids) == 2 else None
+
+    def _compare(self, condition, run_id, previous_run_id):
+        if run_id is None or previous_run_id is None:
+            pair = self.last_two_runs()
+            if pair is None:
+                return []
+            previous_run_id, run_id = pair
+        with self._lock:
+            return self._conn.execute(
+                _COMPARE_SQL.format(condition=condition), (previous_run_id, run_id)).fetchall()
+
+    def price_changes(self, run_id=None, previous_run_id=None):
+        """
+        Produits dont le prix a changé entre deux runs (par défaut les deux derniers runs terminés) :
+        [(référence, produit, cdt, ancien prix, nouveau prix, écart)].
+        """
+        rows = self._compare("cur.price IS NOT prev.price", run_id, previous_run_id)
+        return [
+            (ref, product, cdt, old, new, None if old is None or new is None else round(new - old, 2))
+            for ref, product, cdt, old, new, _, _ in rows
+        ]
+
+    def went_out_of_stock(self, run_id=None, previous_run_id=None):
+        """Produits en stock au run précédent et plus au dernier : [(référence, produit, cdt, disponibilité)]."""
+        rows = self._compare(
+            f"prev.availability = '{IN_STOCK}' AND cur.availability IS NOT '{IN_STOCK}'", run_id, previous_run_id)
+        return [(ref, product, cdt, current) for ref, product, cdt, _, _, _, current in rows]
+
+    def price_series(self, ref=None, product=None):
+        """
+        Évolution du prix d'une référence cherchée (ou d'un produit, par son nom) :
+        [(observed_at, run_id, produit, cdt, prix, disponibilité)] par date croissante.
+        """
+        if ref is not None:
+            condition, value = "ref = ?", normalize_reference(ref)
+        elif product is not None:
+            condition, value = "product = ?", product
+        else:
+            raise ValueError("price_series : indiquer une référence ou un produit")
+        with self._lock:
+            return self._conn.execute(
+                "SELECT observed_at, run_id, product, cdt, price, availability FROM observations"
+                f" WHERE {condition} ORDER BY observed_at, product, cdt",
+                (value,),
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,227 @@
+# rate_limiter.py
+"""
+Limitation de débit partagée entre les workers de scraping.
+- TokenBucket: seau à jetons thread-safe, garantit un débit global (requêtes/seconde)
+  quel que soit le nombre de threads qui interrogent le site.
+- AdaptiveController: contrôleur AIMD qui ajuste débit et requêtes simultanées
+  selon la latence observée et les erreurs HTTP (429/5xx) ou timeouts.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Seau à jetons thread-safe.
+    `rate` jetons sont ajoutés par seconde, jusqu'à `capacity` jetons au maximum.
+    Chaque requête consomme un jeton : le débit moyen ne dépasse jamais `rate`.
+    """
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate doit être > 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_delay(cls, delay, capacity=1):
+        """Construit un seau équivalent à une pause fixe de `delay` secondes entre requêtes."""
+        # délai nul = pas de limitation effective (débit très élevé)
+        return cls(1.0 / delay if delay > 0 else 1e9, capacity)
+
+    def set_rate(self, rate):
+        """Modifie le débit à chaud (utilisé par le contrôleur adaptatif)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def _refill(self, now):
+        elapsed = now - self._last
+        self._last = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def acquire(self, stop_event=None):
+        """
+        Bloque jusqu'à obtention d'un jeton.
+        Retourne False si `stop_event` est levé pendant l'attente, True sinon.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class AdaptiveController:
+    """
+    Contrôleur AIMD (augmentation additive / diminution multiplicative).
+    - Tant que le site répond vite et sans erreur, on augmente d'un cran le nombre de
+      requêtes simultanées et le débit à chaque "tour" complet de requêtes réussies.
+    - Sur 429, 5xx, timeout ou latence moyenne au-dessus de `target_latency`, on divise
+      débit et concurrence par `1 / backoff` (au plus une fois par `cooldown` secondes).
+    - Un en-tête Retry-After sur une 429 suspend toutes les requêtes pendant la durée demandée.
+    Avec min == max (débit et concurrence), le contrôleur se comporte comme un limiteur fixe.
+    """
+
+    def __init__(self, rate, max_concurrency, concurrency=1, min_concurrency=1,
+                 min_rate=None, max_rate=None, rate_step=None,
+                 target_latency=2.0, backoff=0.5, cooldown=2.0):
+        self.min_rate = min_rate if min_rate is not None else rate / 4
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.rate_step = rate_step if rate_step is not None else max(rate * 0.1, 0.05)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.concurrency = max(self.min_concurrency, min(int(concurrency), self.max_concurrency))
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.cooldown = cooldown
+
+        self.rate = min(self.max_rate, max(self.min_rate, float(rate)))
+        self.bucket = TokenBucket(self.rate)
+        self.counters = {"requests": 0, "http_429": 0, "http_5xx": 0, "timeouts": 0, "errors": 0}
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._successes = 0
+        self._latency = None          # moyenne mobile exponentielle (secondes)
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+
+    @classmethod
+    def fixed(cls, delay, concurrency):
+        """Contrôleur sans adaptation : 1 requête / `delay` secondes, `concurrency` en parallèle."""
+        rate = 1.0 / delay if delay > 0 else 1e9
+        return cls(rate, concurrency, concurrency=concurrency, min_concurrency=concurrency,
+                   min_rate=rate, max_rate=rate)
+
+    # ----------------------------
+    # Côté workers
+    # ----------------------------
+    def acquire(self, stop_event=None):
+        """
+        Attend une place parmi les requêtes simultanées autorisées, puis un jeton de débit.
+        Retourne False si `stop_event` est levé pendant l'attente.
+        """
+        with self._cond:
+            while self._in_flight >= self.concurrency:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self._cond.wait(0.1)
+            self._in_flight += 1
+
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            stopped = stop_event.wait(pause) if stop_event is not None else time.sleep(pause)
+            if stopped:
+                self._release_slot()
+                return False
+        if not self.bucket.acquire(stop_event):
+            self._release_slot()
+            return False
+        return True
+
+    def release(self, latency, status=None, timed_out=False, failed=False, retry_after=None):
+        """
+        Libère la place et enregistre le résultat de la requête.
+        Retourne un message de log si le débit ou la concurrence a changé, sinon None.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+            self.counters["requests"] += 1
+            self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+
+            reason = None
+            if timed_out:
+                self.counters["timeouts"] += 1
+                reason = "timeout"
+            elif failed:
+                self.counters["errors"] += 1
+                reason = "erreur réseau"
+            elif status == 429:
+                self.counters["http_429"] += 1
+                reason = "HTTP 429"
+                pause = _parse_retry_after(retry_after)
+                if pause:
+                    self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            elif status is not None and status >= 500:
+                self.counters["http_5xx"] += 1
+                reason = f"HTTP {status}"
+            elif self._latency > self.target_latency:
+                reason = f"latence {self._latency:.1f}s"
+
+            if reason:
+                return self._decrease(reason)
+
+            self._successes += 1
+            if self._successes >= self.concurrency:
+                self._successes = 0
+                return self._increase()
+            return None
+
+    def _release_slot(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    # ----------------------------
+    # Ajustements (appelés sous verrou)
+    # ----------------------------
+    def _increase(self):
+        concurrency = min(self.max_concurrency, self.concurrency + 1)
+        rate = min(self.max_rate, self.rate + self.rate_step)
+        if concurrency == self.concurrency and rate == self.rate:
+            return None
+        self._apply(rate, concurrency)
+        return f"📈 Site réactif : {self.rate:.2f} req/s, {self.concurrency} requêtes simultanées"
+
+    def _decrease(self, reason):
+        self._successes = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return None
+        self._last_decrease = now
+        concurrency = max(self.min_concurrency, int(self.concurrency * self.backoff))
+        rate = max(self.min_rate, self.rate * self.backoff)
+        if concurrency == self.concurrency and rate == self.rate:
+            return None
+        self._apply(rate, concurrency)
+        return f"📉 Ralentissement ({reason}) : {self.rate:.2f} req/s, {self.concurrency} requêtes simultanées"
+
+    def _apply(self, rate, concurrency):
+        self.rate = rate
+        self.concurrency = concurrency
+        self.bucket.set_rate(rate)
+        self._cond.notify_all()
+
+    def snapshot(self):
+        """État courant (débit, concurrence, latence moyenne, compteurs) pour l'affichage."""
+        with self._cond:
+            return {
+                "rate": self.rate,
+                "concurrency": self.concurrency,
+                "in_flight": self._in_flight,
+                "latency": self._latency,
+                **self.counters,
+            }
+
+
+def _parse_retry_after(value):
+    """Retry-After en secondes (la forme date HTTP est ignorée)."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
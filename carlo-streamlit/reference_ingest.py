@@ -0,0 +1,151 @@
+# reference_ingest.py
+"""
+Ingestion des références à scraper, en une seule passe.
+- read_reference_column: lit uniquement la colonne 'Référence' (ou la première colonne)
+  ligne par ligne (openpyxl en lecture seule), sans charger tout le classeur.
+- normalize_reference: nettoie une valeur de cellule (espaces, casse, '.0' des cellules numériques).
+- ReferencePlan: références uniques à rechercher + correspondance vers les lignes d'origine.
+"""
+
+import math
+import os
+import re
+
+REFERENCE_COLUMN = "Référence"
+
+_SPACES = re.compile(r"\s+")
+_TRAILING_ZERO = re.compile(r"^(\d+)\.0+$")
+
+
+def clean_reference(value):
+    """
+    Forme "affichable" d'une référence : espaces superflus retirés, '.0' des nombres supprimé.
+    Retourne "" pour une cellule vide / NaN.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            value = int(value)
+    text = _SPACES.sub(" ", str(value)).strip()
+    return _TRAILING_ZERO.sub(r"\1", text)
+
+
+def normalize_reference(value):
+    """Clé de comparaison d'une référence (dédoublonnage, cache) : forme nettoyée en majuscules."""
+    return clean_reference(value).upper()
+
+
+class ReferencePlan:
+    """
+    Plan de scraping compact :
+    - references : références uniques, dans l'ordre de première apparition (forme nettoyée),
+    - source_rows : {clé normalisée: [lignes Excel d'origine]} ("manuel" pour la saisie manuelle),
+    - total / empty : nombre de valeurs lues et de cellules vides ignorées.
+    """
+
+    def __init__(self):
+        self.references = []
+        self.source_rows = {}
+        self.total = 0
+        self.empty = 0
+
+    def add(self, value, source):
+        """Ajoute une valeur brute lue à `source` (numéro de ligne ou "manuel")."""
+        self.total += 1
+        ref = clean_reference(value)
+        if not ref:
+            self.empty += 1
+            return
+        key = ref.upper()
+        rows = self.source_rows.get(key)
+        if rows is None:
+            self.source_rows[key] = [source]
+            self.references.append(ref)
+        else:
+            rows.append(source)
+
+    @property
+    def duplicates(self):
+        return self.total - self.empty - len(self.references)
+
+    def rows_for(self, ref):
+        """Lignes d'origine d'une référence (toutes ses variantes d'écriture)."""
+        return self.source_rows.get(normalize_reference(ref), [])
+
+    def summary(self):
+        return (f"{self.total} valeur(s) lue(s), {len(self.references)} référence(s) unique(s) "
+                f"({self.duplicates} doublon(s), {self.empty} cellule(s) vide(s) ignorée(s))")
+
+    def __len__(self):
+        return len(self.references)
+
+
+def _is_xls(source):
+    name = source if isinstance(source, str) else getattr(source, "name", "")
+    return os.path.splitext(str(name))[1].lower() == ".xls"
+
+
+def _pick_column(header, column):
+    """Index de la colonne demandée dans l'en-tête, sinon de la première colonne."""
+    for idx, name in enumerate(header):
+        if name is not None and str(name).strip() == column:
+            return idx
+    return 0
+
+
+def read_reference_column(source, column=REFERENCE_COLUMN, sheet=None):
+    """
+    Génère (numéro de ligne Excel, valeur) pour la colonne `column` de la feuille `sheet`
+    (nom, première feuille par défaut), ou pour la première colonne si elle est absente.
+    `source` : chemin ou fichier ouvert.
+    Les .xlsx sont lus en flux (mémoire constante) ; les .xls passent par pandas sur une seule colonne.
+    """
+    if _is_xls(source):
+        import pandas as pd
+        sheet_name = sheet if sheet is not None else 0
+        header = list(pd.read_excel(source, sheet_name=sheet_name, nrows=0).columns)
+        if hasattr(source, "seek"):
+            source.seek(0)
+        col = header[_pick_column(header, column)]
+        series = pd.read_excel(source, sheet_name=sheet_name, usecols=[col])[col]
+        # ligne 1 = en-tête
+        yield from ((row, value) for row, value in enumerate(series.tolist(), start=2))
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        idx = _pick_column(header, column) + 1
+        for row, (value,) in enumerate(ws.iter_rows(min_row=2, min_col=idx, max_col=idx, values_only=True), start=2):
+            yield row, value
+    finally:
+        wb.close()
+
+
+def build_plan(excel_source=None, manual_text="", column=REFERENCE_COLUMN, dataframe=None, sheet=None,
+               references=None):
+    """
+    Construit le plan de scraping à partir du classeur (feuille `sheet`, ou d'un DataFrame déjà
+    chargé, pour éviter une relecture), des références manuelles séparées par des virgules
+    et d'une liste de références déjà séparées (`references`, ex. celles de l'archive des pages).
+    """
+    plan = ReferencePlan()
+    if dataframe is not None:
+        col = column if column in dataframe.columns else dataframe.columns[0]
+        for row, value in enumerate(dataframe[col].tolist(), start=2):
+            plan.add(value, row)
+    elif excel_source is not None:
+        for row, value in read_reference_column(excel_source, column, sheet):
+            plan.add(value, row)
+
+    if manual_text:
+        for value in manual_text.split(","):
+            plan.add(value, "manuel")
+    for value in references or ():
+        plan.add(value, "liste")
+    return plan
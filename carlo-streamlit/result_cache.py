@@ -0,0 +1,81 @@
+# result_cache.py
+"""
+Cache disque (SQLite) des résultats de recherche Carlo Erba.
+- Une entrée par référence normalisée (voir reference_ingest) : lignes produit parsées (JSON) + date de récupération.
+- Une seule durée de validité : une entrée contient prix et disponibilité, issus de la même page ;
+  elle est calée sur la disponibilité, qui change plus souvent que les prix.
+- Les références sans produit sont aussi mises en cache (évite de relancer une recherche vide).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from reference_ingest import normalize_reference
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "carlo_cache.sqlite")
+DEFAULT_TTL = 2 * 3600    # la disponibilité change plusieurs fois par jour
+
+
+class ResultCache:
+    """
+    Cache thread-safe des résultats par référence.
+    `get` ne renvoie une entrée que si elle est encore fraîche ; `put` l'écrase.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " ref TEXT PRIMARY KEY,"
+            " rows TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, ref):
+        """Retourne (lignes, fetched_at) si l'entrée est fraîche, sinon None."""
+        return self.get_many([ref]).get(normalize_reference(ref))
+
+    def get_many(self, refs):
+        """Recherche groupée : {référence normalisée: (lignes, fetched_at)} pour les entrées fraîches."""
+        keys = list(dict.fromkeys(normalize_reference(r) for r in refs))
+        min_fetched = time.time() - self.ttl
+        found = {}
+        with self._lock:
+            # SQLite limite le nombre de paramètres : requêtes par paquets
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                cursor = self._conn.execute(
+                    f"SELECT ref, rows, fetched_at FROM results WHERE ref IN ({marks}) AND fetched_at >= ?",
+                    (*chunk, min_fetched),
+                )
+                for key, rows, fetched_at in cursor:
+                    found[key] = (json.loads(rows), fetched_at)
+        return found
+
+    def put(self, ref, rows, fetched_at=None):
+        """Enregistre (ou remplace) les lignes produit d'une référence."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (ref, rows, fetched_at) VALUES (?, ?, ?)",
+                (normalize_reference(ref), json.dumps(rows, ensure_ascii=False),
+                 fetched_at if fetched_at is not None else time.time()),
+            )
+            self._conn.commit()
+
+    def purge_expired(self):
+        """Supprime les entrées expirées."""
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE fetched_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,172 @@
+# result_export.py
+"""
+Export typé des résultats de scraping (et de l'aperçu Excel) en xlsx, CSV ou Parquet.
+- SCHEMA: type déclaré de chaque colonne de résultats (prix numérique, quantité entière,
+  disponibilité catégorielle) ; les valeurs texte du site sont converties une seule fois ici.
+- export_rows: écrit en flux un itérable de lignes (dicts ou tuples), mémoire constante quel que soit le format.
+Formats : xlsx (xlsxwriter en constant_memory s'il est installé, sinon openpyxl write-only),
+CSV (module csv, UTF-8 avec BOM pour Excel), Parquet (pyarrow, optionnel, écrit par lots).
+"""
+
+import csv
+import os
+import re
+from itertools import islice
+
+from carlo_parser import COLUMNS
+
+SCHEMA = {
+    'Référence cherchée': "str",
+    'Produit': "str",
+    'Cdt': "str",
+    'Emballage': "str",
+    'Unité de vente': "str",
+    'Qté': "int",
+    'Prix €': "float",
+    'Disponibilité': "category",
+}
+EXPORT_FORMATS = ("xlsx", "csv", "parquet")
+PARQUET_BATCH_SIZE = 10_000
+
+_NUMBER_CHARS = re.compile(r"[^0-9,.\-]")
+
+
+def parse_price(value):
+    """'12,50', '1 234.5 €', '1.234,56', '1,234.56', 12.5 -> float ; None si vide ou illisible."""
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None or value != value else float(value)
+    text = _NUMBER_CHARS.sub("", str(value))
+    if "," in text and text.rfind(",") > text.rfind("."):
+        # Virgule décimale (format français) : les points éventuels sont des séparateurs de milliers
+        text = text.replace(".", "").replace(",", ".")
+    else:
+        # Point décimal : les virgules éventuelles sont des séparateurs de milliers
+        text = text.replace(",", "")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_quantity(value):
+    """'1', '2.0', 3 -> int ; None si vide ou illisible."""
+    number = parse_price(value)
+    return int(number) if number is not None else None
+
+
+def _as_text(value):
+    return "" if value is None else str(value)
+
+
+_CONVERTERS = {"str": _as_text, "category": _as_text, "float": parse_price, "int": parse_quantity}
+
+
+def export_format(path):
+    """Format d'export déduit de l'extension (xlsx par défaut)."""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return ext if ext in EXPORT_FORMATS else "xlsx"
+
+
+def typed_rows(rows, columns=COLUMNS, schema=SCHEMA):
+    """
+    Lignes (dicts ou séquences) -> listes alignées sur `columns`, converties selon `schema`
+    (None : valeurs laissées telles quelles, pour un classeur quelconque).
+    """
+    schema = schema or {}
+    converters = [_CONVERTERS.get(schema.get(col)) for col in columns]
+    for row in rows:
+        values = [row.get(col) for col in columns] if isinstance(row, dict) else list(row)
+        yield [conv(v) if conv else v for conv, v in zip(converters, values)]
+
+
+def export_rows(rows, output_file, columns=COLUMNS, schema=SCHEMA, fmt=None):
+    """Écrit les lignes dans `output_file` au format `fmt` (déduit de l'extension). Retourne le nombre de lignes."""
+    fmt = fmt or export_format(output_file)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    writer = {"xlsx": _write_xlsx, "csv": _write_csv, "parquet": _write_parquet}[fmt]
+    return writer(typed_rows(rows, columns, schema), output_file, list(columns), schema or {})
+
+
+# ----------------------------
+# Écrivains par format
+# ----------------------------
+def _write_csv(rows, output_file, columns, schema):
+    count = 0
+    with open(output_file, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _write_xlsx(rows, output_file, columns, schema):
+    try:
+        import xlsxwriter
+    except ImportError:
+        return _write_xlsx_openpyxl(rows, output_file, columns)
+
+    count = 0
+    wb = xlsxwriter.Workbook(output_file, {"constant_memory": True})
+    try:
+        ws = wb.add_worksheet("Résultats")
+        price_format = wb.add_format({"num_format": "#,##0.00"})
+        for idx, col in enumerate(columns):
+            if schema.get(col) == "float":
+                ws.set_column(idx, idx, 12, price_format)
+        ws.write_row(0, 0, columns)
+        for count, row in enumerate(rows, start=1):
+            ws.write_row(count, 0, row)
+    finally:
+        wb.close()
+    return count
+
+
+def _write_xlsx_openpyxl(rows, output_file, columns):
+    from openpyxl import Workbook
+
+    count = 0
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Résultats")
+    ws.append(columns)
+    for row in rows:
+        ws.append(row)
+        count += 1
+    wb.save(output_file)
+    return count
+
+
+def _write_parquet(rows, output_file, columns, schema):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("L'export Parquet nécessite pyarrow (pip install pyarrow).")
+
+    arrow_types = {
+        "float": pa.float64(),
+        "int": pa.int64(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+    }
+    # Colonnes sans type déclaré (aperçu d'un classeur quelconque) : texte
+    types = [arrow_types.get(schema.get(col), pa.string()) for col in columns]
+    arrow_schema = pa.schema(list(zip(columns, types)))
+    to_text = [pa.types.is_string(t) for t in types]
+
+    count = 0
+    with pq.ParquetWriter(output_file, arrow_schema) as writer:
+        while True:
+            batch = list(islice(rows, PARQUET_BATCH_SIZE))
+            if not batch:
+                break
+            arrays = []
+            for idx, (col_type, text) in enumerate(zip(types, to_text)):
+                values = [row[idx] if idx < len(row) else None for row in batch]
+                if text:
+                    values = [None if v is None else str(v) for v in values]
+                arrays.append(pa.array(values, type=col_type))
+            writer.write_batch(pa.record_batch(arrays, schema=arrow_schema))
+            count += len(batch)
+    return count
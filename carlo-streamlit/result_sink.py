@@ -0,0 +1,76 @@
+# result_sink.py
+"""
+Écriture incrémentale des résultats de scraping.
+- JsonlResultSink: ajoute les lignes produit par paquets dans un fichier JSON Lines
+  (une ligne JSON par produit) : les résultats partiels sont toujours sur disque
+  et la mémoire reste constante quel que soit le nombre de références.
+- iter_jsonl: relit le flux (export final par result_export.export_rows).
+- results_stream_path: emplacement du flux d'un run, seule source du nom de fichier pour le scraper,
+  la reprise et les lecteurs (interfaces, tableau de bord, comparaison des fournisseurs).
+"""
+
+import json
+import os
+
+# Nom des fichiers de résultats (flux .jsonl, journal, exports) : run en ligne / relecture de l'archive
+RESULTS_STEM = "resultats_scraping"
+ARCHIVE_RESULTS_STEM = "resultats_archive"
+
+
+def results_stream_path(output_folder, from_archive=False):
+    """Flux JSON Lines des résultats d'un run dans `output_folder` (relecture de l'archive : fichier à part)."""
+    return os.path.join(output_folder, f"{ARCHIVE_RESULTS_STEM if from_archive else RESULTS_STEM}.jsonl")
+
+
+class JsonlResultSink:
+    """
+    Sink JSON Lines : `write` met en tampon, le disque est mis à jour tous les `chunk_size` produits.
+    `after_flush` est appelé une fois les lignes sur disque (ex. journal de reprise).
+    Avec append=True, `count` inclut les lignes déjà présentes dans le fichier.
+    """
+
+    def __init__(self, path, chunk_size=200, append=False, after_flush=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.after_flush = after_flush
+        self.count = 0
+        if append and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.count = sum(1 for line in f if line.strip())
+        self._buffer = []
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, rows):
+        self._buffer.extend(rows)
+        self.count += len(rows)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self.after_flush is not None:
+            self.after_flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl(path):
+    """Relit un fichier JSON Lines produit par JsonlResultSink, ligne par ligne."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
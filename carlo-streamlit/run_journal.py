@@ -0,0 +1,107 @@
+# run_journal.py
+"""
+Journal d'exécution pour reprendre un scraping interrompu.
+- Fichier JSON Lines à côté du flux de résultats : une ligne d'en-tête avec toutes les
+  références du run (et le run de l'historique des prix), puis une ligne {"done": clé}
+  par référence entièrement traitée.
+- Le journal est supprimé quand le run se termine ; sa présence signale un run à reprendre.
+"""
+
+import json
+import os
+import time
+
+from reference_ingest import normalize_reference
+
+
+def journal_path(stream_file):
+    """Chemin du journal associé à un flux de résultats (resultats.jsonl -> resultats.journal)."""
+    return os.path.splitext(stream_file)[0] + ".journal"
+
+
+class RunJournal:
+    """Références d'un run et ensemble des références déjà traitées (clés normalisées)."""
+
+    def __init__(self, path, references, done=None, started_at=None, history_run=None):
+        self.path = path
+        self.references = list(references)
+        self.done = set(done or ())
+        self.started_at = started_at or time.time()
+        self.history_run = history_run   # identifiant du run dans price_history, complété à la reprise
+        self._buffer = []
+        self._file = open(path, "a", encoding="utf-8")
+
+    @classmethod
+    def start(cls, path, references, history_run=None):
+        """Crée un nouveau journal (écrase un éventuel journal précédent)."""
+        started_at = time.time()
+        header = {"references": list(references), "started_at": started_at, "history_run": history_run}
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        return cls(path, references, started_at=started_at, history_run=history_run)
+
+    @classmethod
+    def load(cls, path):
+        """Relit un journal existant ; None s'il n'y a rien à reprendre."""
+        if not os.path.exists(path):
+            return None
+        done = set()
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            for line in f:
+                try:
+                    done.add(json.loads(line)["done"])
+                except (ValueError, KeyError):
+                    break   # dernière ligne tronquée par un arrêt brutal
+        if "references" not in header:
+            return None
+        return cls(path, header["references"], done, header.get("started_at"), header.get("history_run"))
+
+    def remaining(self):
+        """Références pas encore traitées, dans l'ordre d'origine."""
+        return [ref for ref in self.references if normalize_reference(ref) not in self.done]
+
+    def mark_done(self, ref):
+        key = normalize_reference(ref)
+        self.done.add(key)
+        self._buffer.append(key)
+
+    def flush(self):
+        """Écrit les références marquées (à appeler après l'écriture de leurs lignes produit)."""
+        if self._buffer and not self._file.closed:
+            self._file.writelines(json.dumps({"done": key}, ensure_ascii=False) + "\n" for key in self._buffer)
+            self._buffer.clear()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def complete(self):
+        """Run terminé : le journal n'a plus lieu d'être."""
+        self.close()
+        os.remove(self.path)
+
+
+def discard_unjournaled_rows(stream_file, done):
+    """
+    Avant une reprise : retire du flux les lignes produit des références non marquées
+    comme traitées (écrites juste avant un arrêt brutal), pour éviter les doublons.
+    """
+    if not os.path.exists(stream_file):
+        return 0
+    tmp_file = stream_file + ".tmp"
+    kept = 0
+    with open(stream_file, "r", encoding="utf-8") as src, open(tmp_file, "w", encoding="utf-8") as dst:
+        for line in src:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if normalize_reference(row.get('Référence cherchée', "")) in done:
+                dst.write(line)
+                kept += 1
+    os.replace(tmp_file, stream_file)
+    return kept
@@ -0,0 +1,192 @@
+# run_metrics.py
+"""
+Mesures d'un run de scraping : durée de chaque étape et compteurs.
+- RunMetrics: histogrammes à seaux fixes par étape (connexion, attente du limiteur, requête HTTP,
+  parsing et extraction des lignes, écriture, export…) et compteurs (codes HTTP, tentatives, pages vides…).
+  Mémoire constante quel que soit le nombre de références ; thread-safe (workers + thread principal).
+- Sorties : résumé de fin de run (lignes de log), JSON, et fichier texte au format Prometheus
+  (collecteur textfile de node_exporter).
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Bornes supérieures des seaux (secondes), comme un histogramme Prometheus
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_LABELS = {
+    "plan": "préparation des références",
+    "cache": "lecture du cache",
+    "login": "connexion",
+    "throttle": "attente du limiteur",
+    "fetch": "requête HTTP",
+    "archive": "archive des pages",
+    "parse": "parsing + extraction des lignes",
+    "write": "écriture du flux",
+    "export": "export",
+}
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for idx, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[idx] += 1
+                return
+        self.buckets[-1] += 1
+
+    def quantile(self, q):
+        """Borne supérieure du seau contenant le quantile `q` (le maximum pour le dernier seau)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for idx, bound in enumerate(BUCKETS):
+            cumulative += self.buckets[idx]
+            if cumulative >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_seconds(seconds):
+    return f"{seconds * 1000:.0f} ms" if seconds < 1 else f"{seconds:.1f} s"
+
+
+class RunMetrics:
+    """Durées par étape (`stage` / `observe`) et compteurs (`incr`), étiquetés par mots-clés."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._stages.get(key)
+            if histogram is None:
+                histogram = self._stages[key] = _Histogram()
+            histogram.observe(seconds)
+
+    def incr(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    # ----------------------------
+    # Sorties
+    # ----------------------------
+    def to_dict(self):
+        with self._lock:
+            stages = [
+                {
+                    "stage": name, "labels": dict(labels), "count": h.count,
+                    "total_s": round(h.total, 6), "mean_s": round(h.total / h.count, 6) if h.count else 0.0,
+                    "p50_s": round(h.quantile(0.5), 6), "p99_s": round(h.quantile(0.99), 6),
+                    "max_s": round(h.max, 6),
+                }
+                for (name, labels), h in self._stages.items()
+            ]
+            counters = [{"counter": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+        return {"started_at": self.started_at, "elapsed_s": round(time.time() - self.started_at, 3),
+                "stages": stages, "counters": counters}
+
+    def summary_lines(self):
+        """Résumé lisible : temps cumulé par étape (du plus coûteux au moins coûteux) puis compteurs."""
+        data = self.to_dict()
+        lines = [f"⏱️ Mesures du run ({_format_seconds(data['elapsed_s'])}) — temps cumulé par étape :"]
+        for stage in sorted(data["stages"], key=lambda s: s["total_s"], reverse=True):
+            label = STAGE_LABELS.get(stage["stage"], stage["stage"])
+            if stage["labels"]:
+                label += " " + ",".join(str(v) for v in stage["labels"].values())
+            detail = (f" — {stage['count']} × p50 {_format_seconds(stage['p50_s'])}, "
+                      f"p99 {_format_seconds(stage['p99_s'])}") if stage["count"] > 1 else ""
+            lines.append(f"   • {label} : {_format_seconds(stage['total_s'])}{detail}")
+        if data["counters"]:
+            parts = []
+            for counter in data["counters"]:
+                labels = ",".join(f"{v}" for v in counter["labels"].values())
+                parts.append(f"{counter['counter']}{'[' + labels + ']' if labels else ''} : {counter['value']}")
+            lines.append("🔢 " + " · ".join(parts))
+        return lines
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+        return path
+
+    def write_prometheus(self, path, prefix="carlo_scraper"):
+        """Format texte Prometheus (histogrammes `<prefix>_stage_seconds`, compteurs `<prefix>_<nom>_total`)."""
+        with self._lock:
+            stages = list(self._stages.items())
+            counters = sorted(self._counters.items())
+        lines = [f"# HELP {prefix}_stage_seconds Durée des étapes du dernier run de scraping.",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        for (name, labels), h in stages:
+            labels = (("stage", name),) + labels
+            base = _prom_labels(labels)
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), h.buckets):
+                cumulative += count
+                lines.append(f"{prefix}_stage_seconds_bucket{_prom_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{prefix}_stage_seconds_sum{base} {h.total:.6f}")
+            lines.append(f"{prefix}_stage_seconds_count{base} {h.count}")
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total{_prom_labels(labels)} {value}")
+        lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_run_timestamp_seconds {self.started_at:.0f}")
+        _write_atomic(path, "\n".join(lines) + "\n")
+        return path
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+def _write_atomic(path, content):
+    # Le collecteur textfile peut lire à tout moment : fichier temporaire puis renommage
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
@@ -0,0 +1,228 @@
+# scrape_jobs.py
+"""
+Jobs de scraping en arrière-plan pour l'app Streamlit.
+- Le scraping (CarloScraperThread) tourne dans un exécuteur propre au processus, hors du
+  script Streamlit : les reruns (interaction avec un widget) ne l'interrompent plus.
+- ScrapeJob: état du job (statut, progression, logs récents, débit, problèmes par référence)
+  mis à jour par les callbacks ; les lignes partielles sont relues de façon incrémentale.
+- registry: registre des jobs, interrogé à chaque rerun via l'identifiant stocké dans st.session_state ;
+  seuls les MAX_FINISHED_JOBS jobs terminés les plus récemment consultés sont conservés (mémoire bornée).
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from carlo_scraper import CarloScraperThread
+from result_sink import results_stream_path
+
+STATUS_PENDING = "en attente"
+STATUS_RUNNING = "en cours"
+STATUS_DONE = "terminé"
+STATUS_FAILED = "échec"
+
+# Réglages du scraper pour les jobs de la page (repris par bench_scraper.py)
+STREAMLIT_SCRAPER_OPTIONS = {
+    "workers": 4,
+    "chunk_size": 20,  # résultats partiels visibles rapidement dans la page
+}
+# Jobs terminés gardés en mémoire (avec leurs lignes relues) ; au-delà, les moins récemment consultés sont oubliés
+MAX_FINISHED_JOBS = 20
+# Début du flux déjà lu, comparé à chaque lecture pour détecter un fichier réécrit par un autre run
+_FINGERPRINT_BYTES = 4096
+
+
+class ScrapeJob:
+    """État d'un scraping lancé en arrière-plan (thread-safe, lu par la page à chaque rafraîchissement)."""
+
+    def __init__(self, job_id, output_folder, max_logs=300):
+        self.id = job_id
+        self.output_folder = output_folder
+        self.stream_file = results_stream_path(output_folder)
+        self.status = STATUS_PENDING
+        self.current = 0
+        self.total = 0
+        self.stats = {}
+        self.message = ""
+        self.result_path = None
+        self.started_at = None
+        self.finished_at = None
+        self.scraper = None
+        self._logs = deque(maxlen=max_logs)
+        self._issues = []
+        self._lock = threading.Lock()
+        self._rows_lock = threading.Lock()
+        self._reset_rows()
+
+    def _reset_rows(self):
+        self._rows = []
+        self._rows_offset = 0
+        self._rows_fingerprint = b""
+
+    # ----------------------------
+    # Callbacks du scraper (thread d'arrière-plan)
+    # ----------------------------
+    def _on_log(self, msg):
+        with self._lock:
+            self._logs.append(msg.strip("\n"))
+
+    def _on_progress(self, current, total):
+        with self._lock:
+            self.current, self.total = current, total
+
+    def _on_stats(self, stats):
+        with self._lock:
+            self.stats = stats
+
+    def _on_issue(self, ref, kind, detail):
+        with self._lock:
+            self._issues.append({"Référence": ref, "Problème": kind, "Détail": detail})
+
+    def _on_finished(self, success, path_or_msg):
+        with self._lock:
+            self.status = STATUS_DONE if success else STATUS_FAILED
+            self.result_path = path_or_msg if success else None
+            self.message = path_or_msg
+            self.finished_at = time.time()
+
+    def _run(self):
+        with self._lock:
+            self.status = STATUS_RUNNING
+            self.started_at = time.time()
+        # Le run tronque le flux (sauf reprise) : ne rien garder d'une lecture antérieure
+        with self._rows_lock:
+            self._reset_rows()
+        try:
+            self.scraper.run()
+        finally:
+            with self._lock:
+                if self.status == STATUS_RUNNING:
+                    self.status = STATUS_FAILED
+                    self.finished_at = time.time()
+
+    # ----------------------------
+    # Lecture depuis la page
+    # ----------------------------
+    @property
+    def running(self):
+        return self.status in (STATUS_PENDING, STATUS_RUNNING)
+
+    def stop(self):
+        if self.scraper is not None:
+            self.scraper.stop()
+
+    def snapshot(self):
+        """Copie cohérente de l'état pour l'affichage."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "current": self.current,
+                "total": self.total,
+                "stats": dict(self.stats),
+                "message": self.message,
+                "result_path": self.result_path,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "logs": list(self._logs),
+                "issues": list(self._issues),
+            }
+
+    def partial_rows(self):
+        """
+        Lignes produit déjà écrites sur disque.
+        Seules les lignes ajoutées depuis l'appel précédent sont lues (position mémorisée) ;
+        une dernière ligne incomplète est relue au prochain appel. Si le fichier a raccourci ou
+        si son début a changé (réécrit par un autre run), il est relu depuis le début.
+        """
+        with self._rows_lock:
+            try:
+                size = os.stat(self.stream_file).st_size
+            except FileNotFoundError:
+                self._reset_rows()
+                return self._rows
+            with open(self.stream_file, "rb") as f:
+                if size < self._rows_offset or f.read(len(self._rows_fingerprint)) != self._rows_fingerprint:
+                    self._reset_rows()
+                elif self._rows_offset:
+                    # La position mémorisée doit rester une fin de ligne
+                    f.seek(self._rows_offset - 1)
+                    if f.read(1) != b"\n":
+                        self._reset_rows()
+                f.seek(self._rows_offset)
+                chunk = f.read(size - self._rows_offset)
+                end = chunk.rfind(b"\n") + 1
+                for line in chunk[:end].splitlines():
+                    if not line.strip():
+                        continue
+                    try:
+                        self._rows.append(json.loads(line))
+                    except ValueError:
+                        continue    # ligne corrompue : ignorée plutôt que de casser la page
+                self._rows_offset += end
+                if len(self._rows_fingerprint) < _FINGERPRINT_BYTES:
+                    f.seek(0)
+                    self._rows_fingerprint = f.read(min(self._rows_offset, _FINGERPRINT_BYTES))
+            return self._rows
+
+
+class JobRegistry:
+    """
+    Registre des jobs du processus ; au plus `max_jobs` scrapings simultanés.
+    Jobs rangés du moins au plus récemment consulté : les jobs terminés en trop sont évincés (LRU),
+    les jobs en attente ou en cours ne le sont jamais.
+    """
+
+    def __init__(self, max_jobs=2, max_finished=MAX_FINISHED_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="scrape-job")
+        self._jobs = OrderedDict()
+        self._max_finished = max_finished
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        """Oublie les jobs terminés les moins récemment consultés au-delà de max_finished (sous verrou)."""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.running]
+        for job_id in finished[:max(0, len(finished) - self._max_finished)]:
+            del self._jobs[job_id]
+
+    def submit(self, output_folder, **scraper_kwargs):
+        """Crée le job et le met en file ; `scraper_kwargs` sont passés à CarloScraperThread."""
+        job = ScrapeJob(uuid.uuid4().hex[:12], output_folder)
+        job.scraper = CarloScraperThread(
+            output_folder=output_folder,
+            log_callback=job._on_log,
+            progress_callback=job._on_progress,
+            stats_callback=job._on_stats,
+            issue_callback=job._on_issue,
+            finished_callback=job._on_finished,
+            **scraper_kwargs,
+        )
+        # Flux réellement écrit (resultats_archive.jsonl pour une relecture de l'archive)
+        job.stream_file = job.scraper.stream_file
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        self._executor.submit(job._run)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+            return job
+
+    def running_in(self, output_folder):
+        """Job encore actif qui écrit dans ce dossier (un seul à la fois par dossier)."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.output_folder == output_folder and job.running:
+                    return job
+        return None
+
+
+registry = JobRegistry()
@@ -0,0 +1,171 @@
+# startup_profile.py
+"""
+Mesure du démarrage de l'interface : temps jusqu'à la première fenêtre et rapport façon `-X importtime`.
+- StartupProfile: jalons (import de dashboard, construction de App, première fenêtre affichée),
+  budget de démarrage (CARLO_STARTUP_BUDGET, en secondes) ; un dépassement est signalé sur stderr.
+- ImportTimer: chronomètre chaque import (temps propre et cumulé, en µs comme -X importtime) ;
+  activé par `python main.py --startup-report` ou CARLO_STARTUP_REPORT=1.
+- HEAVY_MODULES: bibliothèques lourdes qui ne devraient pas être chargées avant la première fenêtre.
+"""
+
+import os
+import sys
+import threading
+import time
+
+STARTUP_BUDGET_S = 1.5
+HEAVY_MODULES = ("pandas", "numpy", "lxml", "requests", "urllib3", "bs4", "openpyxl",
+                 "ics", "arrow", "tkcalendar", "babel", "pyarrow")
+REPORT_TOP = 15
+
+
+class _TimedLoader:
+    """Enveloppe d'un loader : chronomètre exec_module, délègue tout le reste au loader d'origine."""
+
+    def __init__(self, loader, timer, name):
+        self._loader = loader
+        self._timer = timer
+        self._name = name
+
+    def create_module(self, spec):
+        create = getattr(self._loader, "create_module", None)
+        return create(spec) if create is not None else None
+
+    def exec_module(self, module):
+        self._timer._enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._exit(self._name)
+            # Le module garde son loader d'origine (importlib.resources, vérifications isinstance…)
+            spec = getattr(module, "__spec__", None)
+            if spec is not None and spec.loader is self:
+                spec.loader = self._loader
+            if getattr(module, "__loader__", None) is self:
+                module.__loader__ = self._loader
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class ImportTimer:
+    """Finder placé en tête de sys.meta_path : trouve le module via les autres finders et chronomètre son exécution."""
+
+    def __init__(self):
+        self.records = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            find = getattr(finder, "find_spec", None)
+            if finder is self or find is None:
+                continue
+            spec = find(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self, name)
+        return spec
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self):
+        # [début, temps des imports imbriqués]
+        self._stack().append([time.perf_counter(), 0.0])
+
+    def _exit(self, name):
+        stack = self._stack()
+        start, children = stack.pop()
+        cumulative = time.perf_counter() - start
+        if stack:
+            stack[-1][1] += cumulative
+        with self._lock:
+            self.records.append((name, cumulative - children, cumulative, len(stack)))
+
+    def report_lines(self, top=REPORT_TOP):
+        """Imports les plus coûteux (cumulé), au format de -X importtime : propre | cumulé | module."""
+        with self._lock:
+            records = sorted(self.records, key=lambda r: r[2], reverse=True)[:top]
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for name, own, cumulative, depth in records:
+            lines.append(f"import time: {own * 1e6:9.0f} | {cumulative * 1e6:10.0f} | {'  ' * depth}{name}")
+        return lines
+
+
+class StartupProfile:
+    """Jalons du démarrage, mesurés depuis la création du profil (tout début de main.py)."""
+
+    def __init__(self, budget=STARTUP_BUDGET_S, report=False, stream=None):
+        self.started = time.perf_counter()
+        self.budget = budget
+        self.report = report
+        self.stream = stream or sys.stderr
+        self.marks = []
+        self.import_timer = ImportTimer().install() if report else None
+        self._done = False
+
+    @classmethod
+    def from_environment(cls, argv=()):
+        """Options : --startup-report (ou CARLO_STARTUP_REPORT=1) et CARLO_STARTUP_BUDGET=<secondes>."""
+        report = "--startup-report" in argv or os.environ.get("CARLO_STARTUP_REPORT", "") not in ("", "0")
+        try:
+            budget = float(os.environ.get("CARLO_STARTUP_BUDGET", STARTUP_BUDGET_S))
+        except ValueError:
+            budget = STARTUP_BUDGET_S
+        return cls(budget=budget, report=report)
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.started))
+
+    def watch_first_window(self, window):
+        """Dernier jalon à la première apparition de la fenêtre (<Map>), puis rapport."""
+        def on_map(_event):
+            if not self._done:
+                self.finish("première fenêtre")
+
+        window.bind("<Map>", on_map, add="+")
+
+    def finish(self, label):
+        self._done = True
+        self.mark(label)
+        if self.import_timer is not None:
+            self.import_timer.uninstall()
+        elapsed = self.marks[-1][1]
+        if self.report or elapsed > self.budget:
+            for line in self.summary_lines():
+                print(line, file=self.stream)
+        return elapsed
+
+    def summary_lines(self):
+        elapsed = self.marks[-1][1] if self.marks else 0.0
+        status = "✅" if elapsed <= self.budget else "⚠️ budget dépassé"
+        lines = [f"🚀 Démarrage : {elapsed * 1000:.0f} ms jusqu'à la première fenêtre "
+                 f"(budget {self.budget * 1000:.0f} ms) {status}"]
+        previous = 0.0
+        for label, at in self.marks:
+            lines.append(f"   • {label} : +{(at - previous) * 1000:.0f} ms (à {at * 1000:.0f} ms)")
+            previous = at
+        heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+        if heavy:
+            lines.append(f"   📦 Modules lourds déjà chargés : {', '.join(heavy)}")
+        if self.import_timer is not None:
+            lines.extend(self.import_timer.report_lines())
+        elif elapsed > self.budget:
+            lines.append("   ℹ️ Détail des imports : python main.py --startup-report")
+        return lines
@@ -0,0 +1,174 @@
+# supplier_orchestrator.py
+"""
+Comparaison multi-fournisseurs : une même liste de références interrogée sur tous les fournisseurs en parallèle.
+- MultiSupplierScraper: un CarloScraperThread par fournisseur (session, limiteur de débit, cache et dossier
+  de sortie propres), tous lancés en même temps : la durée totale est celle du fournisseur le plus lent.
+- merge_supplier_streams: fusion en flux des résultats de chaque fournisseur, dans l'ordre des références,
+  moins cher en premier et marqué ; mémoire bornée par les lignes d'une seule référence.
+- COMPARISON_COLUMNS / COMPARISON_SCHEMA: table de comparaison exportée (xlsx, CSV, Parquet).
+"""
+
+import heapq
+import os
+import threading
+import time
+from itertools import groupby
+
+from carlo_parser import COLUMNS
+from carlo_scraper import CarloScraperThread
+from reference_ingest import normalize_reference
+from result_cache import DEFAULT_CACHE_PATH, ResultCache
+from result_export import SCHEMA, export_rows, parse_price
+from result_sink import iter_jsonl, results_stream_path
+from suppliers import CarloErbaSupplier
+
+COMPARISON_COLUMNS = COLUMNS[:1] + ['Fournisseur'] + COLUMNS[1:] + ['Moins cher']
+COMPARISON_SCHEMA = {**SCHEMA, 'Fournisseur': "category", 'Moins cher': "str"}
+BEST_PRICE_MARK = "✔"
+
+
+def supplier_cache_path(supplier):
+    """Cache propre à chaque fournisseur : les entrées du cache sont indexées par référence seule."""
+    if supplier.key == CarloErbaSupplier.key:
+        # Cache historique, partagé avec ExcelFrame, l'app Streamlit et carlo_cli
+        return DEFAULT_CACHE_PATH
+    return os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), f"cache_{supplier.key}.sqlite")
+
+
+def merge_supplier_streams(streams, references):
+    """
+    Fusionne les flux JSONL [(nom du fournisseur, chemin)] ; chaque flux est déjà dans l'ordre de `references`.
+    Pour chaque référence : lignes triées par prix (sans prix en dernier), le ou les moins chers marqués.
+    """
+    order = {normalize_reference(ref): idx for idx, ref in enumerate(references)}
+
+    def keyed(name, path):
+        for row in iter_jsonl(path):
+            yield order.get(normalize_reference(row.get('Référence cherchée', "")), len(order)), name, row
+
+    merged = heapq.merge(*(keyed(name, path) for name, path in streams), key=lambda item: item[0])
+    for _, group in groupby(merged, key=lambda item: item[0]):
+        priced = [(parse_price(row.get('Prix €')), name, row) for _, name, row in group]
+        best = min((price for price, _, _ in priced if price is not None), default=None)
+        priced.sort(key=lambda item: (item[0] is None, item[0] or 0.0))
+        for price, name, row in priced:
+            mark = BEST_PRICE_MARK if best is not None and price == best else ""
+            yield {**row, 'Fournisseur': name, 'Moins cher': mark}
+
+
+class MultiSupplierScraper(threading.Thread):
+    """
+    Lance un scraping par fournisseur en parallèle puis construit la table de comparaison.
+    Callbacks (appelés depuis les threads de travail) : log (préfixé du fournisseur), progression
+    cumulée de tous les fournisseurs, fin (succès, chemin du premier fichier ou message).
+    """
+
+    def __init__(self, suppliers, references, output_folder, log_callback=None, progress_callback=None,
+                 finished_callback=None, use_cache=True, force_refresh=False, export_formats=("xlsx",)):
+        super().__init__(daemon=True)
+        self.suppliers = list(suppliers)
+        self.references = references
+        self.output_folder = output_folder
+        self.log = log_callback or (lambda msg: None)
+        self.progress = progress_callback or (lambda current, total: None)
+        self.finished = finished_callback or (lambda success, path_or_msg: None)
+        self.use_cache = use_cache
+        self.force_refresh = force_refresh
+        self.export_formats = tuple(export_formats)
+        self.threads = {}
+        self.outcomes = {}
+        self.durations = {}
+        self._progress = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        with self._lock:
+            threads = list(self.threads.values())
+        for thread in threads:
+            thread.stop()
+
+    # ----------------------------
+    # Callbacks des threads fournisseur
+    # ----------------------------
+    def _on_progress(self, key, current, total):
+        with self._lock:
+            self._progress[key] = (current, total)
+            done = sum(c for c, _ in self._progress.values())
+            total = sum(t for _, t in self._progress.values())
+        self.progress(done, total)
+
+    def _on_finished(self, supplier, started, success, path_or_msg):
+        with self._lock:
+            self.outcomes[supplier.key] = (success, path_or_msg)
+            self.durations[supplier.key] = time.monotonic() - started
+
+    def run(self):
+        caches = []
+        try:
+            os.makedirs(self.output_folder, exist_ok=True)
+            started = time.monotonic()
+            with self._lock:
+                for supplier in self.suppliers:
+                    cache = ResultCache(supplier_cache_path(supplier)) if self.use_cache else None
+                    if cache is not None:
+                        caches.append(cache)
+                    self.threads[supplier.key] = CarloScraperThread(
+                        email=getattr(supplier, "email", None),
+                        password=getattr(supplier, "password", None),
+                        references=self.references,
+                        output_folder=os.path.join(self.output_folder, supplier.key),
+                        log_callback=lambda msg, name=supplier.name: self.log(f"[{name}] {msg.strip()}"),
+                        progress_callback=lambda current, total, key=supplier.key: self._on_progress(key, current, total),
+                        finished_callback=lambda success, msg, s=supplier: self._on_finished(s, started, success, msg),
+                        rate_delay=supplier.rate_delay,
+                        workers=supplier.workers,
+                        adaptive=supplier.adaptive,
+                        cache=cache,
+                        force_refresh=self.force_refresh,
+                        export_formats=(),
+                        supplier=supplier,
+                    )
+                threads = list(self.threads.values())
+            self.log(f"🚀 {len(self.references)} référence(s) sur {len(threads)} fournisseur(s) en parallèle...")
+            for thread in threads:
+                if not self._stop_event.is_set():
+                    thread.start()
+            for thread in threads:
+                if thread.is_alive():
+                    thread.join()
+
+            for supplier in self.suppliers:
+                success, message = self.outcomes.get(supplier.key, (False, "non lancé"))
+                seconds = self.durations.get(supplier.key, 0.0)
+                self.log(f"{'✅' if success else '⚠️'} {supplier.name} : {seconds:.1f} s"
+                         f"{'' if success else f' — {message}'}")
+            self.log(f"⏱️ Durée totale : {time.monotonic() - started:.1f} s")
+            if self._stop_event.is_set():
+                self.finished(False, "Interrompu")
+                return
+
+            # Flux de chaque fournisseur ayant trouvé des produits, fusionnés dans l'ordre des références
+            streams = [
+                (supplier.name, results_stream_path(os.path.join(self.output_folder, supplier.key)))
+                for supplier in self.suppliers if self.outcomes.get(supplier.key, (False,))[0]
+            ]
+            if not streams:
+                self.log("⚠️ Aucun produit trouvé chez les fournisseurs interrogés.")
+                self.finished(False, "Aucun résultat")
+                return
+            output_files = []
+            for fmt in self.export_formats or ("xlsx",):
+                output_file = os.path.join(self.output_folder, f"comparaison_fournisseurs.{fmt}")
+                count = export_rows(merge_supplier_streams(streams, self.references), output_file,
+                                    columns=COMPARISON_COLUMNS, schema=COMPARISON_SCHEMA, fmt=fmt)
+                output_files.append(output_file)
+            self.log(f"📊 Comparaison : {count} ligne(s) produit — {', '.join(output_files)}")
+            self.finished(True, output_files[0])
+        except Exception as e:
+            self.log(f"❌ Exception durant la comparaison : {e}")
+            self.finished(False, str(e))
+        finally:
+            for cache in caches:
+                cache.close()
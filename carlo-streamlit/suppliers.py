@@ -0,0 +1,106 @@
+# suppliers.py
+"""
+Fournisseurs interrogés par le scraper : une interface commune, une implémentation par site.
+- Supplier: connexion (session authentifiée), URL de recherche, extraction des lignes produit
+  (colonnes de carlo_parser.COLUMNS) et politique de débit propre au site.
+- CarloErbaSupplier: carloerbareagents.com (premier fournisseur, comportement historique du scraper).
+- register_supplier / create_supplier / available_suppliers: registre du processus, par clé.
+Ajouter un fournisseur : sous-classe de Supplier décorée par @register_supplier.
+"""
+
+from carlo_parser import parse_search_page
+from carlo_session import BASE_URL, get_session_manager, site_url
+
+# Registre clé -> classe, dans l'ordre d'enregistrement
+SUPPLIERS = {}
+
+
+def register_supplier(cls):
+    """Décorateur : rend le fournisseur disponible sous `cls.key`."""
+    SUPPLIERS[cls.key] = cls
+    return cls
+
+
+def available_suppliers():
+    """[(clé, nom affiché, identifiants requis ?)] des fournisseurs enregistrés."""
+    return [(key, cls.name, cls.needs_credentials) for key, cls in SUPPLIERS.items()]
+
+
+def create_supplier(key, **options):
+    try:
+        cls = SUPPLIERS[key]
+    except KeyError:
+        raise ValueError(f"Fournisseur inconnu : {key} (disponibles : {', '.join(SUPPLIERS)})")
+    return cls(**options)
+
+
+class Supplier:
+    """
+    Interface d'un fournisseur. Les méthodes sont appelées depuis les threads du scraper :
+    `login` une fois par run (thread du run), `search_url` et `extract` par référence (workers).
+    Politique de débit : `rate_delay` (délai initial entre requêtes), `workers` (requêtes simultanées
+    maximum) et `adaptive` (ajustement AIMD, voir rate_limiter.AdaptiveController).
+    """
+    key = ""
+    name = ""
+    needs_credentials = False
+    rate_delay = 0.4
+    workers = 4
+    adaptive = True
+
+    def __init__(self, rate_delay=None, workers=None, adaptive=None):
+        if rate_delay is not None:
+            self.rate_delay = rate_delay
+        if workers is not None:
+            self.workers = workers
+        if adaptive is not None:
+            self.adaptive = adaptive
+
+    def login(self, log=None, pool_size=4):
+        """Session requests prête à interroger le site ; lève carlo_session.LoginError en cas d'échec."""
+        raise NotImplementedError
+
+    def search_url(self, ref):
+        raise NotImplementedError
+
+    def extract(self, html, ref):
+        """Page de résultats -> (lignes produit, erreurs d'extraction)."""
+        raise NotImplementedError
+
+    def page_parser(self):
+        """
+        Fonction de module `(html, ref) -> (lignes, erreurs)` exécutable dans un autre processus
+        (pipeline du scraper) ; None : extraction dans les threads de requête via `extract`.
+        """
+        return None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+
+@register_supplier
+class CarloErbaSupplier(Supplier):
+    key = "carlo_erba"
+    name = "Carlo Erba"
+    needs_credentials = True
+
+    def __init__(self, email, password, base_url=BASE_URL, **policy):
+        super().__init__(**policy)
+        self.email = email
+        self.password = password
+        self.base_url = base_url    # site interrogé (serveur local pour les benchmarks)
+        self._search_url = site_url(base_url, "search/?text={ref}")
+
+    def login(self, log=None, pool_size=4):
+        # Session partagée par compte et par site, réutilisée d'un run à l'autre si encore valide
+        manager = get_session_manager(self.email, self.password, pool_size=pool_size, base_url=self.base_url)
+        return manager.session(log=log)
+
+    def search_url(self, ref):
+        return self._search_url.format(ref=ref)
+
+    def extract(self, html, ref):
+        return parse_search_page(html, ref)
+
+    def page_parser(self):
+        return parse_search_page
@@ -0,0 +1,7 @@
+# conftest.py
+"""Les modules de l'application sont à plat dans carlo-streamlit/ : dossier parent ajouté au chemin d'import."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,23 @@
+# test_carlo_parser.py
+"""Lignes de résultats retrouvées même si 'quickAddToCart' apparaît ailleurs dans la page."""
+
+from bench_parser import make_search_page
+from carlo_parser import parse_search_page
+
+
+def test_rows_found_despite_class_name_in_scripts_comments_and_attributes():
+    page = make_search_page("R1", n_products=5, filler_kb=20)
+    page = page.replace("<script>", '<script>var row = "<table><tr class=quickAddToCart>";</script>'
+                        '<!-- <table><tr class="quickAddToCart"><td>ancien modèle</td></tr> -->'
+                        '<div data-js="quickAddToCart"></div><script>', 1)
+
+    rows, errors = parse_search_page(page, "R1")
+
+    assert not errors
+    assert [row['Produit'] for row in rows] == [f"Produit R1 qualité {i}" for i in range(5)]
+
+
+def test_class_name_only_in_script_means_no_result():
+    page = make_search_page("R1", n_products=0, filler_kb=20).replace("<script>", '<script>var row = "quickAddToCart";', 1)
+
+    assert parse_search_page(page, "R1") == ([], [])
@@ -0,0 +1,30 @@
+# test_carlo_scraper.py
+"""Historique des prix : les lignes servies par le cache ne sont pas des observations du run en cours."""
+
+import threading
+
+from carlo_scraper import CarloScraperThread
+from price_history import PriceHistory
+from result_cache import ResultCache
+
+
+def test_cached_rows_are_not_recorded_as_new_observations(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    history = PriceHistory(str(tmp_path / "history.sqlite"))
+    rows = [{"Référence cherchée": "R001", "Produit": "Acétone", "Cdt": "1 L", "Prix €": "12,50",
+             "Qté": "3", "Disponibilité": "En stock"}]
+    cache.put("R001", rows)
+    done = threading.Event()
+    scraper = CarloScraperThread(
+        email="cache@example.com", password="x", references=["R001"], output_folder=str(tmp_path),
+        finished_callback=lambda success, msg: done.set(), cache=cache, history=history, export_formats=(),
+    )
+    scraper.start()
+    assert done.wait(30)
+
+    (_, _, _, status, row_count), = history.runs()
+    assert status == "terminé"
+    assert row_count == 0
+    assert history.price_series(ref="R001") == []
+    cache.close()
+    history.close()
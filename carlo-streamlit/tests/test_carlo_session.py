@@ -0,0 +1,78 @@
+# test_carlo_session.py
+"""429 avec Retry-After : la réponse doit atteindre le scraper (nouvelle tentative, contrôleur adaptatif)."""
+
+import threading
+import time
+
+import pytest
+
+from bench_scraper import FakeCarloServer
+from carlo_scraper import CarloScraperThread
+from carlo_session import CarloSessionManager, get_session_manager, site_url
+
+
+@pytest.fixture
+def rate_limited_server():
+    def start(rate_limit_rate):
+        server = FakeCarloServer(latency=0.0, jitter=0.0, rate_limit_rate=rate_limit_rate,
+                                 n_products=2, filler_kb=1, empty_rate=0.0)
+        servers.append(server)
+        return server, server.start()
+
+    servers = []
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def test_429_with_retry_after_is_returned_to_caller(rate_limited_server):
+    _, base_url = rate_limited_server(1.0)
+    manager = CarloSessionManager("bench@example.com", "bench", base_url=base_url)
+    session = manager.session()
+
+    response = session.get(site_url(base_url, "search/?text=R001"), timeout=5)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    manager.close()
+
+
+def test_scraper_retries_429_with_retry_after(rate_limited_server, tmp_path):
+    server, base_url = rate_limited_server(0.5)
+    issues = []
+    done = threading.Event()
+    scraper = CarloScraperThread(
+        email="bench-429@example.com", password="bench", references=[f"R{i:03d}" for i in range(8)],
+        output_folder=str(tmp_path), finished_callback=lambda success, msg: done.set(),
+        issue_callback=lambda ref, kind, detail: issues.append(kind),
+        rate_delay=0.01, workers=2, base_url=base_url, export_formats=(),
+    )
+    scraper.start()
+    assert done.wait(60)
+
+    assert server.status_counts.get(429, 0) > 0
+    assert scraper.controller.snapshot()["http_429"] == server.status_counts[429]
+    assert "Erreur réseau" not in issues
+
+
+def test_stopping_a_run_keeps_the_shared_session(rate_limited_server, tmp_path, monkeypatch):
+    _, base_url = rate_limited_server(0.0)
+    manager = get_session_manager("bench-stop@example.com", "bench", base_url=base_url)
+    session = manager.session()
+    closed = []
+    monkeypatch.setattr(session, "close", lambda: closed.append(True))
+    done = threading.Event()
+    scraper = CarloScraperThread(
+        email="bench-stop@example.com", password="bench", references=[f"R{i:03d}" for i in range(200)],
+        output_folder=str(tmp_path), finished_callback=lambda success, msg: done.set(),
+        rate_delay=0.05, workers=2, base_url=base_url, export_formats=(),
+    )
+    scraper.start()
+    time.sleep(0.3)
+    scraper.stop()
+    assert done.wait(30)
+
+    # Un autre run du même compte continue avec la même session (connexions conservées)
+    assert not closed
+    assert manager.session() is session
+    assert session.get(site_url(base_url, "search/?text=R999"), timeout=5).status_code == 200
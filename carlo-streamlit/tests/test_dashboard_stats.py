@@ -0,0 +1,22 @@
+# test_dashboard_stats.py
+"""Compteurs du tableau de bord : une ligne JSONL corrompue est ignorée, les suivantes sont comptées."""
+
+import json
+
+from dashboard_stats import ResultsTally
+
+
+def test_corrupt_line_is_skipped(tmp_path):
+    stream = tmp_path / "resultats_scraping.jsonl"
+    row = {"Référence cherchée": "R001", "Disponibilité": "En stock"}
+    stream.write_bytes(json.dumps(row).encode() + b"\n" + b'{"R\xe9f\n')
+    tally = ResultsTally(str(stream))
+
+    assert tally.update()
+    with open(stream, "ab") as f:
+        f.write(json.dumps({**row, "Référence cherchée": "R002"}).encode() + b"\n")
+    assert tally.update()
+
+    assert tally.rows == 2
+    assert tally.in_stock == 2
+    assert tally.references == {"R001", "R002"}
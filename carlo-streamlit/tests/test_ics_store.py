@@ -0,0 +1,65 @@
+# test_ics_store.py
+"""Récurrences avec fuseau : développées dans le fuseau de l'événement, pas en heure locale."""
+
+import datetime
+import time
+
+import pytest
+
+from ics_store import parse_ics_events, expand_occurrences
+
+pytestmark = pytest.mark.skipif(not hasattr(time, "tzset"), reason="fuseau local non modifiable (time.tzset)")
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    def set_tz(name):
+        monkeypatch.setenv("TZ", name)
+        time.tzset()
+    yield set_tz
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _event(*props):
+    lines = ["BEGIN:VCALENDAR", "BEGIN:VEVENT", *props, "SUMMARY:Réunion", "END:VEVENT", "END:VCALENDAR"]
+    return next(parse_ics_events(line + "\r\n" for line in lines))
+
+
+def _window(event):
+    return expand_occurrences(event, datetime.datetime(2026, 10, 1), datetime.datetime(2026, 11, 10))
+
+
+def test_paris_rule_crosses_dst_from_utc_host(local_tz):
+    local_tz("UTC")
+    event = _event("DTSTART;TZID=Europe/Paris:20261005T080000", "DTEND;TZID=Europe/Paris:20261005T090000",
+                   "RRULE:FREQ=WEEKLY", "EXDATE;TZID=Europe/Paris:20261012T080000")
+
+    assert _window(event) == [
+        datetime.datetime(2026, 10, 5, 6, 0),
+        datetime.datetime(2026, 10, 19, 6, 0),
+        # Passage à l'heure d'hiver le 25/10 : 08:00 à Paris = 07:00 UTC
+        datetime.datetime(2026, 10, 26, 7, 0),
+        datetime.datetime(2026, 11, 2, 7, 0),
+        datetime.datetime(2026, 11, 9, 7, 0),
+    ]
+
+
+def test_utc_rule_from_paris_host(local_tz):
+    local_tz("Europe/Paris")
+    event = _event("DTSTART:20261005T070000Z", "RRULE:FREQ=WEEKLY;UNTIL=20261103T000000Z")
+
+    assert _window(event) == [
+        datetime.datetime(2026, 10, 5, 9, 0),
+        datetime.datetime(2026, 10, 12, 9, 0),
+        datetime.datetime(2026, 10, 19, 9, 0),
+        datetime.datetime(2026, 10, 26, 8, 0),
+        datetime.datetime(2026, 11, 2, 8, 0),
+    ]
+
+
+def test_floating_rule_keeps_wall_clock(local_tz):
+    local_tz("UTC")
+    event = _event("DTSTART:20261005T080000", "RRULE:FREQ=WEEKLY;COUNT=4", "EXDATE:20261012T080000")
+
+    assert [dt.hour for dt in _window(event)] == [8, 8, 8]
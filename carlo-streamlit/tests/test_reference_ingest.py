@@ -0,0 +1,22 @@
+# test_reference_ingest.py
+"""Listes de références déjà séparées (archive des pages, --refs-file) : pas de re-découpage sur la virgule."""
+
+from types import SimpleNamespace
+
+from carlo_cli import collect_references
+from reference_ingest import build_plan
+
+
+def test_reference_list_keeps_commas():
+    plan = build_plan(references=["A,1", "B 2", "a,1"])
+
+    assert plan.references == ["A,1", "B 2"]
+    assert plan.duplicates == 1
+
+
+def test_refs_file_lines_keep_commas(tmp_path):
+    refs_file = tmp_path / "refs.txt"
+    refs_file.write_text("A,1\nB 2\n\n", encoding="utf-8")
+    args = SimpleNamespace(excel=None, refs="C3, D4", refs_file=str(refs_file), column="Référence", sheet=None)
+
+    assert collect_references(args).references == ["C3", "D4", "A,1", "B 2"]
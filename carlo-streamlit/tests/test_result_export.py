@@ -0,0 +1,29 @@
+# test_result_export.py
+"""Conversion des prix (séparateurs français et anglais) et export d'un classeur quelconque sans typage."""
+
+import csv
+
+import pytest
+
+from result_export import export_rows, parse_price
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12,50", 12.5),
+    ("1 234.5 €", 1234.5),
+    ("1.234,56", 1234.56),
+    ("1,234.56", 1234.56),
+    ("", None),
+])
+def test_parse_price(text, expected):
+    assert parse_price(text) == expected
+
+
+def test_export_without_schema_keeps_foreign_columns(tmp_path):
+    output = tmp_path / "apercu.csv"
+    rows = [("A", "12 EUR", "x3"), ("B", 1.5, 2)]
+
+    assert export_rows(rows, str(output), columns=["Réf", "Prix €", "Qté"], schema=None) == 2
+
+    with open(output, encoding="utf-8-sig", newline="") as f:
+        assert list(csv.reader(f))[1] == ["A", "12 EUR", "x3"]
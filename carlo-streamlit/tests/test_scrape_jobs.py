@@ -0,0 +1,65 @@
+# test_scrape_jobs.py
+"""Lecture incrémentale des résultats partiels (flux tronqué ou réécrit) et jobs terminés gardés en mémoire."""
+
+import json
+import time
+
+from result_cache import ResultCache
+from scrape_jobs import STATUS_DONE, JobRegistry, ScrapeJob
+
+
+def _write_rows(path, rows, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.write("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def test_partial_rows_restarts_when_stream_is_rewritten(tmp_path):
+    job = ScrapeJob("job", str(tmp_path))
+    _write_rows(job.stream_file, [{"run": 1, "i": i, "pad": "x" * i} for i in range(50)])
+    assert len(job.partial_rows()) == 50
+
+    # Nouveau run dans le même dossier : fichier réécrit, plus long que la position mémorisée
+    _write_rows(job.stream_file, [{"run": 2, "i": i, "pad": "yy" * i} for i in range(80)])
+    rows = job.partial_rows()
+
+    assert len(rows) == 80
+    assert {row["run"] for row in rows} == {2}
+
+
+def test_partial_rows_after_truncation_and_corrupt_line(tmp_path):
+    job = ScrapeJob("job", str(tmp_path))
+    _write_rows(job.stream_file, [{"i": i} for i in range(10)])
+    assert len(job.partial_rows()) == 10
+
+    _write_rows(job.stream_file, [{"i": 0}])
+    assert len(job.partial_rows()) == 1
+
+    with open(job.stream_file, "a", encoding="utf-8") as f:
+        f.write("pas du json\n")
+    _write_rows(job.stream_file, [{"i": 1}], mode="a")
+    assert [row["i"] for row in job.partial_rows()] == [0, 1]
+
+
+def test_registry_forgets_least_recently_read_finished_jobs(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    cache.put("R001", [{"Référence cherchée": "R001", "Produit": "Acétone", "Cdt": "1 L", "Prix €": "12,50",
+                       "Qté": "3", "Disponibilité": "En stock"}])
+    registry = JobRegistry(max_finished=2)
+
+    def run_job(name):
+        # Référence en cache : pas de connexion, le job se termine aussitôt
+        job = registry.submit(str(tmp_path / name), email="e@x", password="p", references=["R001"],
+                              cache=cache, export_formats=())
+        deadline = time.monotonic() + 30
+        while job.running and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert job.status == STATUS_DONE
+        return job
+
+    first, second, third = run_job("a"), run_job("b"), run_job("c")
+    assert registry.get(first.id) is first      # consulté : devient le plus récent
+    fourth = run_job("d")
+
+    assert registry.get(second.id) is None
+    assert [registry.get(job.id) for job in (first, third, fourth)] == [first, third, fourth]
+    cache.close()
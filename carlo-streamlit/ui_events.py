@@ -0,0 +1,70 @@
+# ui_events.py
+"""
+File d'événements entre les threads de travail et l'interface Tk.
+- UiEventQueue: les threads y déposent logs, valeurs courantes (progression, débit) et actions ;
+  l'interface la vide à intervalle fixe et affiche par lots, au lieu d'un `after(0, ...)` par message.
+Les valeurs courantes sont fusionnées (seule la dernière compte), les logs sont bornés en mémoire
+et peuvent être recopiés intégralement dans un fichier.
+"""
+
+import threading
+from collections import deque
+
+
+class UiEventQueue:
+    """
+    Thread-safe. `drain()` est appelé par le thread UI et retourne
+    (logs en attente, logs omis, valeurs courantes {clé: valeur}, actions à exécuter).
+    Au-delà de `max_pending` logs entre deux vidages, les plus anciens sont omis de l'affichage
+    (ils restent dans le fichier de log s'il est ouvert).
+    """
+
+    def __init__(self, max_pending=2000):
+        self._logs = deque(maxlen=max_pending)
+        self._dropped = 0
+        self._latest = {}
+        self._actions = []
+        self._lock = threading.Lock()
+        self._spill = None
+
+    def open_spill(self, path):
+        """Recopie tous les logs suivants dans `path` (remplace le fichier précédent)."""
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+            self._spill = open(path, "w", encoding="utf-8")
+
+    def close_spill(self):
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+
+    def put_log(self, msg):
+        with self._lock:
+            if len(self._logs) == self._logs.maxlen:
+                self._dropped += 1
+            self._logs.append(msg)
+            if self._spill is not None:
+                self._spill.write(msg + "\n")
+
+    def set_latest(self, key, value):
+        """Valeur courante (progression, débit…) : écrase la précédente non encore affichée."""
+        with self._lock:
+            self._latest[key] = value
+
+    def put_action(self, action):
+        """Action à exécuter par le thread UI, après les logs et valeurs du même lot (ex. fin du run)."""
+        with self._lock:
+            self._actions.append(action)
+
+    def drain(self):
+        with self._lock:
+            logs, dropped = list(self._logs), self._dropped
+            latest, actions = self._latest, self._actions
+            self._logs.clear()
+            self._dropped = 0
+            self._latest, self._actions = {}, []
+            if self._spill is not None:
+                self._spill.flush()
+        return logs, dropped, latest, actions
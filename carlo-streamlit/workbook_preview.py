@@ -0,0 +1,171 @@
+# workbook_preview.py
+"""
+Lecture par fenêtres d'une feuille Excel pour l'aperçu de ExcelFrame.
+- WorkbookWindow: lit seulement les lignes demandées (blocs mis en cache), sans charger la feuille entière.
+- sheet_names: liste des feuilles d'un classeur sans le charger.
+Aucune dépendance à Tk : les lectures sont faites dans un thread de fond par l'interface.
+"""
+
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+
+BLOCK_SIZE = 200
+
+
+def _is_xls(path):
+    return os.path.splitext(str(path))[1].lower() == ".xls"
+
+
+def sheet_names(path):
+    """Noms des feuilles du classeur (lecture des métadonnées uniquement pour les .xlsx)."""
+    if _is_xls(path):
+        import pandas as pd
+        with pd.ExcelFile(path) as xls:
+            return list(xls.sheet_names)
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def _estimate_xml_rows(path, member, sample_size=256 * 1024):
+    """
+    Estimation du nombre de lignes d'une feuille sans dimension déclarée (fichiers écrits en flux) :
+    nombre de balises <row> dans le début du XML, rapporté à sa taille décompressée.
+    """
+    if not member:
+        return None
+    try:
+        with zipfile.ZipFile(path) as archive:
+            size = archive.getinfo(member).file_size
+            with archive.open(member) as f:
+                sample = f.read(sample_size)
+    except (KeyError, OSError, zipfile.BadZipFile):
+        return None
+    rows = sample.count(b"<row ") + sample.count(b"<row>")
+    if not rows:
+        return 0
+    if len(sample) >= size:
+        return max(0, rows - 1)
+    return max(0, int(rows * size / len(sample)) - 1)
+
+
+class WorkbookWindow:
+    """
+    Accès par plages de lignes à une feuille (en-tête = première ligne).
+    - .xlsx : openpyxl en read_only ; un curseur de lecture est conservé, une fenêtre plus bas
+      dans la feuille reprend là où la précédente s'est arrêtée (défilement vers le bas sans relecture).
+    - .xls : pas de lecture en flux possible (xlrd charge le fichier) ; pandas avec skiprows/nrows.
+    Les blocs lus restent dans un cache LRU de `max_blocks` blocs de BLOCK_SIZE lignes.
+    Thread-safe : les lectures sont sérialisées.
+    """
+
+    def __init__(self, path, sheet=None, max_blocks=16):
+        self.path = path
+        self.max_blocks = max_blocks
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+        self._wb = None
+        self._cursor = None          # (bloc suivant, itérateur de lignes)
+        self.exact = False           # nombre de lignes connu exactement (fin de feuille atteinte)
+
+        if _is_xls(path):
+            import pandas as pd
+            self.sheet = sheet if sheet is not None else 0
+            self.columns = [str(c) for c in pd.read_excel(path, sheet_name=self.sheet, nrows=0).columns]
+            self.row_count = None
+        else:
+            from openpyxl import load_workbook
+            self._wb = load_workbook(path, read_only=True, data_only=True)
+            self.sheet = sheet if sheet is not None else self._wb.sheetnames[0]
+            self._ws = self._wb[self.sheet]
+            header = next(self._ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            self.columns = [str(c) if c is not None else f"Colonne {i + 1}" for i, c in enumerate(header)]
+            # Dimension déclarée dans le fichier (peut être surestimée), sinon estimation par la taille du XML
+            max_row = self._ws.max_row
+            if max_row:
+                self.row_count = max(0, max_row - 1)
+            else:
+                self.row_count = _estimate_xml_rows(path, getattr(self._ws, "_worksheet_path", None))
+
+    def estimated_rows(self):
+        """Nombre de lignes de données (hors en-tête) ; estimation tant que la fin n'a pas été lue."""
+        return self.row_count
+
+    def read(self, start, count):
+        """Lignes de données [start, start + count) sous forme de tuples (alignés sur les colonnes)."""
+        rows = []
+        first, last = start // BLOCK_SIZE, (start + count - 1) // BLOCK_SIZE
+        with self._lock:
+            for index in range(first, last + 1):
+                block = self._block(index)
+                rows.extend(block)
+                if len(block) < BLOCK_SIZE:
+                    break
+        offset = start - first * BLOCK_SIZE
+        return rows[offset:offset + count]
+
+    def iter_rows(self):
+        """Toutes les lignes de données, en flux (export sans charger la feuille)."""
+        index = 0
+        while True:
+            with self._lock:
+                block = self._block(index)
+            yield from block
+            if len(block) < BLOCK_SIZE:
+                return
+            index += 1
+
+    def close(self):
+        with self._lock:
+            self._cursor = None
+            self._blocks.clear()
+            if self._wb is not None:
+                self._wb.close()
+                self._wb = None
+
+    # ----------------------------
+    # Lecture des blocs
+    # ----------------------------
+    def _block(self, index):
+        block = self._blocks.get(index)
+        if block is not None:
+            self._blocks.move_to_end(index)
+            return block
+        block = self._read_xls_block(index) if self._wb is None else self._read_xlsx_block(index)
+        self._blocks[index] = block
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        if len(block) < BLOCK_SIZE:
+            # Fin de feuille atteinte : nombre de lignes exact
+            self.row_count = index * BLOCK_SIZE + len(block)
+            self.exact = True
+        return block
+
+    def _read_xlsx_block(self, index):
+        if self._cursor is None or self._cursor[0] > index:
+            rows = self._ws.iter_rows(min_row=2 + index * BLOCK_SIZE, values_only=True)
+            self._cursor = (index, rows)
+        next_index, rows = self._cursor
+        # Blocs sautés (défilement rapide vers le bas) : lus sans être conservés
+        for _ in range((index - next_index) * BLOCK_SIZE):
+            if next(rows, None) is None:
+                break
+        width = len(self.columns)
+        block = []
+        for row in rows:
+            block.append(tuple(row[:width]) + ("",) * (width - len(row)))
+            if len(block) == BLOCK_SIZE:
+                break
+        self._cursor = (index + 1, rows)
+        return block
+
+    def _read_xls_block(self, index):
+        import pandas as pd
+        df = pd.read_excel(self.path, sheet_name=self.sheet, header=None,
+                           skiprows=1 + index * BLOCK_SIZE, nrows=BLOCK_SIZE)
+        return list(df.itertuples(index=False, name=None))